@@ -0,0 +1,200 @@
+"""
+Offline stand-in for the OpenWeatherMap API, used by the load benchmark.
+
+Replays the recorded payloads in backend/benchmarks/payloads for the four
+upstream endpoints the backend calls (/data/2.5/weather, /data/2.5/forecast,
+/data/2.5/air_pollution and /geo/1.0/direct), with configurable latency,
+jitter and error rates. Payload choice depends only on the requested
+location and the latency/error draws come from a seeded RNG, so runs are
+repeatable. Call counts are served at /_stats and cleared with POST /_reset.
+
+Usage (from the repository root):
+
+    python backend/benchmarks/fake_owm.py --port 9100 [--latency-ms 50] [--jitter-ms 20]
+        [--error-rate 0.01] [--throttle-rate 0] [--seed 0]
+
+then start the backend with OPENWEATHERMAP_API_ROOT=http://127.0.0.1:9100
+"""
+import argparse
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import random
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+import orjson
+import uvicorn
+from fastapi import FastAPI, Request, Response
+
+PAYLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "payloads")
+
+
+@dataclass
+class FakeUpstreamConfig:
+    """Latency and failure behaviour of the fake upstream"""
+    latency_ms: float = 50.0
+    jitter_ms: float = 20.0
+    # Share of calls answered 500, and 429 with Retry-After
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    seed: int = 0
+
+
+def load_payloads(directory: str = PAYLOAD_DIR) -> Dict[str, List[Any]]:
+    """Load the recorded payload variants and city list"""
+    payloads = {}
+    for name in ("weather", "forecast", "air_pollution", "cities"):
+        with open(os.path.join(directory, f"{name}.json")) as f:
+            payloads[name] = json.load(f)
+    return payloads
+
+
+class RecordedPayloads:
+    """
+    Rewrites recorded payloads for the requested location.
+    The variant is picked by a stable hash of the coordinates, and
+    timestamps are moved to the present so freshness headers behave as they
+    would against the real API.
+    """
+
+    def __init__(self, payloads: Dict[str, List[Any]]):
+        self.payloads = payloads
+        self.cities = payloads["cities"]
+        self._by_name = {city["name"].lower(): city for city in self.cities}
+
+    def _variant(self, kind: str, lat: float, lon: float) -> Dict[str, Any]:
+        variants = self.payloads[kind]
+        digest = hashlib.blake2b(f"{lat:.2f},{lon:.2f}".encode(), digest_size=4).digest()
+        return copy.deepcopy(variants[int.from_bytes(digest, "big") % len(variants)])
+
+    def _nearest_city(self, lat: float, lon: float) -> Dict[str, Any]:
+        return min(self.cities, key=lambda city: (city["lat"] - lat) ** 2 + (city["lon"] - lon) ** 2)
+
+    def weather(self, lat: float, lon: float) -> Dict[str, Any]:
+        payload = self._variant("weather", lat, lon)
+        city = self._nearest_city(lat, lon)
+        payload["coord"] = {"lat": lat, "lon": lon}
+        payload["name"] = city["name"]
+        payload["sys"]["country"] = city["country"]
+        payload["dt"] = int(time.time()) // 600 * 600
+        return payload
+
+    def forecast(self, lat: float, lon: float) -> Dict[str, Any]:
+        payload = self._variant("forecast", lat, lon)
+        city = self._nearest_city(lat, lon)
+        shift = (int(time.time()) // 10800 + 1) * 10800 - payload["list"][0]["dt"]
+        for slot in payload["list"]:
+            slot["dt"] += shift
+            slot["dt_txt"] = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(slot["dt"]))
+        payload["city"].update(name=city["name"], country=city["country"], coord={"lat": lat, "lon": lon})
+        return payload
+
+    def air_pollution(self, lat: float, lon: float) -> Dict[str, Any]:
+        payload = self._variant("air_pollution", lat, lon)
+        payload["coord"] = {"lat": lat, "lon": lon}
+        payload["list"][0]["dt"] = int(time.time()) // 3600 * 3600
+        return payload
+
+    def geocode(self, query: str) -> List[Dict[str, Any]]:
+        city = self._by_name.get(query.split(",")[0].strip().lower())
+        if city is None:
+            return []
+        return [{"name": city["name"], "lat": city["lat"], "lon": city["lon"], "country": city["country"]}]
+
+
+def _json(payload: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(orjson.dumps(payload), status_code=status_code, media_type="application/json", headers=headers)
+
+
+def create_app(config: Optional[FakeUpstreamConfig] = None, payload_dir: str = PAYLOAD_DIR) -> FastAPI:
+    """Build the fake upstream app"""
+    config = config or FakeUpstreamConfig()
+    recorded = RecordedPayloads(load_payloads(payload_dir))
+    rng = random.Random(config.seed)
+    calls: Counter = Counter()
+    statuses: Counter = Counter()
+    app = FastAPI(title="Fake OpenWeatherMap", docs_url=None, redoc_url=None, openapi_url=None)
+
+    async def respond(endpoint: str, request: Request, build) -> Response:
+        # Draw everything up front so the sequence depends only on call order
+        delay = max(0.0, config.latency_ms + rng.uniform(-config.jitter_ms, config.jitter_ms)) / 1000
+        roll = rng.random()
+        calls[endpoint] += 1
+        await asyncio.sleep(delay)
+
+        if "appid" not in request.query_params:
+            response = _json({"cod": 401, "message": "Invalid API key"}, 401)
+        elif roll < config.throttle_rate:
+            response = _json({"cod": 429, "message": "Too many requests"}, 429, {"Retry-After": "1"})
+        elif roll < config.throttle_rate + config.error_rate:
+            response = _json({"cod": 500, "message": "Internal error"}, 500)
+        else:
+            response = _json(build(request.query_params))
+        statuses[str(response.status_code)] += 1
+        return response
+
+    def coordinates(params) -> tuple:
+        return float(params["lat"]), float(params["lon"])
+
+    @app.get("/data/2.5/weather")
+    async def weather(request: Request):
+        return await respond("weather", request, lambda p: recorded.weather(*coordinates(p)))
+
+    @app.get("/data/2.5/forecast")
+    async def forecast(request: Request):
+        return await respond("forecast", request, lambda p: recorded.forecast(*coordinates(p)))
+
+    @app.get("/data/2.5/air_pollution")
+    async def air_pollution(request: Request):
+        return await respond("air_pollution", request, lambda p: recorded.air_pollution(*coordinates(p)))
+
+    @app.get("/geo/1.0/direct")
+    async def geocode(request: Request):
+        return await respond("direct", request, lambda p: recorded.geocode(p.get("q", "")))
+
+    @app.get("/_stats")
+    async def stats():
+        return {
+            "calls": dict(calls),
+            "total": sum(calls.values()),
+            "statuses": dict(statuses),
+            "config": asdict(config),
+        }
+
+    @app.post("/_reset")
+    async def reset():
+        calls.clear()
+        statuses.clear()
+        return {"ok": True}
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=FakeUpstreamConfig.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=FakeUpstreamConfig.jitter_ms)
+    parser.add_argument("--error-rate", type=float, default=FakeUpstreamConfig.error_rate)
+    parser.add_argument("--throttle-rate", type=float, default=FakeUpstreamConfig.throttle_rate)
+    parser.add_argument("--seed", type=int, default=FakeUpstreamConfig.seed)
+    args = parser.parse_args()
+
+    config = FakeUpstreamConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
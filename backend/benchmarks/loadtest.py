@@ -0,0 +1,352 @@
+"""
+Offline load-test benchmark for the weather API.
+
+Starts the fake OpenWeatherMap stand-in (fake_owm.py) and the backend under
+uvicorn on free local ports, then drives /weather/current, /weather/forecast,
+/weather/air-quality and /weather/geocode from a pool of concurrent clients.
+Cities are drawn from a Zipf distribution over backend/benchmarks/payloads/
+cities.json (ranked by population); coordinate lookups jitter around the
+chosen city. The report gives RPS, p50/p95/p99 latency per endpoint and the
+upstream calls the run cost.
+
+Usage (from the repository root):
+
+    python backend/benchmarks/loadtest.py [--duration 30] [--concurrency 32] [--json report.json]
+
+Against servers that are already running:
+
+    python backend/benchmarks/loadtest.py --target http://127.0.0.1:8000 --upstream http://127.0.0.1:9100
+
+Release gates; the exit status is 1 when any is violated:
+
+    --max-p99-ms 250 --min-rps 500 --max-error-rate 0.01
+"""
+import argparse
+import asyncio
+import bisect
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import httpx
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+CITIES_FILE = os.path.join(BENCHMARK_DIR, "payloads", "cities.json")
+
+# Share of requests per endpoint, roughly what the frontend issues
+DEFAULT_MIX = {"current": 0.5, "forecast": 0.2, "air_quality": 0.15, "geocode": 0.15}
+
+PATHS = {
+    "current": "/weather/current",
+    "forecast": "/weather/forecast",
+    "air_quality": "/weather/air-quality",
+    "geocode": "/weather/geocode",
+}
+
+# Endpoints that accept lat/lon as well as a city name
+COORDINATE_ENDPOINTS = {"current", "air_quality"}
+
+PERCENTILES = (50, 95, 99)
+
+
+class Workload:
+    """
+    Seeded generator of (endpoint, path, params) requests.
+    City popularity follows Zipf's law with exponent zipf_s; coordinate_share
+    of current-weather and air-quality lookups use lat/lon scattered around
+    the city (standard deviation jitter_deg) instead of its name.
+    """
+
+    def __init__(
+        self,
+        cities: Sequence[Dict[str, Any]],
+        mix: Optional[Dict[str, float]] = None,
+        coordinate_share: float = 0.3,
+        zipf_s: float = 1.1,
+        jitter_deg: float = 0.05,
+        seed: int = 0,
+    ):
+        self.cities = sorted(cities, key=lambda city: city["population"], reverse=True)
+        self.mix = mix or DEFAULT_MIX
+        self.coordinate_share = coordinate_share
+        self.jitter_deg = jitter_deg
+        self._rng = random.Random(seed)
+        self._endpoints = list(self.mix)
+        self._endpoint_cdf = list(itertools.accumulate(self.mix[name] for name in self._endpoints))
+        self._city_cdf = list(itertools.accumulate(1 / rank ** zipf_s for rank in range(1, len(self.cities) + 1)))
+
+    def _pick(self, cdf: List[float]) -> int:
+        return min(bisect.bisect_left(cdf, self._rng.random() * cdf[-1]), len(cdf) - 1)
+
+    def next_request(self) -> Tuple[str, str, Dict[str, Any]]:
+        endpoint = self._endpoints[self._pick(self._endpoint_cdf)]
+        city = self.cities[self._pick(self._city_cdf)]
+        if endpoint in COORDINATE_ENDPOINTS and self._rng.random() < self.coordinate_share:
+            params = {
+                "lat": round(max(-90.0, min(90.0, self._rng.gauss(city["lat"], self.jitter_deg))), 4),
+                "lon": round(max(-180.0, min(180.0, self._rng.gauss(city["lon"], self.jitter_deg))), 4),
+            }
+        else:
+            params = {"city": city["name"]}
+        return endpoint, PATHS[endpoint], params
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    status: int
+    latency: float
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> Dict[str, str]:
+    """Return an Authorization header for the forecast endpoint"""
+    response = await client.post("/auth/token", data={"username": username, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    workload: Workload,
+    concurrency: int,
+    duration: float,
+    headers: Dict[str, str],
+) -> Tuple[List[Sample], float]:
+    """Run a closed loop of concurrency clients for duration seconds"""
+    samples: List[Sample] = []
+    deadline = time.perf_counter() + duration
+
+    async def worker() -> None:
+        while time.perf_counter() < deadline:
+            endpoint, path, params = workload.next_request()
+            start = time.perf_counter()
+            try:
+                response = await client.get(path, params=params, headers=headers)
+                status = response.status_code
+            except httpx.HTTPError:
+                status = 0
+            samples.append(Sample(endpoint, status, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - start
+
+
+def summarize(samples: Sequence[Sample], elapsed: float) -> Dict[str, Dict[str, Any]]:
+    """Per-endpoint and overall request counts, error rate, RPS and latency percentiles (ms)"""
+    groups: Dict[str, List[Sample]] = {"all": list(samples)}
+    for sample in samples:
+        groups.setdefault(sample.endpoint, []).append(sample)
+
+    summary = {}
+    for name, group in groups.items():
+        latencies = np.array([sample.latency for sample in group]) * 1000
+        errors = sum(1 for sample in group if sample.status == 0 or sample.status >= 500)
+        row = {
+            "requests": len(group),
+            "errors": errors,
+            "error_rate": errors / len(group) if group else 0.0,
+            "rps": len(group) / elapsed if elapsed else 0.0,
+        }
+        for q in PERCENTILES:
+            row[f"p{q}_ms"] = float(np.percentile(latencies, q)) if group else 0.0
+        row["max_ms"] = float(latencies.max()) if group else 0.0
+        summary[name] = row
+    return summary
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"{'endpoint':<12} {'requests':>9} {'errors':>7} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, row in report["endpoints"].items():
+        print(
+            f"{name:<12} {row['requests']:>9} {row['errors']:>7} {row['rps']:>9.1f} "
+            f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}"
+        )
+    upstream = report.get("upstream")
+    if upstream:
+        calls = ", ".join(f"{name}={count}" for name, count in sorted(upstream["calls"].items()))
+        print(
+            f"\nupstream calls: {upstream['total']} ({calls or 'none'}); "
+            f"{upstream['calls_per_request']:.3f} per request"
+        )
+
+
+def check_gates(report: Dict[str, Any], args: argparse.Namespace) -> List[str]:
+    """Return a description of every violated release gate"""
+    overall = report["endpoints"]["all"]
+    failures = []
+    if args.max_p99_ms is not None and overall["p99_ms"] > args.max_p99_ms:
+        failures.append(f"p99 {overall['p99_ms']:.1f} ms > {args.max_p99_ms} ms")
+    if args.min_rps is not None and overall["rps"] < args.min_rps:
+        failures.append(f"throughput {overall['rps']:.1f} rps < {args.min_rps} rps")
+    if args.max_error_rate is not None and overall["error_rate"] > args.max_error_rate:
+        failures.append(f"error rate {overall['error_rate']:.4f} > {args.max_error_rate}")
+    return failures
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{' '.join(process.args)} exited with status {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+@contextmanager
+def local_servers(args: argparse.Namespace) -> Iterator[Tuple[str, str]]:
+    """Start the fake upstream and the backend; yields their base URLs"""
+    upstream_port, backend_port = free_port(), free_port()
+    upstream_url = f"http://127.0.0.1:{upstream_port}"
+    backend_url = f"http://127.0.0.1:{backend_port}"
+
+    with tempfile.TemporaryDirectory(prefix="weather-bench-") as scratch:
+        env = dict(os.environ)
+        env.update(
+            OPENWEATHERMAP_API_KEY="offline-benchmark",
+            OPENWEATHERMAP_API_ROOT=upstream_url,
+            # Start every run with an empty geocode index, shared cache and history
+            GEOCODE_INDEX_PATH=os.path.join(scratch, "geocode.sqlite3"),
+            WEATHER_SHARED_CACHE_PATH=os.path.join(scratch, "shared-cache.sqlite3"),
+            HISTORY_DB_PATH=os.path.join(scratch, "history.sqlite3"),
+        )
+        # Keep the quota and background refreshes from skewing the numbers unless asked to
+        env.setdefault("UPSTREAM_CALLS_PER_MINUTE", "1000000")
+        env.setdefault("BACKGROUND_REFRESH", "false")
+
+        upstream = subprocess.Popen(
+            [
+                sys.executable, os.path.join(BENCHMARK_DIR, "fake_owm.py"),
+                "--port", str(upstream_port),
+                "--latency-ms", str(args.latency_ms),
+                "--jitter-ms", str(args.jitter_ms),
+                "--error-rate", str(args.error_rate),
+                "--throttle-rate", str(args.throttle_rate),
+                "--seed", str(args.seed),
+            ],
+            cwd=REPO_ROOT,
+        )
+        backend = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "backend.src.main:app",
+                "--host", "127.0.0.1", "--port", str(backend_port),
+                "--workers", str(args.workers), "--log-level", "warning", "--no-access-log",
+            ],
+            cwd=REPO_ROOT,
+            env=env,
+        )
+        try:
+            wait_until_ready(f"{upstream_url}/_stats", upstream)
+            wait_until_ready(f"{backend_url}/", backend)
+            yield backend_url, upstream_url
+        finally:
+            for process in (backend, upstream):
+                process.terminate()
+            for process in (backend, upstream):
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+
+async def run(args: argparse.Namespace, target: str, upstream: Optional[str]) -> Dict[str, Any]:
+    with open(CITIES_FILE) as f:
+        cities = json.load(f)
+    workload = Workload(cities, coordinate_share=args.coordinate_share, zipf_s=args.zipf_s, seed=args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=target, limits=limits, timeout=30.0) as client:
+        headers = await login(client, args.username, args.password)
+        if args.warmup:
+            await drive(client, workload, args.concurrency, args.warmup, headers)
+
+        upstream_client = httpx.AsyncClient(base_url=upstream) if upstream else None
+        try:
+            if upstream_client:
+                await upstream_client.post("/_reset")
+            samples, elapsed = await drive(client, workload, args.concurrency, args.duration, headers)
+            upstream_stats = (await upstream_client.get("/_stats")).json() if upstream_client else None
+        finally:
+            if upstream_client:
+                await upstream_client.aclose()
+
+    report: Dict[str, Any] = {
+        "duration_s": elapsed,
+        "concurrency": args.concurrency,
+        "seed": args.seed,
+        "endpoints": summarize(samples, elapsed),
+    }
+    if upstream_stats is not None:
+        report["upstream"] = {
+            "calls": upstream_stats["calls"],
+            "total": upstream_stats["total"],
+            "statuses": upstream_stats["statuses"],
+            "calls_per_request": upstream_stats["total"] / max(1, len(samples)),
+        }
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", help="base URL of a running backend; default starts one locally")
+    parser.add_argument("--upstream", help="base URL of a running fake_owm.py, for upstream call counts")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds run first")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--workers", type=int, default=1, help="backend worker processes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--coordinate-share", type=float, default=0.3)
+    parser.add_argument("--zipf-s", type=float, default=1.1)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="fake upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=20.0, help="fake upstream latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fake upstream 500 rate")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fake upstream 429 rate")
+    parser.add_argument("--username", default="johndoe")
+    parser.add_argument("--password", default="secret")
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--max-p99-ms", type=float)
+    parser.add_argument("--min-rps", type=float)
+    parser.add_argument("--max-error-rate", type=float)
+    args = parser.parse_args()
+
+    if args.target:
+        report = asyncio.run(run(args, args.target, args.upstream))
+    else:
+        with local_servers(args) as (target, upstream):
+            report = asyncio.run(run(args, target, upstream))
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failures = check_gates(report, args)
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Cold-start benchmark for the backend.
+
+Runs each probe in a fresh interpreter so nothing is shared between runs:
+
+    import       import backend.src.main
+    first_login  import, then serve one POST /auth/token through the ASGI app
+
+Usage (from the repository root):
+
+    python backend/benchmarks/startup.py [--runs 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROBES = {
+    "import": "import backend.src.main",
+    "first_login": (
+        "from fastapi.testclient import TestClient\n"
+        "from backend.src.main import app\n"
+        "response = TestClient(app).post('/auth/token', data={'username': 'johndoe', 'password': 'secret'})\n"
+        "assert response.status_code == 200, response.text\n"
+    ),
+}
+
+
+def run_probe(code: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, check=True)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="fresh interpreters per probe")
+    args = parser.parse_args()
+
+    baseline = [run_probe("pass") for _ in range(args.runs)]
+    print(f"{'probe':<12} {'median ms':>10} {'min ms':>10} {'max ms':>10}")
+    for name, code in PROBES.items():
+        # Subtract bare interpreter start-up so the numbers are the app's own cost
+        timings = [run_probe(code) - statistics.median(baseline) for _ in range(args.runs)]
+        print(
+            f"{name:<12} {statistics.median(timings) * 1000:>10.1f} "
+            f"{min(timings) * 1000:>10.1f} {max(timings) * 1000:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""
+gunicorn settings for production serving with uvicorn workers.
+
+    gunicorn -c backend/gunicorn.conf.py backend.src.main:app
+
+Send SIGHUP to the master for a graceful reload (new workers start before
+old ones finish their in-flight requests) and SIGTERM for a graceful stop.
+"""
+import multiprocessing
+import os
+
+bind = f"{os.getenv('BACKEND_HOST', '0.0.0.0')}:{os.getenv('BACKEND_PORT', 8000)}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Workers read WEB_CONCURRENCY to split the upstream quota and to enable the
+# shared response cache, so make sure it matches the real worker count
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", 30))
+timeout = int(os.getenv("WORKER_TIMEOUT", 60))
+keepalive = 5
+
+# Recycle workers periodically to bound memory growth; jitter avoids restarting all at once
+max_requests = int(os.getenv("WORKER_MAX_REQUESTS", 0))
+max_requests_jitter = max_requests // 10
+
+accesslog = None
+errorlog = "-"
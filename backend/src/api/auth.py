@@ -1,24 +1,40 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+import time
 from datetime import timedelta
 
 from backend.src.models.user import Token, User
-from backend.src.auth.utils import authenticate_user, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from backend.src.auth.utils import authenticate_user_async, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from backend.src.auth.hashing_pool import HashingPoolBusy
+from backend.src.services.metrics import LOGIN_DURATION
 from backend.src.auth.dependencies import get_current_active_user
+from backend.src.api.metrics import TimedRoute
 
 router = APIRouter(
     prefix="/auth",
     tags=["auth"],
     responses={401: {"description": "Unauthorized"}},
+    route_class=TimedRoute,
 )
 
 @router.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
     """Login endpoint to get JWT token"""
-    # Authenticate the user
-    user = authenticate_user(form_data.username, form_data.password)
+    start = time.perf_counter()
+    
+    # Authenticate the user; bcrypt runs on the hashing pool, not the event loop
+    try:
+        user = await authenticate_user_async(form_data.username, form_data.password)
+    except HashingPoolBusy as e:
+        LOGIN_DURATION.labels(outcome="busy").observe(time.perf_counter() - start)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
     
     if not user:
+        LOGIN_DURATION.labels(outcome="rejected").observe(time.perf_counter() - start)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -32,6 +48,7 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
         expires_delta=access_token_expires
     )
     
+    LOGIN_DURATION.labels(outcome="success").observe(time.perf_counter() - start)
     return {"access_token": access_token, "token_type": "bearer"}
 
 
@@ -0,0 +1,111 @@
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+
+from backend.src.api.responses import model_response, public_model
+from backend.src.services.cache import ttls_from_env
+
+# Lower bound for max-age, so observations that arrive late upstream are
+# still cached briefly by clients and revalidated with a cheap 304
+MIN_MAX_AGE = 60
+
+# How often each endpoint's data is refreshed; matches the response cache TTLs
+REFRESH_INTERVALS = ttls_from_env()
+
+
+def observed_at(dt: int) -> datetime:
+    """Convert an upstream Unix observation timestamp to an aware UTC datetime"""
+    return datetime.fromtimestamp(dt, tz=timezone.utc)
+
+
+def max_age(endpoint: str, last_modified: Optional[datetime] = None) -> int:
+    """
+    Seconds a client may reuse a response: the time until the next expected
+    refresh of an observation, or the whole refresh interval otherwise.
+    """
+    interval = int(REFRESH_INTERVALS[endpoint])
+    if last_modified is None:
+        return interval
+    remaining = int(last_modified.timestamp() + interval - time.time())
+    return max(MIN_MAX_AGE, min(interval, remaining))
+
+
+def observation_etag(endpoint: str, last_modified: datetime) -> str:
+    """
+    Weak entity tag for an observation, derived from its time like
+    Last-Modified, so it is known without serializing the record
+    """
+    return f'W/"{endpoint}-{int(last_modified.timestamp()):x}"'
+
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison, as RFC 9110 requires for If-None-Match"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = _opaque_tag(etag)
+    return any(_opaque_tag(tag) == opaque for tag in if_none_match.split(","))
+
+
+def _not_modified_since(if_modified_since: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def conditional_response(
+    request: Request,
+    record: Any,
+    endpoint: str,
+    last_modified: Optional[datetime] = None,
+    private: bool = False,
+) -> Response:
+    """
+    Respond with the record's public model, or with 304 Not Modified when the
+    request's If-None-Match / If-Modified-Since validators show the client
+    already has it. ETag, Last-Modified and Cache-Control are set either way.
+    Observations get a weak ETag from last_modified, so a 304 is decided
+    before the record is converted or serialized; records without an
+    observation time fall back to a digest of their memoized JSON.
+    """
+    model = None
+    if last_modified is not None:
+        etag = observation_etag(endpoint, last_modified)
+    else:
+        model = public_model(record)
+        etag = model.etag()
+    headers: Dict[str, str] = {
+        "ETag": etag,
+        "Cache-Control": f"{'private' if private else 'public'}, max-age={max_age(endpoint, last_modified)}",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        not_modified = (
+            if_modified_since is not None
+            and last_modified is not None
+            and _not_modified_since(if_modified_since, last_modified)
+        )
+
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+
+    response = model_response(model if model is not None else public_model(record))
+    response.headers.update(headers)
+    return response
@@ -1,7 +1,129 @@
 import os
 from functools import lru_cache
+from typing import Optional
 
-from backend.src.services.weather_service import WeatherService, OpenWeatherMapProvider
+from backend.src.services.weather_service import WeatherService, WeatherProvider, OpenWeatherMapProvider
+from backend.src.services.composite import Backend, CompositeWeatherProvider
+from backend.src.services.local_provider import LocalDatasetProvider
+from backend.src.services.aqi import AirQualityAnalyticsProvider
+from backend.src.services.cache import CachingWeatherProvider
+from backend.src.services.geocode_index import GeocodeIndex
+from backend.src.services.history import ObservationRecorder, ObservationStore, RecordingWeatherProvider
+from backend.src.services.singleflight import CoalescingWeatherProvider
+from backend.src.services.instrumentation import InstrumentedWeatherProvider
+from backend.src.services.refresher import BackgroundRefresher
+from backend.src.services.rate_limit import RateLimiter, DEFAULT_CALLS_PER_MINUTE
+from backend.src.services.resilience import UpstreamResilience
+from backend.src.services.shared_cache import SharedCache
+from backend.src.services.subscriptions import SubscriptionHub
+from backend.src.serving import worker_count
+
+# Default on-disk location of the geocode index
+DEFAULT_GEOCODE_INDEX_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "geocode.sqlite3"
+)
+
+# Default on-disk location of the observation history store
+DEFAULT_HISTORY_DB_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "history.sqlite3"
+)
+
+
+@lru_cache()
+def get_geocode_index() -> GeocodeIndex:
+    """
+    Dependency that provides the persistent geocode index.
+    Optionally pre-seeded from the file named by GEOCODE_SEED_FILE.
+    """
+    index = GeocodeIndex(os.getenv("GEOCODE_INDEX_PATH", DEFAULT_GEOCODE_INDEX_PATH))
+    seed_file = os.getenv("GEOCODE_SEED_FILE")
+    if seed_file:
+        index.seed_from_file(seed_file)
+    return index
+
+
+@lru_cache()
+def get_observation_recorder() -> ObservationRecorder:
+    """
+    Provides the recorder that batches fetched observations into the
+    history store at HISTORY_DB_PATH.
+    """
+    return ObservationRecorder(ObservationStore(os.getenv("HISTORY_DB_PATH", DEFAULT_HISTORY_DB_PATH)))
+
+
+@lru_cache()
+def get_rate_limiter() -> RateLimiter:
+    """
+    Dependency that provides the upstream quota scheduler shared by all
+    OpenWeatherMap calls.
+    The configured quota is for the whole host, so each worker process gets
+    an equal share of it.
+    """
+    workers = worker_count()
+    calls_per_minute = int(os.getenv("UPSTREAM_CALLS_PER_MINUTE", DEFAULT_CALLS_PER_MINUTE))
+    calls_per_day = int(os.getenv("UPSTREAM_CALLS_PER_DAY", 0))
+    return RateLimiter(
+        calls_per_minute=max(1, calls_per_minute // workers),
+        calls_per_day=max(1, calls_per_day // workers) if calls_per_day else None,
+    )
+
+
+@lru_cache()
+def get_upstream_resilience() -> UpstreamResilience:
+    """
+    Provides the adaptive timeouts, circuit breakers and hedging shared by
+    all OpenWeatherMap calls.
+    """
+    return UpstreamResilience()
+
+
+@lru_cache()
+def get_shared_cache() -> Optional[SharedCache]:
+    """
+    Provides the cross-worker response cache, or None when disabled.
+    Enabled by default when serving with more than one worker; set
+    WEATHER_SHARED_CACHE to "true" or "false" to override.
+    """
+    enabled = os.getenv("WEATHER_SHARED_CACHE")
+    if enabled is None:
+        return SharedCache() if worker_count() > 1 else None
+    return SharedCache() if enabled.lower() == "true" else None
+
+
+def create_provider(name: str) -> WeatherProvider:
+    """Build the named weather backend, instrumented for /metrics"""
+    if name == "openweathermap":
+        provider = OpenWeatherMapProvider(
+            api_key=os.getenv("OPENWEATHERMAP_API_KEY"),
+            rate_limiter=get_rate_limiter(),
+            resilience=get_upstream_resilience()
+        )
+    elif name == "local":
+        provider = LocalDatasetProvider()
+    else:
+        raise ValueError(f"Unknown weather provider: {name}")
+    return InstrumentedWeatherProvider(provider, name=name)
+
+
+@lru_cache()
+def get_upstream_provider() -> WeatherProvider:
+    """
+    Provides the weather backends named in WEATHER_PROVIDERS (default
+    "openweathermap"). With more than one, calls are routed between them by
+    a CompositeWeatherProvider; backends listed in WEATHER_FALLBACK_PROVIDERS
+    (none by default) are added after them and only used when they fail.
+    """
+    names = [name.strip() for name in os.getenv("WEATHER_PROVIDERS", "openweathermap").split(",") if name.strip()]
+    fallbacks = [
+        name.strip() for name in os.getenv("WEATHER_FALLBACK_PROVIDERS", "").split(",")
+        if name.strip() and name.strip() not in names
+    ]
+    if len(names) == 1 and not fallbacks:
+        return create_provider(names[0])
+    return CompositeWeatherProvider(
+        [Backend(name, create_provider(name)) for name in names]
+        + [Backend(name, create_provider(name), fallback_only=True) for name in fallbacks]
+    )
 
 
 @lru_cache()
@@ -9,7 +131,43 @@ def get_weather_service() -> WeatherService:
     """
     Dependency that provides a WeatherService instance.
     Uses LRU cache to avoid creating multiple instances.
+    Upstream responses are cached in memory in front of the provider, and
+    cache misses for the same key share a single in-flight upstream call.
+    Calls that reach the upstream provider are timed for /metrics and run
+    under adaptive timeouts and per-endpoint circuit breakers; when a
+    breaker is open, expired cache entries are served instead. With
+    several workers, the in-memory cache is backed by a cache shared between
+    them. Every current-weather and air quality result fetched upstream is
+    recorded in the history store unless WEATHER_HISTORY is "false".
+    Air quality results get US EPA and EU CAQI indices before they are
+    cached, with rolling averages over the recorded history.
+    """
+    upstream = get_upstream_provider()
+    store = None
+    if os.getenv("WEATHER_HISTORY", "true").lower() == "true":
+        recorder = get_observation_recorder()
+        upstream = RecordingWeatherProvider(upstream, recorder)
+        store = recorder.store
+    upstream = AirQualityAnalyticsProvider(upstream, store)
+    provider = CachingWeatherProvider(
+        CoalescingWeatherProvider(upstream),
+        shared=get_shared_cache()
+    )
+    return WeatherService(provider=provider, geocode_index=get_geocode_index())
+
+
+@lru_cache()
+def get_background_refresher() -> BackgroundRefresher:
+    """
+    Provides the refresher that keeps hot locations in the response cache warm.
+    """
+    return BackgroundRefresher(provider=get_weather_service().provider)
+
+
+@lru_cache()
+def get_subscription_hub() -> SubscriptionHub:
+    """
+    Provides the hub that polls subscribed locations once per refresh
+    interval and pushes changes to every subscriber.
     """
-    api_key = os.getenv("OPENWEATHERMAP_API_KEY")
-    provider = OpenWeatherMapProvider(api_key=api_key)
-    return WeatherService(provider=provider) 
\ No newline at end of file
+    return SubscriptionHub(get_weather_service())
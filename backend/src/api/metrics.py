@@ -0,0 +1,243 @@
+import asyncio
+import contextvars
+import functools
+import time
+from typing import Any, Callable, Iterable, Optional
+
+from fastapi import APIRouter, Request, Response
+from fastapi.responses import PlainTextResponse
+from fastapi.routing import APIRoute
+
+from backend.src.api.dependencies import (
+    get_background_refresher,
+    get_rate_limiter,
+    get_subscription_hub,
+    get_upstream_resilience,
+    get_weather_service
+)
+from backend.src.auth.utils import hashing_pool, token_cache
+from backend.src.services.metrics import (
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS_IN_PROGRESS,
+    REGISTRY,
+    STAGE_DURATION,
+    MetricFamily
+)
+from backend.src.services.resilience import BreakerState
+
+ENDPOINT_TIMER = STAGE_DURATION.labels(stage="endpoint")
+SERIALIZATION_TIMER = STAGE_DURATION.labels(stage="serialization")
+
+# Set by TimedRoute when the endpoint function returns, so the route handler
+# can attribute the remaining time to response validation and serialization
+_endpoint_finished: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar(
+    "endpoint_finished", default=None
+)
+
+
+def _timed_endpoint(call: Callable[..., Any]) -> Callable[..., Any]:
+    def finish(start: float) -> None:
+        end = time.perf_counter()
+        ENDPOINT_TIMER.observe(end - start)
+        holder = _endpoint_finished.get()
+        if holder is not None:
+            holder.append(end)
+
+    if asyncio.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def async_endpoint(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            result = await call(*args, **kwargs)
+            finish(start)
+            return result
+        return async_endpoint
+
+    @functools.wraps(call)
+    def sync_endpoint(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        result = call(*args, **kwargs)
+        finish(start)
+        return result
+    return sync_endpoint
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that times the endpoint function and the response serialization
+    that follows it, and labels the request with its path template so the
+    metrics middleware can aggregate per route rather than per URL.
+    """
+
+    def get_route_handler(self) -> Callable:
+        self.dependant.call = _timed_endpoint(self.dependant.call)
+        handler = super().get_route_handler()
+        route_path = self.path_format
+
+        async def timed_handler(request: Request) -> Response:
+            request.scope["route_path"] = route_path
+            holder: list = []
+            token = _endpoint_finished.set(holder)
+            try:
+                response = await handler(request)
+            finally:
+                _endpoint_finished.reset(token)
+            if holder:
+                SERIALIZATION_TIMER.observe(time.perf_counter() - holder[0])
+            return response
+
+        return timed_handler
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency by method, route template and status"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            HTTP_REQUEST_DURATION.labels(
+                method=scope["method"],
+                route=scope.get("route_path", "unmatched"),
+                status=str(status_code),
+            ).observe(time.perf_counter() - start)
+
+
+def collect_service_metrics() -> Iterable[MetricFamily]:
+    """
+    Report cache, single-flight, auth token, quota and refresher counters at scrape time.
+    Dependencies that have not been created yet are skipped rather than built.
+    """
+    if get_weather_service.cache_info().currsize:
+        provider = get_weather_service().provider
+        layers = []
+        while provider is not None:
+            layers.append(provider)
+            provider = getattr(provider, "provider", None)
+
+        for layer in layers:
+            if hasattr(layer, "cache"):
+                stats = layer.stats()
+                yield ("weather_cache_hit_ratio", "gauge", "Share of cache lookups answered from cache",
+                       [({}, stats["hit_ratio"])])
+                yield ("weather_cache_entries", "gauge", "Entries currently held in the response cache",
+                       [({}, stats["size"])])
+                yield ("weather_cache_lookups", "counter", "Response cache lookups by result", [
+                    ({"result": "hit"}, stats["hits"]),
+                    ({"result": "stale"}, stats["stale_hits"]),
+                    ({"result": "nearest"}, stats["nearest_hits"]),
+                    ({"result": "shared"}, stats["shared_hits"]),
+                    ({"result": "stale_if_error"}, stats["stale_if_error_hits"]),
+                    ({"result": "miss"}, stats["misses"]),
+                ])
+                yield ("weather_cache_evictions", "counter", "Entries evicted from the response cache",
+                       [({"reason": "lru"}, stats["evictions"]), ({"reason": "expired"}, stats["expirations"])])
+            elif hasattr(layer, "flight"):
+                stats = layer.stats()
+                yield ("upstream_calls_deduplicated", "counter",
+                       "Upstream calls answered by joining an identical in-flight call",
+                       [({}, stats["deduplicated"])])
+            elif hasattr(layer, "backends"):
+                stats = layer.stats()
+                rows = [(name, method, row) for name, methods in stats["backends"].items()
+                        for method, row in methods.items()]
+                yield ("weather_backend_latency_seconds", "gauge",
+                       "Moving-average latency used to route calls, by backend and method",
+                       [({"backend": name, "method": method}, row["latency_ms"] / 1000)
+                        for name, method, row in rows if row["latency_ms"] is not None])
+                yield ("weather_backend_error_rate", "gauge",
+                       "Decaying error rate used to route calls, by backend and method",
+                       [({"backend": name, "method": method}, row["error_rate"]) for name, method, row in rows])
+                yield ("weather_backend_fallbacks", "counter",
+                       "Calls answered by a backend after a better-ranked one failed",
+                       [({}, stats["fallbacks"])])
+            elif hasattr(layer, "recorder"):
+                stats = layer.recorder.stats()
+                yield ("weather_history_pending", "gauge", "Observations waiting to be written to the history store",
+                       [({}, stats["pending"])])
+                yield ("weather_history_observations", "counter", "Observations handed to the history store, by result",
+                       [({"result": "written"}, stats["written"]), ({"result": "dropped"}, stats["dropped"])])
+
+    if get_rate_limiter.cache_info().currsize:
+        usage = get_rate_limiter().usage()
+        yield ("upstream_quota_remaining", "gauge", "Upstream calls left in the current quota window", [
+            ({"window": "minute"}, usage["minute_budget_remaining"]),
+        ] + ([({"window": "day"}, usage["day_budget_remaining"])] if usage["calls_per_day"] else []))
+        yield ("upstream_quota_waiting", "gauge", "Upstream calls queued for a quota slot, by priority",
+               [({"priority": priority}, count) for priority, count in usage["waiting"].items()])
+        yield ("upstream_quota_rejected", "counter", "Upstream calls that missed their quota deadline",
+               [({}, usage["rejected"])])
+
+    if get_upstream_resilience.cache_info().currsize:
+        stats = get_upstream_resilience().stats()
+        endpoints = stats["endpoints"].items()
+        yield ("upstream_circuit_state", "gauge", "Circuit breaker state per upstream endpoint (1 for the current state)",
+               [({"endpoint": endpoint, "state": state.value}, 1 if row["state"] == state.value else 0)
+                for endpoint, row in endpoints for state in BreakerState])
+        yield ("upstream_circuit_trips", "counter", "Times each upstream endpoint's circuit breaker opened",
+               [({"endpoint": endpoint}, row["trips"]) for endpoint, row in endpoints])
+        yield ("upstream_circuit_rejected", "counter", "Upstream calls failed fast by an open circuit",
+               [({"endpoint": endpoint}, row["rejected"]) for endpoint, row in endpoints])
+        yield ("upstream_timeout_seconds", "gauge", "Current adaptive timeout per upstream endpoint",
+               [({"endpoint": endpoint}, row["timeout"]) for endpoint, row in endpoints])
+        yield ("upstream_hedged_requests", "counter", "Speculative second requests sent to the upstream, by outcome", [
+            ({"outcome": "won"}, stats["hedge_wins"]),
+            ({"outcome": "lost"}, stats["hedges"] - stats["hedge_wins"]),
+        ])
+        yield ("upstream_retries", "counter", "Upstream calls retried after a transient failure",
+               [({}, stats["retries"])])
+
+    stats = token_cache.stats()
+    yield ("auth_token_cache_lookups", "counter", "Verified-token cache lookups by result", [
+        ({"result": "hit"}, stats["hits"]),
+        ({"result": "miss"}, stats["misses"]),
+    ])
+    stats = hashing_pool.stats()
+    yield ("auth_hashing_pool_pending", "gauge", "Password operations running or queued on the hashing pool",
+           [({}, stats["pending"])])
+    yield ("auth_hashing_pool_rejected", "counter", "Password operations rejected because the pool queue was full",
+           [({}, stats["rejected"])])
+
+    if get_background_refresher.cache_info().currsize:
+        stats = get_background_refresher().stats()
+        yield ("background_refreshes", "counter", "Hot-set refreshes by outcome", [
+            ({"outcome": "refreshed"}, stats["refreshed"]),
+            ({"outcome": "failed"}, stats["failures"]),
+            ({"outcome": "over_budget"}, stats["over_budget"]),
+        ])
+
+    if get_subscription_hub.cache_info().currsize:
+        stats = get_subscription_hub().stats()
+        yield ("weather_subscribers", "gauge", "Open live-weather subscriptions", [({}, stats["subscribers"])])
+        yield ("weather_subscription_topics", "gauge", "Locations polled for live-weather subscribers",
+               [({}, stats["topics"])])
+        yield ("weather_subscription_messages", "counter", "Snapshots, deltas and errors pushed to subscribers",
+               [({}, stats["messages"])])
+
+
+REGISTRY.register_collector(collect_service_metrics)
+
+router = APIRouter(tags=["metrics"], route_class=TimedRoute)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Expose all metrics in the Prometheus text format"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,81 @@
+import os
+from collections import OrderedDict
+from typing import Any, List, Tuple
+
+from fastapi.responses import ORJSONResponse, Response
+
+from backend.src.models.records import to_model
+from backend.src.models.weather import BatchItem, SerializableModel
+
+DEFAULT_MODEL_MEMO_SIZE = 4096
+
+
+class ModelMemo:
+    """
+    Bounded LRU of public models built from cached internal records.
+    Records are immutable and shared by the response cache, so the model
+    (and the JSON bytes and ETag it memoizes) can be reused for as long as the
+    same record object keeps being served. Entries hold a reference to their
+    record, so an id() is never reused while its entry exists.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MODEL_MEMO_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[Any, SerializableModel]]" = OrderedDict()
+
+    def get(self, record: Any) -> SerializableModel:
+        """Return the public model for a record, building it on first use"""
+        key = id(record)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] is record:
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        model = to_model(record)
+        self._entries[key] = (record, model)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return model
+
+
+_memo = ModelMemo(int(os.getenv("RESPONSE_MODEL_MEMO_SIZE", DEFAULT_MODEL_MEMO_SIZE)))
+
+
+def public_model(record: Any) -> SerializableModel:
+    """Convert an internal record to its public model at the API boundary"""
+    return _memo.get(record)
+
+
+def public_batch(items: List[BatchItem]) -> List[BatchItem]:
+    """Convert the records in batch results to public models"""
+    for item in items:
+        if item.result is not None:
+            item.result = public_model(item.result)
+    return items
+
+
+class PreserializedJSONResponse(Response):
+    """JSON response whose body is already-encoded bytes, sent as is"""
+
+    media_type = "application/json"
+
+
+def model_response(model: SerializableModel) -> PreserializedJSONResponse:
+    """
+    Respond with a model's memoized JSON encoding.
+    Returning a Response lets FastAPI skip re-validating and re-serializing
+    the result against the route's response_model, which still documents
+    the schema.
+    """
+    return PreserializedJSONResponse(model.json_bytes())
+
+
+__all__ = [
+    "ORJSONResponse",
+    "PreserializedJSONResponse",
+    "ModelMemo",
+    "model_response",
+    "public_model",
+    "public_batch",
+]
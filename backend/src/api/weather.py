@@ -1,9 +1,71 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import Optional
+import asyncio
+import math
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from typing import Any, AsyncIterator, Dict, IO, List, Literal, Optional, Tuple, Union
 
-from backend.src.models.weather import CurrentWeather, WeatherForecast, GeoLocation, AirQuality
-from backend.src.services.weather_service import WeatherService
-from backend.src.api.dependencies import get_weather_service
+from backend.src.models.weather import (
+    CurrentWeather,
+    WeatherForecast,
+    GeoLocation,
+    AirQuality,
+    BatchLocation,
+    BatchRequest,
+    BatchResponse,
+    WeatherHistory,
+    AirQualityHistory,
+    WeatherGrid
+)
+from backend.src.models.records import POLLUTANTS
+from backend.src.services.weather_service import WeatherService, WeatherProvider
+from backend.src.services.rate_limit import RateLimiter, RateLimitExceeded
+from backend.src.services.resilience import CircuitOpenError, UpstreamResilience
+from backend.src.services.composite import CompositeWeatherProvider
+from backend.src.services.history import DEFAULT_MAX_POINTS, ObservationRecorder, downsample_step
+from backend.src.services.subscriptions import (
+    DEFAULT_KEEPALIVE,
+    DEFAULT_MAX_LOCATIONS,
+    SubscriptionHub,
+    TooManyTopics,
+    format_event,
+    parse_location
+)
+from backend.src.services.grid import (
+    DEFAULT_GRID_SIZE,
+    GRID_FIELDS,
+    MAX_GRID_SIZE,
+    NODATA,
+    Bounds,
+    GridUnavailable,
+    quantize,
+    sample_grid
+)
+from backend.src.services.export import (
+    EXPORT_MEDIA_TYPES,
+    ListTooLarge,
+    LocationListError,
+    count_locations,
+    csv_header,
+    encode_csv_rows,
+    encode_ndjson,
+    find_city_list,
+    forecast_rows,
+    iter_locations,
+    list_format,
+    spool_upload
+)
+from backend.src.api.dependencies import (
+    get_weather_service,
+    get_rate_limiter,
+    get_observation_recorder,
+    get_subscription_hub,
+    get_upstream_provider,
+    get_upstream_resilience
+)
+from backend.src.api.metrics import TimedRoute
+from backend.src.api.responses import ORJSONResponse, public_batch
+from backend.src.api.conditional import conditional_response, observed_at
 from backend.src.models.user import User
 from backend.src.auth.dependencies import get_current_active_user
 
@@ -11,10 +73,23 @@ router = APIRouter(
     prefix="/weather",
     tags=["weather"],
     responses={404: {"description": "Not found"}},
+    route_class=TimedRoute,
+    default_response_class=ORJSONResponse,
 )
 
+
+def upstream_unavailable(e: Union[RateLimitExceeded, CircuitOpenError]) -> HTTPException:
+    """Translate an upstream quota timeout or open circuit into a 503 with Retry-After"""
+    return HTTPException(
+        status_code=503,
+        detail=str(e),
+        headers={"Retry-After": str(math.ceil(e.retry_after))},
+    )
+
+
 @router.get("/current", response_model=CurrentWeather)
 async def get_current_weather(
+    request: Request,
     city: Optional[str] = None,
     lat: Optional[float] = Query(None, ge=-90, le=90),
     lon: Optional[float] = Query(None, ge=-180, le=180),
@@ -23,25 +98,30 @@ async def get_current_weather(
     """
     Get current weather for a location.
     Provide either city name or latitude/longitude coordinates.
+    Supports conditional requests via If-None-Match / If-Modified-Since.
     """
     try:
         if city:
-            return await weather_service.get_current_weather_by_city(city)
+            weather = await weather_service.get_current_weather_by_city(city)
         elif lat is not None and lon is not None:
-            return await weather_service.get_current_weather_by_coordinates(lat, lon)
+            weather = await weather_service.get_current_weather_by_coordinates(lat, lon)
         else:
             raise HTTPException(
                 status_code=400, 
                 detail="Must provide either city name or latitude/longitude"
             )
+        return conditional_response(request, weather, "current", last_modified=observed_at(weather.dt))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except (RateLimitExceeded, CircuitOpenError) as e:
+        raise upstream_unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching weather data: {str(e)}")
 
 
 @router.get("/forecast", response_model=WeatherForecast)
 async def get_weather_forecast(
+    request: Request,
     city: str,
     weather_service: WeatherService = Depends(get_weather_service),
     current_user: User = Depends(get_current_active_user)
@@ -52,15 +132,19 @@ async def get_weather_forecast(
     Requires authentication. 
     """
     try:
-        return await weather_service.get_forecast_by_city(city)
+        forecast = await weather_service.get_forecast_by_city(city)
+        return conditional_response(request, forecast, "forecast", private=True)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except (RateLimitExceeded, CircuitOpenError) as e:
+        raise upstream_unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching forecast data: {str(e)}")
 
 
 @router.get("/geocode", response_model=GeoLocation)
 async def geocode_city(
+    request: Request,
     city: str,
     weather_service: WeatherService = Depends(get_weather_service)
 ):
@@ -68,15 +152,19 @@ async def geocode_city(
     Convert city name to geographical coordinates.
     """
     try:
-        return await weather_service.provider.geocode(city)
+        location = await weather_service.geocode(city)
+        return conditional_response(request, location, "geocode")
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except (RateLimitExceeded, CircuitOpenError) as e:
+        raise upstream_unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error geocoding city: {str(e)}")
 
 
 @router.get("/air-quality", response_model=AirQuality)
 async def get_air_quality(
+    request: Request,
     city: Optional[str] = None,
     lat: Optional[float] = Query(None, ge=-90, le=90),
     lon: Optional[float] = Query(None, ge=-180, le=180),
@@ -85,18 +173,392 @@ async def get_air_quality(
     """
     Get air quality data for a location.
     Provide either city name or latitude/longitude coordinates.
+    Supports conditional requests via If-None-Match / If-Modified-Since.
     """
     try:
         if city:
-            return await weather_service.get_air_quality_by_city(city)
+            air_quality = await weather_service.get_air_quality_by_city(city)
         elif lat is not None and lon is not None:
-            return await weather_service.get_air_quality_by_coordinates(lat, lon)
+            air_quality = await weather_service.get_air_quality_by_coordinates(lat, lon)
         else:
             raise HTTPException(
                 status_code=400, 
                 detail="Must provide either city name or latitude/longitude"
             )
+        return conditional_response(request, air_quality, "air_quality", last_modified=observed_at(air_quality.dt))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except (RateLimitExceeded, CircuitOpenError) as e:
+        raise upstream_unavailable(e)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching air quality data: {str(e)}") 
+        raise HTTPException(status_code=500, detail=f"Error fetching air quality data: {str(e)}")
+
+
+@router.get("/history", response_model=WeatherHistory)
+async def get_weather_history(
+    city: Optional[str] = None,
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    interval: Optional[int] = Query(None, ge=60),
+    weather_service: WeatherService = Depends(get_weather_service),
+    recorder: ObservationRecorder = Depends(get_observation_recorder)
+):
+    """
+    Get recorded current-weather observations for a location over a time range.
+    Provide either city name or latitude/longitude coordinates. The range
+    defaults to the last 24 hours. Observations are aggregated over interval
+    seconds, coarsened as needed to return at most 500 points.
+    """
+    location, start, end, step = await _history_query(city, lat, lon, start, end, interval, weather_service)
+    await recorder.flush()
+    points = await asyncio.to_thread(
+        recorder.store.query_current, location.lat, location.lon, int(start.timestamp()), int(end.timestamp()), step
+    )
+    return await _history_response(recorder, location, start, end, step, points)
+
+
+@router.get("/air-quality/history", response_model=AirQualityHistory)
+async def get_air_quality_history(
+    city: Optional[str] = None,
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    interval: Optional[int] = Query(None, ge=60),
+    weather_service: WeatherService = Depends(get_weather_service),
+    recorder: ObservationRecorder = Depends(get_observation_recorder)
+):
+    """
+    Get recorded air quality observations for a location over a time range.
+    Takes the same parameters as /weather/history.
+    """
+    location, start, end, step = await _history_query(city, lat, lon, start, end, interval, weather_service)
+    await recorder.flush()
+    rows = await asyncio.to_thread(
+        recorder.store.query_air_quality, location.lat, location.lon, int(start.timestamp()), int(end.timestamp()), step
+    )
+    points = [
+        {
+            "timestamp": row["timestamp"],
+            "samples": row["samples"],
+            "aqi": row["aqi"],
+            "aqi_max": row["aqi_max"],
+            "pollutants": {name: row[name] for name in POLLUTANTS},
+        }
+        for row in rows
+    ]
+    return await _history_response(recorder, location, start, end, step, points)
+
+
+async def _history_query(
+    city: Optional[str],
+    lat: Optional[float],
+    lon: Optional[float],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    interval: Optional[int],
+    weather_service: WeatherService
+) -> Tuple[GeoLocation, datetime, datetime, int]:
+    """Resolve a history query's location, time range (naive times are UTC) and interval"""
+    end = _as_utc(end) if end is not None else datetime.now(timezone.utc)
+    start = _as_utc(start) if start is not None else end - timedelta(hours=24)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    # Coarsen the interval rather than return an unbounded number of points
+    step = max(interval or 0, downsample_step((end - start).total_seconds(), DEFAULT_MAX_POINTS))
+
+    if lat is not None and lon is not None and not city:
+        return GeoLocation(lat=lat, lon=lon), start, end, step
+    if not city:
+        raise HTTPException(status_code=400, detail="Must provide either city name or latitude/longitude")
+    try:
+        return await weather_service.geocode(city), start, end, step
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (RateLimitExceeded, CircuitOpenError) as e:
+        raise upstream_unavailable(e)
+
+
+async def _history_response(
+    recorder: ObservationRecorder,
+    location: GeoLocation,
+    start: datetime,
+    end: datetime,
+    step: int,
+    points: list
+) -> Dict[str, Any]:
+    city, country = location.city, location.country
+    if city is None:
+        city, country = await asyncio.to_thread(recorder.store.latest_place, location.lat, location.lon)
+    return {
+        "lat": location.lat,
+        "lon": location.lon,
+        "city": city,
+        "country": country,
+        "start": start,
+        "end": end,
+        "interval": step,
+        "points": points,
+    }
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+@router.get("/grid", response_model=WeatherGrid)
+async def get_weather_grid(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    rows: int = Query(DEFAULT_GRID_SIZE, ge=2, le=MAX_GRID_SIZE),
+    cols: int = Query(DEFAULT_GRID_SIZE, ge=2, le=MAX_GRID_SIZE),
+    field: Literal[GRID_FIELDS] = "temperature",
+    format: Literal["binary", "json"] = "binary",
+    weather_service: WeatherService = Depends(get_weather_service),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get a weather field over a bounding box as a rows x cols grid, for map
+    overlays. The field is fetched at a bounded lattice of sample points and
+    interpolated onto the grid (inverse-distance weighting). Values are
+    quantized to 16-bit codes, value = offset + code * scale. The binary
+    format is the little-endian codes, row by row from north to south, with
+    the grid's metadata in X-Grid-* headers; the json format returns the
+    same codes and metadata as a WeatherGrid.
+    Requires authentication, since one request fans out to many upstream lookups.
+    """
+    if min_lat >= max_lat or min_lon >= max_lon:
+        raise HTTPException(status_code=400, detail="min_lat and min_lon must be below max_lat and max_lon")
+    bounds = Bounds(min_lat, min_lon, max_lat, max_lon)
+    try:
+        grid = await sample_grid(weather_service, bounds, rows, cols, field)
+    except GridUnavailable as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    codes, offset, scale = quantize(grid.values)
+
+    if format == "json":
+        return {
+            "field": field,
+            **bounds._asdict(),
+            "rows": rows,
+            "cols": cols,
+            "step": grid.step,
+            "samples": grid.samples,
+            "sampled": grid.sampled,
+            "offset": offset,
+            "scale": scale,
+            "nodata": NODATA,
+            "values": codes.ravel().tolist(),
+        }
+    return Response(
+        content=codes.tobytes(),
+        media_type="application/octet-stream",
+        headers={
+            "X-Grid-Field": field,
+            "X-Grid-Bounds": ",".join(str(value) for value in bounds),
+            "X-Grid-Shape": f"{rows},{cols}",
+            "X-Grid-Step": str(grid.step),
+            "X-Grid-Samples": f"{grid.sampled}/{grid.samples}",
+            "X-Grid-Offset": repr(offset),
+            "X-Grid-Scale": repr(scale),
+            "X-Grid-Nodata": str(NODATA),
+        },
+    )
+
+
+@router.get("/subscribe")
+async def subscribe_to_current_weather(
+    location: Optional[List[str]] = Query(None, description='City name or "lat,lon"; repeat for several locations'),
+    hub: SubscriptionHub = Depends(get_subscription_hub)
+):
+    """
+    Stream current weather for a set of locations as Server-Sent Events.
+    Sends a "snapshot" event with the full observation per location, then a
+    "delta" event (JSON merge patch) only when an observation changes, and
+    an "error" event when a location cannot be fetched. Each location is
+    fetched once per refresh interval however many clients subscribe to it.
+    Returns 503 when the server is already polling as many locations as it allows.
+    """
+    if not location:
+        raise HTTPException(status_code=400, detail="Must provide at least one location")
+    if len(location) > DEFAULT_MAX_LOCATIONS:
+        raise HTTPException(status_code=400, detail=f"At most {DEFAULT_MAX_LOCATIONS} locations per subscription")
+    try:
+        locations = [parse_location(value) for value in location]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        hub.check_capacity(locations)
+    except TooManyTopics as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return StreamingResponse(
+        _subscription_events(hub, locations),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _subscription_events(hub: SubscriptionHub, locations: List[BatchLocation]) -> AsyncIterator[bytes]:
+    messages = hub.subscribe(locations, keepalive=DEFAULT_KEEPALIVE)
+    try:
+        async for event, data in messages:
+            yield format_event(event, data)
+    except TooManyTopics as e:
+        # Other subscriptions took the remaining capacity after the route checked it
+        yield format_event("error", {"location": None, "status_code": 503, "detail": str(e)})
+    finally:
+        await messages.aclose()
+
+
+@router.post("/current/batch", response_model=BatchResponse[CurrentWeather])
+async def get_current_weather_batch(
+    request: BatchRequest,
+    weather_service: WeatherService = Depends(get_weather_service)
+):
+    """
+    Get current weather for many locations in one request.
+    Each location is a city name or latitude/longitude pair; results and
+    per-location errors are returned in request order.
+    """
+    results = await weather_service.get_current_weather_batch(request.locations)
+    return {"results": public_batch(results)}
+
+
+@router.post("/forecast/batch", response_model=BatchResponse[WeatherForecast])
+async def get_weather_forecast_batch(
+    request: BatchRequest,
+    weather_service: WeatherService = Depends(get_weather_service),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get 5-day weather forecasts for many locations in one request.
+    Requires authentication.
+    """
+    results = await weather_service.get_forecast_batch(request.locations)
+    return {"results": public_batch(results)}
+
+
+@router.post("/air-quality/batch", response_model=BatchResponse[AirQuality])
+async def get_air_quality_batch(
+    request: BatchRequest,
+    weather_service: WeatherService = Depends(get_weather_service)
+):
+    """
+    Get air quality data for many locations in one request.
+    """
+    results = await weather_service.get_air_quality_batch(request.locations)
+    return {"results": public_batch(results)}
+
+
+@router.post("/forecast/export")
+async def export_forecasts(
+    request: Request,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    city_list: Optional[str] = Query(None, alias="list"),
+    weather_service: WeatherService = Depends(get_weather_service),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Stream forecasts for a list of locations as NDJSON or CSV, one row per
+    forecast item, in the order lookups complete.
+    The list is either uploaded as the request body (text/plain with one city
+    per line, text/csv with city or lat/lon columns, or application/x-ndjson
+    with one location object per line) or referenced by name with ?list=.
+    The list is validated before streaming starts; lists over
+    EXPORT_MAX_UPLOAD_BYTES or EXPORT_MAX_LOCATIONS are rejected with a 413.
+    Failed lookups become error rows. Requires authentication.
+    """
+    if city_list is not None:
+        found = find_city_list(city_list)
+        if found is None:
+            raise HTTPException(status_code=404, detail=f"City list not found: {city_list}")
+        path, media_type = found
+        text = await asyncio.to_thread(open, path, encoding="utf-8-sig", newline="")
+    else:
+        try:
+            media_type = list_format(request.headers.get("content-type", "text/plain"))
+        except ValueError as e:
+            raise HTTPException(status_code=415, detail=str(e))
+        # Spool the upload to disk so the list is never held in memory as a whole
+        try:
+            text = await spool_upload(request.stream())
+        except ListTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+
+    try:
+        # Parsing the whole list is blocking work, so keep it off the event loop
+        count = await asyncio.to_thread(count_locations, text, media_type)
+    except ListTooLarge as e:
+        text.close()
+        raise HTTPException(status_code=413, detail=str(e))
+    except (LocationListError, UnicodeDecodeError) as e:
+        text.close()
+        raise HTTPException(status_code=400, detail=f"Invalid location list: {e}")
+    if not count:
+        text.close()
+        raise HTTPException(status_code=400, detail="Location list is empty")
+
+    return StreamingResponse(
+        _export_body(text, media_type, format, weather_service),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"X-Export-Locations": str(count)},
+    )
+
+
+async def _export_body(text: IO[str], media_type: str, format: str, weather_service: WeatherService) -> AsyncIterator[bytes]:
+    encode = encode_csv_rows if format == "csv" else encode_ndjson
+    try:
+        if format == "csv":
+            yield csv_header()
+        items = weather_service.stream_forecasts(iter_locations(text, media_type))
+        try:
+            async for item in items:
+                yield encode(forecast_rows(item))
+        finally:
+            # Cancel outstanding lookups as soon as the client goes away
+            await items.aclose()
+    finally:
+        text.close()
+
+
+@router.get("/quota")
+async def get_upstream_quota(
+    rate_limiter: RateLimiter = Depends(get_rate_limiter),
+    current_user: User = Depends(get_current_active_user)
+) -> Dict[str, Any]:
+    """
+    Report upstream API quota usage and the state of the call queue.
+    Requires authentication.
+    """
+    return rate_limiter.usage()
+
+
+@router.get("/upstream")
+async def get_upstream_health(
+    resilience: UpstreamResilience = Depends(get_upstream_resilience),
+    current_user: User = Depends(get_current_active_user)
+) -> Dict[str, Any]:
+    """
+    Report circuit breaker state, adaptive timeouts and hedging counters per upstream endpoint.
+    Requires authentication.
+    """
+    return resilience.stats()
+
+
+@router.get("/providers")
+async def get_provider_routing(
+    provider: WeatherProvider = Depends(get_upstream_provider),
+    current_user: User = Depends(get_current_active_user)
+) -> Dict[str, Any]:
+    """
+    Report the weather backends in use and, with several, how calls are being routed between them.
+    Requires authentication.
+    """
+    if not isinstance(provider, CompositeWeatherProvider):
+        return {"providers": [getattr(provider, "name", type(provider).__name__)], "routing": None}
+    return {"providers": [backend.name for backend in provider.backends], "routing": provider.stats()}
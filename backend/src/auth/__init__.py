@@ -1,17 +1,42 @@
 from backend.src.auth.utils import (
     verify_password,
     get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
     authenticate_user,
+    authenticate_user_async,
     create_access_token,
     verify_token,
+    decode_token,
     get_user,
+    get_user_repository,
+    get_user_for_token,
+    invalidate_user_tokens,
+    set_user_disabled,
 )
+from backend.src.auth.token_cache import VerifiedTokenCache
+from backend.src.auth.hashing_pool import HashingPool, HashingPoolBusy
+from backend.src.auth.user_store import UserRepository, InMemoryUserRepository, SQLiteUserRepository
 
 __all__ = [
     "verify_password",
     "get_password_hash",
+    "verify_password_async",
+    "get_password_hash_async",
     "authenticate_user",
+    "authenticate_user_async",
     "create_access_token",
     "verify_token",
+    "decode_token",
     "get_user",
+    "get_user_repository",
+    "get_user_for_token",
+    "invalidate_user_tokens",
+    "set_user_disabled",
+    "VerifiedTokenCache",
+    "HashingPool",
+    "HashingPoolBusy",
+    "UserRepository",
+    "InMemoryUserRepository",
+    "SQLiteUserRepository",
 ] 
\ No newline at end of file
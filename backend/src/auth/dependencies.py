@@ -3,7 +3,8 @@ from fastapi.security import OAuth2PasswordBearer
 from typing import Optional
 
 from backend.src.models.user import User, TokenData
-from backend.src.auth.utils import verify_token, get_user
+from backend.src.auth.utils import get_user_for_token
+from backend.src.services.metrics import AUTH_VERIFY_DURATION
 
 # OAuth2 scheme for token extraction
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -11,8 +12,8 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     """Get the current user from JWT token"""
-    token_data = verify_token(token)
-    user = get_user(username=token_data.username)
+    with AUTH_VERIFY_DURATION.time():
+        user = get_user_for_token(token)
     
     if user is None:
         raise HTTPException(
@@ -38,8 +39,6 @@ def get_optional_current_user(token: Optional[str] = Depends(oauth2_scheme)) ->
         return None
     
     try:
-        token_data = verify_token(token)
-        user = get_user(username=token_data.username)
-        return user
+        return get_user_for_token(token)
     except HTTPException:
         return None 
\ No newline at end of file
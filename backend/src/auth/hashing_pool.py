@@ -0,0 +1,72 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_HASH_QUEUE_SIZE = 64
+
+
+def default_hash_workers() -> int:
+    return min(4, os.cpu_count() or 1)
+
+
+class HashingPoolBusy(Exception):
+    """Raised when more password operations are queued than the pool accepts"""
+
+
+class HashingPool:
+    """
+    Bounded thread pool for bcrypt work.
+
+    bcrypt releases the GIL while hashing, so running it on threads keeps
+    the event loop free without the pickling cost of a process pool. At most
+    max_workers operations run at once; up to queue_size more wait for a
+    worker, and anything beyond that fails fast with HashingPoolBusy instead
+    of piling up behind a login burst.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, queue_size: Optional[int] = None):
+        self.max_workers = max_workers or int(os.getenv("AUTH_HASH_WORKERS", default_hash_workers()))
+        self.queue_size = queue_size if queue_size is not None else int(
+            os.getenv("AUTH_HASH_QUEUE_SIZE", DEFAULT_HASH_QUEUE_SIZE)
+        )
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run fn(*args) on a pool thread, rejecting the call if the queue is full"""
+        if self.pending >= self.max_workers + self.queue_size:
+            self.rejected += 1
+            raise HashingPoolBusy("Too many concurrent password operations")
+
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self) -> Dict[str, int]:
+        """Return queue depth and completion counters"""
+        return {
+            "max_workers": self.max_workers,
+            "queue_size": self.queue_size,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
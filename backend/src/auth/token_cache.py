@@ -0,0 +1,104 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from backend.src.models.user import UserInDB
+
+DEFAULT_TOKEN_CACHE_SIZE = 10_000
+
+# Longest a verified token is trusted before the user is looked up again, so
+# a user disabled by another worker or directly in the store is noticed
+DEFAULT_TOKEN_CACHE_TTL = 5.0
+
+
+def token_digest(token: str) -> bytes:
+    """Key tokens by digest so the cache never holds usable bearer credentials"""
+    return hashlib.sha256(token.encode()).digest()
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU cache of bearer tokens whose signature has already been
+    verified, mapped to the user they resolved to.
+
+    Entries expire after ttl seconds or at the token's own exp claim,
+    whichever comes first, so a cached token is never accepted after the
+    JWT itself would have been rejected. All tokens of a user can be dropped
+    at once with invalidate_user(), e.g. when the user is disabled; that
+    only reaches this process, and the ttl bounds how long other workers
+    keep trusting the cached user.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        self.max_entries = max_entries or int(os.getenv("AUTH_TOKEN_CACHE_SIZE", DEFAULT_TOKEN_CACHE_SIZE))
+        self.ttl = ttl if ttl is not None else float(os.getenv("AUTH_TOKEN_CACHE_TTL", DEFAULT_TOKEN_CACHE_TTL))
+        self._entries: "OrderedDict[bytes, Tuple[float, UserInDB]]" = OrderedDict()
+        self._by_user: Dict[str, Set[bytes]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, token: str) -> Optional[UserInDB]:
+        """Return the cached user for a token, or None if unknown or expired"""
+        digest = token_digest(token)
+        entry = self._entries.get(digest)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, user = entry
+        if expires_at <= time.time():
+            self._remove(digest)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(digest)
+        self.hits += 1
+        return user
+
+    def set(self, token: str, expires_at: float, user: UserInDB) -> None:
+        """Cache a verified token until expires_at (seconds since the epoch), at most ttl seconds"""
+        digest = token_digest(token)
+        if digest in self._entries:
+            self._remove(digest)
+        self._entries[digest] = (min(expires_at, time.time() + self.ttl), user)
+        self._by_user.setdefault(user.username, set()).add(digest)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, username: str) -> int:
+        """Drop every cached token of a user; returns the number removed"""
+        digests = self._by_user.pop(username, set())
+        for digest in digests:
+            self._entries.pop(digest, None)
+        self.invalidations += len(digests)
+        return len(digests)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_user.clear()
+
+    def _remove(self, digest: bytes) -> None:
+        _, user = self._entries.pop(digest)
+        digests = self._by_user.get(user.username)
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                del self._by_user[user.username]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/invalidation counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,182 @@
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional
+
+from backend.src.models.user import UserInDB
+
+
+# Demo accounts with precomputed bcrypt hashes, so loading them costs no hashing
+# (johndoe / secret, alice / secret123)
+DEFAULT_USERS: List[Dict[str, Any]] = [
+    {
+        "id": 1,
+        "username": "johndoe",
+        "full_name": "John Doe",
+        "email": "johndoe@example.com",
+        "hashed_password": "$2b$12$CLLvPqgUrN4YLNU7f8tomOvjy1LfCx1znJc.HDd5CvEf/otwxeSvi",
+        "disabled": False,
+    },
+    {
+        "id": 2,
+        "username": "alice",
+        "full_name": "Alice Wonderland",
+        "email": "alice@example.com",
+        "hashed_password": "$2b$12$HAzkjNvjh3M3NviwvItTpeNu/o3LYGk1RIc5CVgbp.jfzACkz/imC",
+        "disabled": False,
+    },
+]
+
+
+def load_users_file(path: str) -> List[Dict[str, Any]]:
+    """Read seed users (with precomputed hashed_password values) from a JSON list"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class UserRepository(ABC):
+    """Abstract store of user accounts"""
+
+    @abstractmethod
+    def get(self, username: str) -> Optional[UserInDB]:
+        """Return the user with the given username, or None"""
+        pass
+
+    @abstractmethod
+    def add(self, user: UserInDB) -> None:
+        """Insert or replace a user"""
+        pass
+
+    @abstractmethod
+    def set_disabled(self, username: str, disabled: bool) -> bool:
+        """Enable or disable a user; returns False if the user does not exist"""
+        pass
+
+    def seed(self, users: Iterable[Dict[str, Any]]) -> int:
+        """Add users from dicts carrying precomputed password hashes, keeping existing ones"""
+        count = 0
+        for user in users:
+            if self.get(user["username"]) is None:
+                self.add(UserInDB(**user))
+                count += 1
+        return count
+
+    def close(self) -> None:
+        """Release resources held by the store"""
+        pass
+
+
+class InMemoryUserRepository(UserRepository):
+    """User store held in a dict of ready-built UserInDB models"""
+
+    def __init__(self, users: Optional[Iterable[Dict[str, Any]]] = None):
+        self._users: Dict[str, UserInDB] = {}
+        if users is not None:
+            self.seed(users)
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def get(self, username: str) -> Optional[UserInDB]:
+        return self._users.get(username)
+
+    def add(self, user: UserInDB) -> None:
+        self._users[user.username] = user
+
+    def set_disabled(self, username: str, disabled: bool) -> bool:
+        user = self._users.get(username)
+        if user is None:
+            return False
+        self._users[username] = user.model_copy(update={"disabled": disabled})
+        return True
+
+
+class SQLiteUserRepository(UserRepository):
+    """
+    User store backed by SQLite.
+    Usernames are the primary key of a WITHOUT ROWID table, so lookups are a
+    single index probe; one connection is opened per repository and shared
+    across threads under a lock.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        if path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                username TEXT PRIMARY KEY,
+                id INTEGER,
+                full_name TEXT,
+                email TEXT,
+                hashed_password TEXT NOT NULL,
+                disabled INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+            """
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def get(self, username: str) -> Optional[UserInDB]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT username, id, full_name, email, hashed_password, disabled FROM users WHERE username = ?",
+                (username,),
+            ).fetchone()
+        if row is None:
+            return None
+        return UserInDB(
+            username=row[0],
+            id=row[1],
+            full_name=row[2],
+            email=row[3],
+            hashed_password=row[4],
+            disabled=bool(row[5]),
+        )
+
+    def add(self, user: UserInDB) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO users (username, id, full_name, email, hashed_password, disabled) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (user.username, user.id, user.full_name, user.email, user.hashed_password, bool(user.disabled)),
+            )
+
+    def seed(self, users: Iterable[Dict[str, Any]]) -> int:
+        rows = [
+            (u["username"], u.get("id"), u.get("full_name"), u.get("email"), u["hashed_password"],
+             bool(u.get("disabled", False)))
+            for u in users
+        ]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO users (username, id, full_name, email, hashed_password, disabled) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.execute("COMMIT")
+            return self._conn.total_changes - before
+
+    def set_disabled(self, username: str, disabled: bool) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE users SET disabled = ? WHERE username = ?", (int(disabled), username)
+            )
+        return cursor.rowcount > 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,39 +1,65 @@
 import os
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional, Dict, Any
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 
 from backend.src.models.user import TokenData, User, UserInDB
+from backend.src.auth.token_cache import VerifiedTokenCache
+from backend.src.auth.hashing_pool import HashingPool
+from backend.src.auth.user_store import (
+    DEFAULT_USERS,
+    InMemoryUserRepository,
+    SQLiteUserRepository,
+    UserRepository,
+    load_users_file
+)
+from backend.src.services.metrics import PASSWORD_HASH_DURATION
 
 # Get secret key from environment or use a default one
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "3b3350a35ad3e28cc8fde03fd11657c04b70ffd39d7caf53a1f1ea6c3d4454d9")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Default on-disk location of the SQLite user store
+DEFAULT_USER_DB_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "users.sqlite3"
+)
+
+# bcrypt work factor (log2 of the number of rounds) for newly hashed passwords
+BCRYPT_ROUNDS = int(os.getenv("AUTH_BCRYPT_ROUNDS", 12))
+
+# Tokens whose signature has already been checked, with the user they resolve to
+token_cache = VerifiedTokenCache()
+
 # Password context for hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-# Mock user database - replace with an actual database in production
-fake_users_db = {
-    "johndoe": {
-        "id": 1,
-        "username": "johndoe",
-        "full_name": "John Doe",
-        "email": "johndoe@example.com",
-        "hashed_password": pwd_context.hash("secret"),
-        "disabled": False,
-    },
-    "alice": {
-        "id": 2,
-        "username": "alice",
-        "full_name": "Alice Wonderland",
-        "email": "alice@example.com",
-        "hashed_password": pwd_context.hash("secret123"),
-        "disabled": False,
-    },
-}
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# Threads that run bcrypt off the event loop
+hashing_pool = HashingPool()
+
+
+
+@lru_cache()
+def get_user_repository() -> UserRepository:
+    """
+    Provides the user store, created on first use rather than at import.
+    AUTH_USER_STORE selects "memory" (default) or "sqlite" (at AUTH_USER_DB_PATH).
+    Seed users come from AUTH_USERS_FILE, a JSON list with precomputed
+    hashed_password values, or the built-in demo accounts.
+    """
+    if os.getenv("AUTH_USER_STORE", "memory").lower() == "sqlite":
+        repository: UserRepository = SQLiteUserRepository(
+            os.getenv("AUTH_USER_DB_PATH", DEFAULT_USER_DB_PATH)
+        )
+    else:
+        repository = InMemoryUserRepository()
+
+    users_file = os.getenv("AUTH_USERS_FILE")
+    repository.seed(load_users_file(users_file) if users_file else DEFAULT_USERS)
+    return repository
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -46,12 +72,36 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against a hash on the hashing pool"""
+    with PASSWORD_HASH_DURATION.labels(operation="verify").time():
+        return await hashing_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the hashing pool"""
+    with PASSWORD_HASH_DURATION.labels(operation="hash").time():
+        return await hashing_pool.run(get_password_hash, password)
+
+
 def get_user(username: str) -> Optional[UserInDB]:
-    """Get a user from the database"""
-    if username in fake_users_db:
-        user_dict = fake_users_db[username]
-        return UserInDB(**user_dict)
-    return None
+    """Get a user from the user store"""
+    return get_user_repository().get(username)
+
+
+def set_user_disabled(username: str, disabled: bool = True) -> None:
+    """
+    Enable or disable a user, revoking any cached tokens they hold in this
+    process; other workers notice within the token cache's ttl
+    """
+    if not get_user_repository().set_disabled(username, disabled):
+        raise ValueError(f"User not found: {username}")
+    invalidate_user_tokens(username)
+
+
+def invalidate_user_tokens(username: str) -> int:
+    """Drop a user's verified tokens so their next request is checked in full"""
+    return token_cache.invalidate_user(username)
 
 
 def authenticate_user(username: str, password: str) -> Optional[User]:
@@ -64,6 +114,16 @@ def authenticate_user(username: str, password: str) -> Optional[User]:
     return user
 
 
+async def authenticate_user_async(username: str, password: str) -> Optional[User]:
+    """Authenticate a user without blocking the event loop on bcrypt"""
+    user = get_user(username)
+    if not user:
+        return None
+    if not await verify_password_async(password, user.hashed_password):
+        return None
+    return user
+
+
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -81,8 +141,8 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     return encoded_jwt
 
 
-def verify_token(token: str) -> TokenData:
-    """Verify a JWT token"""
+def decode_token(token: str) -> Dict[str, Any]:
+    """Verify a JWT token's signature and expiry and return its claims"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -92,13 +152,33 @@ def verify_token(token: str) -> TokenData:
     try:
         # Decode JWT token
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        
-        if username is None:
-            raise credentials_exception
-        
-        token_data = TokenData(username=username)
-        return token_data
-    
     except JWTError:
-        raise credentials_exception 
\ No newline at end of file
+        raise credentials_exception
+    
+    if payload.get("sub") is None:
+        raise credentials_exception
+    
+    return payload
+
+
+def verify_token(token: str) -> TokenData:
+    """Verify a JWT token"""
+    payload = decode_token(token)
+    return TokenData(username=payload["sub"])
+
+
+def get_user_for_token(token: str) -> Optional[UserInDB]:
+    """
+    Resolve a bearer token to its user.
+    Tokens seen before are answered from the verified-token cache, skipping
+    signature verification and the user lookup for up to the cache's ttl.
+    """
+    user = token_cache.get(token)
+    if user is not None:
+        return user
+    
+    payload = decode_token(token)
+    user = get_user(username=payload["sub"])
+    if user is not None and "exp" in payload:
+        token_cache.set(token, float(payload["exp"]), user)
+    return user 
\ No newline at end of file
@@ -1,7 +1,7 @@
 import os
 import sys
-import uvicorn
 import ssl
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -14,12 +14,53 @@ load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
 
 from backend.src.api.weather import router as weather_router
 from backend.src.api.auth import router as auth_router
+from backend.src.api.metrics import MetricsMiddleware, TimedRoute, router as metrics_router
+from backend.src.api.dependencies import (
+    get_weather_service,
+    get_background_refresher,
+    get_observation_recorder,
+    get_shared_cache,
+    get_subscription_hub
+)
+from backend.src.auth.utils import hashing_pool
+from backend.src.serving import serve
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Open the upstream connection pool and start the hot-location refresher
+    and history writer on startup; stop live subscriptions and the
+    refresher, flush the history, drain the pool and release the password
+    hashing threads on shutdown.
+    """
+    if os.getenv("OPENWEATHERMAP_API_KEY"):
+        await get_weather_service().open()
+        if os.getenv("BACKGROUND_REFRESH", "true").lower() == "true":
+            get_background_refresher().start()
+    if os.getenv("WEATHER_HISTORY", "true").lower() == "true":
+        get_observation_recorder().start()
+    yield
+    if get_subscription_hub.cache_info().currsize:
+        await get_subscription_hub().close()
+    if get_background_refresher.cache_info().currsize:
+        await get_background_refresher().stop()
+    if get_observation_recorder.cache_info().currsize:
+        await get_observation_recorder().stop()
+        get_observation_recorder().store.close()
+    if get_weather_service.cache_info().currsize:
+        await get_weather_service().close()
+    if get_shared_cache.cache_info().currsize and get_shared_cache() is not None:
+        get_shared_cache().close()
+    hashing_pool.shutdown()
+
 
 # Create FastAPI app
 app = FastAPI(
     title="Weather API",
     description="API for retrieving weather data",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -29,11 +70,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let browsers read the metadata of streamed exports and binary grids
+    expose_headers=[
+        "X-Export-Locations",
+        "X-Grid-Field",
+        "X-Grid-Bounds",
+        "X-Grid-Shape",
+        "X-Grid-Step",
+        "X-Grid-Samples",
+        "X-Grid-Offset",
+        "X-Grid-Scale",
+        "X-Grid-Nodata",
+    ],
 )
 
+# Record per-route latency; added last so it also times the CORS middleware
+app.add_middleware(MetricsMiddleware)
+app.router.route_class = TimedRoute
+
 # Include routers
 app.include_router(weather_router)
 app.include_router(auth_router)
+app.include_router(metrics_router)
 
 @app.get("/")
 async def root():
@@ -50,7 +108,7 @@ if __name__ == "__main__":
         ssl_certfile = os.path.join(os.path.dirname(os.path.dirname(__file__)), "certs/cert.pem")
         
         # Run with HTTPS
-        uvicorn.run(
+        serve(
             app, 
             host=host, 
             port=port,
@@ -59,7 +117,7 @@ if __name__ == "__main__":
         )
     else:
         # Run with HTTP
-        uvicorn.run(
+        serve(
             app,
             host=host,
             port=port
@@ -1,15 +1,59 @@
 from backend.src.models.weather import (
+    SerializableModel,
     CurrentWeather,
     WeatherForecast,
     WeatherCondition,
     ForecastItem,
-    GeoLocation
+    GeoLocation,
+    AirQuality,
+    AirQualityIndex,
+    BatchLocation,
+    BatchRequest,
+    BatchError,
+    BatchItem,
+    BatchResponse,
+    WeatherHistoryPoint,
+    AirQualityHistoryPoint,
+    WeatherHistory,
+    AirQualityHistory,
+    WeatherGrid
+)
+from backend.src.models.records import (
+    ConditionRecord,
+    CurrentRecord,
+    ForecastRecord,
+    AirQualityRecord,
+    AirQualityAnalysis,
+    WeatherRecord,
+    to_model,
+    from_model
 )
 
 __all__ = [
+    "SerializableModel",
     "CurrentWeather",
     "WeatherForecast",
     "WeatherCondition",
     "ForecastItem",
-    "GeoLocation"
+    "GeoLocation",
+    "AirQuality",
+    "AirQualityIndex",
+    "BatchLocation",
+    "BatchRequest",
+    "BatchError",
+    "BatchItem",
+    "BatchResponse",
+    "WeatherHistoryPoint",
+    "AirQualityHistoryPoint",
+    "WeatherHistory",
+    "AirQualityHistory",
+    "WeatherGrid",
+    "ConditionRecord",
+    "CurrentRecord",
+    "ForecastRecord",
+    "AirQualityRecord",
+    "AirQualityAnalysis",
+    "WeatherRecord",
+    "to_model",
+    "from_model"
 ]
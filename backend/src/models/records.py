@@ -0,0 +1,353 @@
+import sys
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from backend.src.models.weather import (
+    CurrentWeather,
+    WeatherForecast,
+    WeatherCondition,
+    ForecastItem,
+    GeoLocation,
+    AirQuality,
+    AirQualityIndex,
+    SerializableModel
+)
+
+# Pollutants reported by the air quality endpoint, in storage order
+POLLUTANTS = ("co", "no2", "o3", "pm2_5", "pm10", "so2")
+
+AQI_DESCRIPTIONS = {
+    1: "Good",
+    2: "Fair",
+    3: "Moderate",
+    4: "Poor",
+    5: "Very Poor",
+}
+
+# Standard indices computed for air quality records, with their category names
+# and the upper index value of each category but the last
+AQI_SCALES = {
+    "us_epa": (
+        ("Good", "Moderate", "Unhealthy for Sensitive Groups", "Unhealthy", "Very Unhealthy", "Hazardous"),
+        (50, 100, 150, 200, 300),
+    ),
+    "eu_caqi": (
+        ("Very low", "Low", "Medium", "High", "Very high"),
+        (25, 50, 75, 100),
+    ),
+}
+
+# Hours each pollutant is averaged over for the US EPA index, in POLLUTANTS order
+AVERAGING_HOURS = (8, 1, 8, 24, 24, 1)
+
+# Upper bound on distinct interned conditions; upstream has well under a hundred
+MAX_INTERNED_CONDITIONS = 4096
+
+
+@dataclass(frozen=True)
+class ConditionRecord:
+    """Weather condition shared by every record that references it"""
+    __slots__ = ("main", "description", "icon")
+    main: str
+    description: str
+    icon: str
+
+
+_conditions: Dict[Tuple[str, str, str], ConditionRecord] = {}
+
+
+def intern_condition(main: str, description: str, icon: str) -> ConditionRecord:
+    """Return the canonical ConditionRecord for a (main, description, icon) triple"""
+    key = (main, description, icon)
+    condition = _conditions.get(key)
+    if condition is None:
+        condition = ConditionRecord(sys.intern(main), sys.intern(description), sys.intern(icon))
+        if len(_conditions) < MAX_INTERNED_CONDITIONS:
+            _conditions[key] = condition
+    return condition
+
+
+def intern_name(name: Optional[str]) -> Optional[str]:
+    """Intern city and country names, which repeat across many records"""
+    return sys.intern(name) if name is not None else None
+
+
+@dataclass(frozen=True)
+class CurrentRecord:
+    """Compact current-weather observation; dt is the upstream Unix timestamp"""
+    __slots__ = (
+        "temperature", "feels_like", "humidity", "pressure", "wind_speed",
+        "wind_direction", "conditions", "city", "country", "dt",
+    )
+    temperature: float
+    feels_like: float
+    humidity: int
+    pressure: int
+    wind_speed: float
+    wind_direction: int
+    conditions: Tuple[ConditionRecord, ...]
+    city: str
+    country: str
+    dt: int
+
+
+@dataclass(frozen=True)
+class AirQualityAnalysis:
+    """
+    Standard indices for an air quality observation, in POLLUTANTS order.
+    averages holds each pollutant's concentration over its AVERAGING_HOURS;
+    the sub-indices are computed from those averages. Values that could not
+    be computed are NaN.
+    """
+    __slots__ = ("averages", "us_epa", "eu_caqi")
+    averages: Tuple[float, ...]
+    us_epa: Tuple[float, ...]
+    eu_caqi: Tuple[float, ...]
+
+
+@dataclass(frozen=True)
+class AirQualityRecord:
+    """
+    Compact air quality observation; pollutants are in POLLUTANTS order.
+    analysis is None until an analytics stage has computed it.
+    """
+    __slots__ = ("aqi", "pollutants", "city", "country", "dt", "analysis")
+    aqi: int
+    pollutants: Tuple[float, ...]
+    city: str
+    country: str
+    dt: int
+    analysis: Optional[AirQualityAnalysis]
+
+    @property
+    def description(self) -> str:
+        return AQI_DESCRIPTIONS.get(self.aqi, "Unknown")
+
+
+def forecast_row_dtype(n_percentiles: int) -> np.dtype:
+    """Structured row layout for one aggregated forecast bucket"""
+    return np.dtype([
+        ("dt", "i8"),
+        ("utc_offset", "i4"),
+        ("condition", "i4"),
+        ("humidity", "i4"),
+        ("temp_min", "f8"),
+        ("temp_max", "f8"),
+        ("temp_mean", "f8"),
+        ("precipitation_chance", "f8"),
+        ("wind_speed", "f8"),
+        ("wind_speed_max", "f8"),
+        ("temp_percentiles", "f8", (n_percentiles,)),
+    ])
+
+
+@dataclass(frozen=True)
+class ForecastRecord:
+    """
+    Compact forecast: one structured NumPy row per bucket.
+    Each row's condition indexes into the conditions tuple, and the
+    temp_percentiles sub-array follows the order of percentile_names.
+    Optional values (temp_mean, wind_speed_max) are NaN when absent.
+    """
+    __slots__ = ("city", "country", "rows", "conditions", "percentile_names")
+    city: str
+    country: str
+    rows: np.ndarray
+    conditions: Tuple[ConditionRecord, ...]
+    percentile_names: Tuple[str, ...]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, ForecastRecord):
+            return NotImplemented
+        return (
+            (self.city, self.country, self.conditions, self.percentile_names)
+            == (other.city, other.country, other.conditions, other.percentile_names)
+            and self.rows.tobytes() == other.rows.tobytes()
+        )
+
+
+WeatherRecord = Union[CurrentRecord, ForecastRecord, AirQualityRecord]
+
+
+def _optional(value: float) -> Any:
+    return None if np.isnan(value) else float(value)
+
+
+def forecast_item_kwargs(record: ForecastRecord) -> List[Dict[str, Any]]:
+    """Expand a ForecastRecord's rows into ForecastItem keyword dicts"""
+    items = []
+    for row in record.rows.tolist():
+        dt, offset, condition, humidity, temp_min, temp_max, temp_mean, pop, wind, wind_max, percentiles = row
+        main = record.conditions[condition]
+        items.append({
+            "date": datetime.fromtimestamp(dt, tz=timezone(timedelta(seconds=offset))),
+            "temp_min": temp_min,
+            "temp_max": temp_max,
+            "temp_mean": _optional(temp_mean),
+            "temp_percentiles": dict(zip(record.percentile_names, percentiles)) if record.percentile_names else None,
+            "humidity": humidity,
+            "conditions": [{"main": main.main, "description": main.description, "icon": main.icon}],
+            "precipitation_chance": pop,
+            "wind_speed": wind,
+            "wind_speed_max": _optional(wind_max),
+        })
+    return items
+
+
+def _conditions_model(conditions: Sequence[ConditionRecord]) -> List[WeatherCondition]:
+    return [WeatherCondition(main=c.main, description=c.description, icon=c.icon) for c in conditions]
+
+
+def to_model(record: Union[WeatherRecord, GeoLocation]) -> SerializableModel:
+    """Convert an internal record to its public Pydantic model"""
+    if isinstance(record, CurrentRecord):
+        return CurrentWeather(
+            temperature=record.temperature,
+            feels_like=record.feels_like,
+            humidity=record.humidity,
+            pressure=record.pressure,
+            wind_speed=record.wind_speed,
+            wind_direction=record.wind_direction,
+            conditions=_conditions_model(record.conditions),
+            city=record.city,
+            country=record.country,
+            timestamp=datetime.fromtimestamp(record.dt)
+        )
+    if isinstance(record, ForecastRecord):
+        return WeatherForecast(
+            city=record.city,
+            country=record.country,
+            forecast=[ForecastItem(**item) for item in forecast_item_kwargs(record)]
+        )
+    if isinstance(record, AirQualityRecord):
+        return AirQuality(
+            aqi=record.aqi,
+            description=record.description,
+            pollutants={name: value for name, value in zip(POLLUTANTS, record.pollutants) if not np.isnan(value)},
+            city=record.city,
+            country=record.country,
+            timestamp=datetime.fromtimestamp(record.dt),
+            **_analysis_fields(record.analysis)
+        )
+    if isinstance(record, GeoLocation):
+        return record
+    raise TypeError(f"Not a weather record: {type(record).__name__}")
+
+
+def from_model(model: SerializableModel) -> Union[WeatherRecord, GeoLocation]:
+    """Convert a public Pydantic model back to its internal record"""
+    if isinstance(model, CurrentWeather):
+        return CurrentRecord(
+            temperature=model.temperature,
+            feels_like=model.feels_like,
+            humidity=model.humidity,
+            pressure=model.pressure,
+            wind_speed=model.wind_speed,
+            wind_direction=model.wind_direction,
+            conditions=tuple(intern_condition(c.main, c.description, c.icon) for c in model.conditions),
+            city=intern_name(model.city),
+            country=intern_name(model.country),
+            dt=int(model.timestamp.timestamp())
+        )
+    if isinstance(model, WeatherForecast):
+        return _forecast_from_model(model)
+    if isinstance(model, AirQuality):
+        return AirQualityRecord(
+            aqi=model.aqi,
+            pollutants=tuple(float(model.pollutants.get(name, np.nan)) for name in POLLUTANTS),
+            city=intern_name(model.city),
+            country=intern_name(model.country),
+            dt=int(model.timestamp.timestamp()),
+            analysis=_analysis_from_model(model)
+        )
+    if isinstance(model, GeoLocation):
+        return model
+    raise TypeError(f"No record type for {type(model).__name__}")
+
+
+def _index_model(scale: str, sub_indices: Sequence[float]) -> Optional[AirQualityIndex]:
+    values = {name: int(round(value)) for name, value in zip(POLLUTANTS, sub_indices) if not np.isnan(value)}
+    if not values:
+        return None
+    dominant = max(values, key=values.__getitem__)
+    categories, bounds = AQI_SCALES[scale]
+    category = categories[int(np.searchsorted(bounds, values[dominant]))]
+    return AirQualityIndex(value=values[dominant], category=category, dominant_pollutant=dominant, sub_indices=values)
+
+
+def _analysis_fields(analysis: Optional[AirQualityAnalysis]) -> Dict[str, Any]:
+    if analysis is None:
+        return {}
+    indices = {
+        scale: index
+        for scale, index in (("us_epa", _index_model("us_epa", analysis.us_epa)),
+                             ("eu_caqi", _index_model("eu_caqi", analysis.eu_caqi)))
+        if index is not None
+    }
+    averages = {
+        f"{name}_{hours}h": value
+        for name, hours, value in zip(POLLUTANTS, AVERAGING_HOURS, analysis.averages)
+        if hours > 1 and not np.isnan(value)
+    }
+    return {"indices": indices, "averages": averages}
+
+
+def _analysis_from_model(model: AirQuality) -> Optional[AirQualityAnalysis]:
+    if model.indices is None:
+        return None
+
+    def sub_indices(scale: str) -> Tuple[float, ...]:
+        index = model.indices.get(scale)
+        values = index.sub_indices if index is not None else {}
+        return tuple(float(values.get(name, np.nan)) for name in POLLUTANTS)
+
+    # One-hour averages are the concentrations themselves and are not repeated in the model
+    averages = model.averages or {}
+    return AirQualityAnalysis(
+        averages=tuple(
+            float(averages.get(f"{name}_{hours}h", np.nan)) if hours > 1 else float(model.pollutants.get(name, np.nan))
+            for name, hours in zip(POLLUTANTS, AVERAGING_HOURS)
+        ),
+        us_epa=sub_indices("us_epa"),
+        eu_caqi=sub_indices("eu_caqi"),
+    )
+
+
+def _forecast_from_model(model: WeatherForecast) -> ForecastRecord:
+    percentile_names = tuple(model.forecast[0].temp_percentiles or ()) if model.forecast else ()
+    rows = np.zeros(len(model.forecast), dtype=forecast_row_dtype(len(percentile_names)))
+    conditions: List[ConditionRecord] = []
+    codes: Dict[ConditionRecord, int] = {}
+    for i, item in enumerate(model.forecast):
+        first = item.conditions[0]
+        condition = intern_condition(first.main, first.description, first.icon)
+        if condition not in codes:
+            codes[condition] = len(conditions)
+            conditions.append(condition)
+        offset = item.date.utcoffset()
+        rows[i] = (
+            int(item.date.timestamp()),
+            int(offset.total_seconds()) if offset is not None else 0,
+            codes[condition],
+            item.humidity,
+            item.temp_min,
+            item.temp_max,
+            np.nan if item.temp_mean is None else item.temp_mean,
+            item.precipitation_chance,
+            item.wind_speed,
+            np.nan if item.wind_speed_max is None else item.wind_speed_max,
+            [(item.temp_percentiles or {}).get(name, np.nan) for name in percentile_names],
+        )
+    return ForecastRecord(
+        city=intern_name(model.city),
+        country=intern_name(model.country),
+        rows=rows,
+        conditions=tuple(conditions),
+        percentile_names=percentile_names
+    )
@@ -1,7 +1,55 @@
-from pydantic import BaseModel
-from typing import List, Optional, Dict
+import hashlib
+from pydantic import BaseModel, Field, PrivateAttr, model_validator
+from typing import Any, List, Optional, Dict, Generic, TypeVar
 from datetime import datetime
 
+# Upper bound on the number of locations accepted in one batch request
+MAX_BATCH_SIZE = 500
+
+T = TypeVar("T")
+
+
+class _JSONMemo:
+    """Holder for a model's encoded JSON and ETag; never affects model equality."""
+    __slots__ = ("value", "etag")
+
+    def __init__(self):
+        self.value: Optional[bytes] = None
+        self.etag: Optional[str] = None
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, _JSONMemo)
+
+    def __hash__(self) -> int:
+        return 0
+
+
+class SerializableModel(BaseModel):
+    """
+    Model that encodes itself to JSON once and reuses the bytes.
+    Cached instances are shared between requests, so a cache hit is written
+    to the socket without being serialized again. Instances must not be
+    mutated after json_bytes() is called; use model_copy(update=...) instead.
+    """
+    _json: _JSONMemo = PrivateAttr(default_factory=_JSONMemo)
+
+    def json_bytes(self) -> bytes:
+        """Return the JSON encoding of the model, computing it on first use."""
+        if self._json.value is None:
+            self._json.value = self.__pydantic_serializer__.to_json(self)
+        return self._json.value
+
+    def etag(self) -> str:
+        """Return a strong HTTP entity tag derived from the JSON encoding."""
+        if self._json.etag is None:
+            self._json.etag = '"' + hashlib.blake2b(self.json_bytes(), digest_size=8).hexdigest() + '"'
+        return self._json.etag
+
+    def model_copy(self, *, update: Optional[Dict[str, Any]] = None, deep: bool = False):
+        copy = super().model_copy(update=update, deep=deep)
+        copy._json = _JSONMemo()
+        return copy
+
 
 class WeatherCondition(BaseModel):
     """Model for current weather conditions."""
@@ -10,7 +58,7 @@ class WeatherCondition(BaseModel):
     main: str
 
 
-class CurrentWeather(BaseModel):
+class CurrentWeather(SerializableModel):
     """Model for current weather data."""
     temperature: float
     feels_like: float
@@ -33,16 +81,19 @@ class ForecastItem(BaseModel):
     conditions: List[WeatherCondition]
     precipitation_chance: float
     wind_speed: float
+    temp_mean: Optional[float] = None
+    temp_percentiles: Optional[Dict[str, float]] = None
+    wind_speed_max: Optional[float] = None
 
 
-class WeatherForecast(BaseModel):
+class WeatherForecast(SerializableModel):
     """Model for 5-day weather forecast."""
     city: str
     country: str
     forecast: List[ForecastItem]
 
 
-class GeoLocation(BaseModel):
+class GeoLocation(SerializableModel):
     """Model for geographical location."""
     lat: float
     lon: float
@@ -50,11 +101,119 @@ class GeoLocation(BaseModel):
     country: Optional[str] = None
 
 
-class AirQuality(BaseModel):
+class AirQualityIndex(BaseModel):
+    """Model for one standard air quality index at a location."""
+    value: int
+    category: str
+    dominant_pollutant: str  # Pollutant with the highest sub-index
+    sub_indices: Dict[str, int]
+
+
+class AirQuality(SerializableModel):
     """Model for air quality data."""
     aqi: int  # Air Quality Index (1-5)
     description: str  # Description of the air quality level
     pollutants: Dict[str, float]  # Concentration of various pollutants
     city: str
     country: str
-    timestamp: datetime 
\ No newline at end of file
+    timestamp: datetime
+    indices: Optional[Dict[str, AirQualityIndex]] = None  # Keyed by scale: "us_epa", "eu_caqi"
+    averages: Optional[Dict[str, float]] = None  # Rolling means keyed like "o3_8h", "pm2_5_24h"
+
+
+class BatchLocation(BaseModel):
+    """Model for one location in a batch request (city name or coordinates)."""
+    city: Optional[str] = None
+    lat: Optional[float] = Field(None, ge=-90, le=90)
+    lon: Optional[float] = Field(None, ge=-180, le=180)
+
+    @model_validator(mode="after")
+    def check_city_or_coordinates(self) -> "BatchLocation":
+        if not self.city and (self.lat is None or self.lon is None):
+            raise ValueError("Must provide either city name or latitude/longitude")
+        return self
+
+
+class BatchRequest(BaseModel):
+    """Model for a batch lookup request."""
+    locations: List[BatchLocation] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class BatchError(BaseModel):
+    """Model for the error of a single failed batch item."""
+    status_code: int
+    detail: str
+
+
+class BatchItem(BaseModel, Generic[T]):
+    """Model for the result or error of a single batch item."""
+    location: BatchLocation
+    result: Optional[T] = None
+    error: Optional[BatchError] = None
+
+
+class BatchResponse(BaseModel, Generic[T]):
+    """Model for a batch lookup response, in request order."""
+    results: List[BatchItem[T]]
+
+
+class WeatherHistoryPoint(BaseModel):
+    """Model for current-weather observations aggregated over one interval."""
+    timestamp: datetime  # Start of the interval
+    samples: int
+    temperature: float
+    temperature_min: float
+    temperature_max: float
+    feels_like: float
+    humidity: float
+    pressure: float
+    wind_speed: float
+    wind_speed_max: float
+
+
+class AirQualityHistoryPoint(BaseModel):
+    """Model for air quality observations aggregated over one interval."""
+    timestamp: datetime  # Start of the interval
+    samples: int
+    aqi: float  # Mean Air Quality Index over the interval
+    aqi_max: int
+    pollutants: Dict[str, Optional[float]]
+
+
+class HistoryRange(BaseModel):
+    """Model for the location and time range of a history query."""
+    lat: float
+    lon: float
+    city: Optional[str] = None
+    country: Optional[str] = None
+    start: datetime
+    end: datetime
+    interval: int  # Seconds per point
+
+
+class WeatherHistory(HistoryRange):
+    """Model for recorded current-weather history."""
+    points: List[WeatherHistoryPoint]
+
+
+class AirQualityHistory(HistoryRange):
+    """Model for recorded air quality history."""
+    points: List[AirQualityHistoryPoint]
+
+
+class WeatherGrid(BaseModel):
+    """Model for a field interpolated over a bounding box, as quantized values."""
+    field: str
+    min_lat: float
+    min_lon: float
+    max_lat: float
+    max_lon: float
+    rows: int
+    cols: int
+    step: float  # Degrees between sampled points
+    samples: int
+    sampled: int  # Samples that were fetched successfully
+    offset: float  # value = offset + code * scale
+    scale: float
+    nodata: int  # Code for cells without a value
+    values: List[int]  # Codes, row by row from north to south, west to east
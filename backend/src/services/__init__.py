@@ -1,11 +1,29 @@
 from backend.src.services.weather_service import (
     WeatherProvider,
+    DelegatingWeatherProvider,
     OpenWeatherMapProvider,
     WeatherService
 )
+from backend.src.services.cache import TTLCache, CachingWeatherProvider
+from backend.src.services.geocode_index import GeocodeIndex
+from backend.src.services.singleflight import SingleFlight, CoalescingWeatherProvider
+from backend.src.services.spatial import TileGrid, SpatialIndex
+from backend.src.services.refresher import HotSetTracker, BackgroundRefresher
+from backend.src.services.instrumentation import InstrumentedWeatherProvider
 
 __all__ = [
     "WeatherProvider",
+    "DelegatingWeatherProvider",
     "OpenWeatherMapProvider",
-    "WeatherService"
+    "WeatherService",
+    "TTLCache",
+    "CachingWeatherProvider",
+    "GeocodeIndex",
+    "SingleFlight",
+    "CoalescingWeatherProvider",
+    "TileGrid",
+    "SpatialIndex",
+    "HotSetTracker",
+    "BackgroundRefresher",
+    "InstrumentedWeatherProvider"
 ]
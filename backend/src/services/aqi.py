@@ -0,0 +1,232 @@
+import asyncio
+from dataclasses import replace
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.src.models.weather import GeoLocation
+from backend.src.models.records import AVERAGING_HOURS, POLLUTANTS, AirQualityAnalysis, AirQualityRecord
+from backend.src.services.history import ObservationStore
+from backend.src.services.weather_service import DelegatingWeatherProvider, WeatherProvider
+
+# Litres per mole of air at 25 °C and 1 atm, for converting µg/m³ to ppb
+MOLAR_VOLUME = 24.45
+
+MOLECULAR_WEIGHTS = {"co": 28.01, "no2": 46.0055, "o3": 48.00, "so2": 64.066}
+
+# Longest averaging period, which bounds the history an analysis needs
+MAX_WINDOW_SECONDS = max(AVERAGING_HOURS) * 3600
+
+# US EPA index bands, shared by every pollutant
+EPA_INDEX = ((0, 50), (51, 100), (101, 150), (151, 200), (201, 300), (301, 500))
+
+# US EPA concentration breakpoints (2024 PM2.5 revision), in the units the
+# EPA tables use: ppm for CO, ppb for the other gases and µg/m³ for PM
+EPA_BREAKPOINTS = {
+    "co": ((0.0, 4.4), (4.5, 9.4), (9.5, 12.4), (12.5, 15.4), (15.5, 30.4), (30.5, 50.4)),
+    "no2": ((0, 53), (54, 100), (101, 360), (361, 649), (650, 1249), (1250, 2049)),
+    "o3": ((0, 54), (55, 70), (71, 85), (86, 105), (106, 200)),
+    "pm2_5": ((0.0, 9.0), (9.1, 35.4), (35.5, 55.4), (55.5, 125.4), (125.5, 225.4), (225.5, 325.4)),
+    "pm10": ((0, 54), (55, 154), (155, 254), (255, 354), (355, 424), (425, 604)),
+    "so2": ((0, 35), (36, 75), (76, 185), (186, 304), (305, 604), (605, 1004)),
+}
+
+# Decimal places EPA concentrations are truncated to before lookup
+EPA_DECIMALS = {"co": 1, "no2": 0, "o3": 0, "pm2_5": 1, "pm10": 0, "so2": 0}
+
+# EU CAQI hourly grid: the concentrations (µg/m³) at index 0, 25, 50, 75 and 100
+CAQI_GRID = {
+    "co": (0, 5000, 7500, 10000, 20000),
+    "no2": (0, 50, 100, 200, 400),
+    "o3": (0, 60, 120, 180, 240),
+    "pm2_5": (0, 15, 30, 55, 110),
+    "pm10": (0, 25, 50, 90, 180),
+    "so2": (0, 50, 100, 350, 500),
+}
+
+
+class IndexScale:
+    """
+    Piecewise-linear breakpoint table for one index, padded into arrays of
+    shape (pollutants, bands) so every pollutant of every sample is looked
+    up in a single broadcast comparison.
+    """
+
+    __slots__ = ("name", "factors", "scales", "c_lo", "c_hi", "i_lo", "i_hi", "last_band", "cap", "rounded")
+
+    def __init__(
+        self,
+        name: str,
+        breakpoints: Dict[str, Sequence[Tuple[float, float]]],
+        index_bands: Dict[str, Sequence[Tuple[float, float]]],
+        factors: Optional[Dict[str, float]] = None,
+        decimals: Optional[Dict[str, int]] = None,
+        cap: float = np.inf,
+        rounded: bool = False,
+    ):
+        width = max(len(bands) for bands in breakpoints.values())
+        shape = (len(POLLUTANTS), width)
+        self.name = name
+        self.c_lo, self.c_hi = np.full(shape, np.inf), np.full(shape, np.inf)
+        self.i_lo, self.i_hi = np.zeros(shape), np.zeros(shape)
+        self.last_band = np.array([len(breakpoints[name]) - 1 for name in POLLUTANTS])
+        for row, pollutant in enumerate(POLLUTANTS):
+            bands = np.asarray(breakpoints[pollutant], dtype=np.float64)
+            index = np.asarray(index_bands[pollutant], dtype=np.float64)
+            self.c_lo[row, :len(bands)], self.c_hi[row, :len(bands)] = bands[:, 0], bands[:, 1]
+            self.i_lo[row, :len(bands)], self.i_hi[row, :len(bands)] = index[:, 0], index[:, 1]
+        self.factors = np.array([(factors or {}).get(name, 1.0) for name in POLLUTANTS])
+        self.scales = np.array([10.0 ** decimals[name] for name in POLLUTANTS]) if decimals else None
+        self.cap = cap
+        self.rounded = rounded
+
+    def sub_indices(self, concentrations: np.ndarray) -> np.ndarray:
+        """
+        Sub-index of every concentration in an (..., len(POLLUTANTS)) array of
+        µg/m³ values; NaN concentrations give NaN. Concentrations above the
+        top band are extrapolated along it, up to the scale's cap.
+        """
+        c = np.maximum(np.asarray(concentrations, dtype=np.float64), 0.0) * self.factors
+        if self.scales is not None:
+            c = np.floor(c * self.scales + 1e-9) / self.scales
+        # Number of bands each value lies above, broadcast over the padded band axis
+        with np.errstate(invalid="ignore"):
+            band = np.minimum((c[..., None] > self.c_hi).sum(axis=-1), self.last_band)
+        row = np.arange(len(POLLUTANTS))
+        c_lo, c_hi = self.c_lo[row, band], self.c_hi[row, band]
+        i_lo, i_hi = self.i_lo[row, band], self.i_hi[row, band]
+        values = (i_hi - i_lo) / (c_hi - c_lo) * (c - c_lo) + i_lo
+        if self.rounded:
+            values = np.floor(values + 0.5)
+        return np.minimum(values, self.cap)
+
+
+def _ppb(name: str) -> float:
+    return MOLAR_VOLUME / MOLECULAR_WEIGHTS[name]
+
+
+US_EPA = IndexScale(
+    "us_epa",
+    EPA_BREAKPOINTS,
+    {name: EPA_INDEX[:len(bands)] for name, bands in EPA_BREAKPOINTS.items()},
+    factors={"co": _ppb("co") / 1000, "no2": _ppb("no2"), "o3": _ppb("o3"), "so2": _ppb("so2")},
+    decimals=EPA_DECIMALS,
+    cap=500.0,
+    rounded=True,
+)
+
+EU_CAQI = IndexScale(
+    "eu_caqi",
+    {name: tuple(zip(grid[:-1], grid[1:])) for name, grid in CAQI_GRID.items()},
+    {name: ((0, 25), (25, 50), (50, 75), (75, 100)) for name in CAQI_GRID},
+)
+
+SCALES = {scale.name: scale for scale in (US_EPA, EU_CAQI)}
+
+
+class SeriesAnalysis(NamedTuple):
+    """Per-sample analysis of a time series, sorted by timestamp"""
+    timestamps: np.ndarray
+    averages: np.ndarray
+    us_epa: np.ndarray
+    eu_caqi: np.ndarray
+
+
+def rolling_mean(timestamps: np.ndarray, values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Mean of each column over the window seconds up to and including each
+    sorted timestamp, ignoring NaNs; NaN where a window has no values.
+    """
+    valid = ~np.isnan(values)
+    zeros = np.zeros((1,) + values.shape[1:])
+    sums = np.concatenate([zeros, np.cumsum(np.where(valid, values, 0.0), axis=0)])
+    counts = np.concatenate([zeros, np.cumsum(valid, axis=0)])
+    start = np.searchsorted(timestamps, timestamps - window, side="right")
+    end = np.searchsorted(timestamps, timestamps, side="right")
+    count = counts[end] - counts[start]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, (sums[end] - sums[start]) / count, np.nan)
+
+
+def analyze_series(timestamps: np.ndarray, concentrations: np.ndarray) -> SeriesAnalysis:
+    """
+    Rolling averages and both indices for every sample of an (n,) timestamp
+    array and an (n, len(POLLUTANTS)) concentration array in µg/m³.
+    US EPA sub-indices use each pollutant's AVERAGING_HOURS mean; EU CAQI
+    is an hourly index and uses the concentrations as they are.
+    """
+    order = np.argsort(timestamps, kind="stable")
+    timestamps = np.asarray(timestamps, dtype=np.int64)[order]
+    concentrations = np.asarray(concentrations, dtype=np.float64)[order]
+
+    averages = concentrations.copy()
+    hours = np.array(AVERAGING_HOURS)
+    for window in np.unique(hours[hours > 1]):
+        columns = hours == window
+        averages[:, columns] = rolling_mean(timestamps, concentrations[:, columns], int(window) * 3600)
+
+    return SeriesAnalysis(
+        timestamps=timestamps,
+        averages=averages,
+        us_epa=US_EPA.sub_indices(averages),
+        eu_caqi=EU_CAQI.sub_indices(concentrations),
+    )
+
+
+def analyze(timestamps: np.ndarray, concentrations: np.ndarray) -> AirQualityAnalysis:
+    """Analysis of the latest sample of a series"""
+    series = analyze_series(timestamps, concentrations)
+    return AirQualityAnalysis(
+        averages=tuple(series.averages[-1].tolist()),
+        us_epa=tuple(series.us_epa[-1].tolist()),
+        eu_caqi=tuple(series.eu_caqi[-1].tolist()),
+    )
+
+
+def overall_index(sub_indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Overall index (the highest sub-index) and dominant pollutant (its
+    position in POLLUTANTS) along the last axis; NaN and -1 where no
+    sub-index is known.
+    """
+    filled = np.where(np.isnan(sub_indices), -np.inf, sub_indices)
+    dominant = filled.argmax(axis=-1)
+    values = np.take_along_axis(filled, dominant[..., None], axis=-1)[..., 0]
+    missing = np.isneginf(values)
+    return np.where(missing, np.nan, values), np.where(missing, -1, dominant)
+
+
+def index_map(concentrations: np.ndarray, scale: str = "us_epa") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Overall index and dominant pollutant for many points at once, from an
+    (..., len(POLLUTANTS)) array of concentrations in µg/m³ such as a
+    region's grid. Concentrations are used as they are, without averaging.
+    """
+    if scale not in SCALES:
+        raise ValueError(f"Unknown index scale: {scale}")
+    return overall_index(SCALES[scale].sub_indices(concentrations))
+
+
+class AirQualityAnalyticsProvider(DelegatingWeatherProvider):
+    """
+    WeatherProvider that attaches standard indices and rolling averages to
+    air quality records, so they are cached along with the raw data.
+    With a history store, averages cover the recorded observations of the
+    location's trailing window as well as the new one.
+    """
+
+    def __init__(self, provider: WeatherProvider, store: Optional[ObservationStore] = None):
+        super().__init__(provider)
+        self.store = store
+
+    async def get_air_quality(self, location: GeoLocation) -> AirQualityRecord:
+        """Get air quality data with its analysis"""
+        record = await self.provider.get_air_quality(location)
+        rows = []
+        if self.store is not None:
+            rows = await asyncio.to_thread(
+                self.store.air_quality_rows, location.lat, location.lon,
+                record.dt - MAX_WINDOW_SECONDS + 1, record.dt - 1
+            )
+        series = np.array(rows + [(record.dt,) + record.pollutants], dtype=np.float64)
+        return replace(record, analysis=analyze(series[:, 0], series[:, 1:]))
@@ -0,0 +1,435 @@
+import asyncio
+import dataclasses
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, TYPE_CHECKING
+
+from backend.src.models.weather import GeoLocation
+from backend.src.models.records import CurrentRecord, ForecastRecord, AirQualityRecord, intern_name
+from backend.src.services.rate_limit import Priority, request_priority
+from backend.src.services.refresher import HotSetTracker
+from backend.src.services.rate_limit import RateLimitExceeded
+from backend.src.services.resilience import CircuitOpenError, is_upstream_failure
+from backend.src.services.spatial import SpatialIndex, TileGrid
+from backend.src.services.weather_service import WeatherProvider, DelegatingWeatherProvider
+
+if TYPE_CHECKING:
+    from backend.src.services.shared_cache import SharedCache
+
+
+# Default time-to-live per endpoint, in seconds
+DEFAULT_TTLS = {
+    "current": 10 * 60,
+    "forecast": 60 * 60,
+    "air_quality": 10 * 60,
+    "geocode": 30 * 24 * 60 * 60,
+}
+
+DEFAULT_MAX_ENTRIES = 10_000
+
+# Coordinates are rounded to this many decimals (~11 m) when building keys
+COORDINATE_PRECISION = 4
+
+# Coordinate lookups are quantized to tiles of this size (~1.1 km); 0 disables tiling
+DEFAULT_TILE_SIZE_DEG = 0.01
+
+# A tile miss may be served from a cached tile this close; 0 disables the fallback
+DEFAULT_NEAREST_KM = 1.5
+
+# Expired entries are served for up to this many seconds while being revalidated
+DEFAULT_MAX_STALENESS = 5 * 60
+
+# Older entries are kept this much longer, served only when the upstream is failing
+DEFAULT_STALE_IF_ERROR = 60 * 60
+
+# Provider method used to fetch each coordinate-keyed endpoint
+ENDPOINT_METHODS = {
+    "current": "get_current_weather",
+    "forecast": "get_forecast",
+    "air_quality": "get_air_quality",
+}
+
+
+class TTLCache:
+    """
+    Bounded in-memory LRU cache with a per-entry time-to-live.
+    Expired entries are retained for max_stale further seconds so that
+    lookup() can hand out a stale value while it is being revalidated, and
+    for stale_if_error seconds beyond that for fallback().
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        on_remove: Optional[Callable[[Hashable], None]] = None,
+        max_stale: float = 0,
+        stale_if_error: float = 0,
+    ):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        # Called with the key whenever an entry is evicted, expires or is deleted
+        self.on_remove = on_remove
+        self.max_stale = max_stale
+        self.stale_if_error = stale_if_error
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if it is missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        now = time.monotonic()
+        if expires_at <= now:
+            if now - expires_at > self.max_stale + self.stale_if_error:
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def lookup(self, key: Hashable) -> Tuple[Optional[Any], bool]:
+        """
+        Return (value, fresh). A value past its TTL but within max_stale is
+        returned with fresh=False; anything older is dropped as a miss.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None, False
+
+        expires_at, value = entry
+        now = time.monotonic()
+        if expires_at > now:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value, True
+        if now - expires_at <= self.max_stale:
+            self._entries.move_to_end(key)
+            self.stale_hits += 1
+            return value, False
+
+        if now - expires_at > self.max_stale + self.stale_if_error:
+            self._remove(key)
+            self.expirations += 1
+        self.misses += 1
+        return None, False
+
+    def fallback(self, key: Hashable) -> Optional[Any]:
+        """Return a retained value however stale, without touching recency or counters"""
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.max_stale + self.stale_if_error:
+            return None
+        return entry[1]
+
+    def ttl_remaining(self, key: Hashable) -> Optional[float]:
+        """Seconds until the entry expires (negative once stale), or None if absent"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return entry[0] - time.monotonic()
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        """Store a value for ttl seconds, evicting the least recently used entry if full"""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        self._entries[key] = (time.monotonic() + ttl, value)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Return a fresh value without touching recency or counters"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def delete(self, key: Hashable) -> None:
+        """Remove a key if present"""
+        if key in self._entries:
+            self._remove(key)
+
+    def _remove(self, key: Hashable) -> None:
+        del self._entries[key]
+        if self.on_remove is not None:
+            self.on_remove(key)
+
+    def clear(self) -> None:
+        """Remove every entry without resetting the counters"""
+        for key in list(self._entries):
+            self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters and current size"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
+
+
+def normalize_city_name(city_name: str) -> str:
+    """Normalize a city name so case and whitespace variants share a key"""
+    return " ".join(city_name.split()).casefold()
+
+
+def coordinate_key(location: GeoLocation) -> Tuple[float, float]:
+    """Round coordinates so near-identical lookups share a key"""
+    return (round(location.lat, COORDINATE_PRECISION), round(location.lon, COORDINATE_PRECISION))
+
+
+def ttls_from_env() -> Dict[str, float]:
+    """Return per-endpoint TTLs, overridden by WEATHER_CACHE_TTL_<ENDPOINT>"""
+    ttls = dict(DEFAULT_TTLS)
+    for endpoint in ttls:
+        value = os.getenv(f"WEATHER_CACHE_TTL_{endpoint.upper()}")
+        if value:
+            ttls[endpoint] = float(value)
+    return ttls
+
+
+class CachingWeatherProvider(DelegatingWeatherProvider):
+    """
+    WeatherProvider decorator that serves repeat lookups from a TTL + LRU cache.
+
+    When a tile grid is configured, coordinate lookups are quantized to the
+    enclosing tile and fetched at the tile center, so nearby coordinates share
+    one cache entry. With nearest_km set, a tile miss is answered from the
+    closest fresh cached tile within that distance before going upstream.
+
+    Entries up to max_staleness seconds past their TTL are served immediately
+    while a single background task revalidates them (stale-while-revalidate).
+    Entries up to stale_if_error seconds older still are served only if
+    fetching a replacement fails because the upstream is down, its circuit
+    is open or the quota is exhausted (stale-if-error).
+    Every lookup is recorded in a hot-set tracker that a BackgroundRefresher
+    can use to refresh popular locations ahead of expiry.
+
+    With a SharedCache, local misses and stale entries are first checked
+    against the cache shared by all worker processes, and every upstream
+    result is published to it.
+    """
+
+    def __init__(
+        self,
+        provider: WeatherProvider,
+        cache: Optional[TTLCache] = None,
+        ttls: Optional[Dict[str, float]] = None,
+        tile_size_deg: Optional[float] = None,
+        nearest_km: Optional[float] = None,
+        max_staleness: Optional[float] = None,
+        hot_set: Optional[HotSetTracker] = None,
+        shared: Optional["SharedCache"] = None,
+        stale_if_error: Optional[float] = None,
+    ):
+        super().__init__(provider)
+        if cache is None:
+            max_entries = int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+            cache = TTLCache(max_entries=max_entries)
+        self.cache = cache
+        self.cache.on_remove = self._forget
+        if max_staleness is None:
+            max_staleness = float(os.getenv("WEATHER_CACHE_MAX_STALENESS", DEFAULT_MAX_STALENESS))
+        if stale_if_error is None:
+            stale_if_error = float(os.getenv("WEATHER_CACHE_STALE_IF_ERROR", DEFAULT_STALE_IF_ERROR))
+        self.cache.max_stale = max_staleness
+        self.cache.stale_if_error = stale_if_error
+        self.ttls = ttls_from_env()
+        if ttls:
+            self.ttls.update(ttls)
+
+        if tile_size_deg is None:
+            tile_size_deg = float(os.getenv("WEATHER_TILE_SIZE_DEG", DEFAULT_TILE_SIZE_DEG))
+        if nearest_km is None:
+            nearest_km = float(os.getenv("WEATHER_NEAREST_KM", DEFAULT_NEAREST_KM))
+        self.grid = TileGrid(tile_size_deg) if tile_size_deg > 0 else None
+        self.nearest_km = nearest_km if self.grid is not None else 0.0
+        self.spatial_index = SpatialIndex()
+        self.nearest_hits = 0
+        self.shared_hits = 0
+        self.stale_if_error_hits = 0
+
+        self.hot_set = hot_set or HotSetTracker()
+        self.shared = shared
+        self._revalidating: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self.revalidations = 0
+
+    async def get_current_weather(self, location: GeoLocation) -> CurrentRecord:
+        """Get current weather, using the cache when fresh"""
+        return await self._lookup("current", location)
+
+    async def get_forecast(self, location: GeoLocation) -> ForecastRecord:
+        """Get weather forecast, using the cache when fresh"""
+        return await self._lookup("forecast", location)
+
+    async def geocode(self, city_name: str) -> GeoLocation:
+        """Geocode a city name, using the cache when fresh"""
+        key = ("geocode", normalize_city_name(city_name))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        cached = await self._from_shared(key)
+        if cached is not None:
+            return cached
+
+        result = await self.provider.geocode(city_name)
+        await self._store(key, result, self.ttls["geocode"])
+        return result
+
+    async def get_air_quality(self, location: GeoLocation) -> AirQualityRecord:
+        """Get air quality data, using the cache when fresh"""
+        result = await self._lookup("air_quality", location)
+
+        # The response echoes the requested city/country, which may differ from
+        # the lookup that populated the shared entry
+        city, country = location.city or "Unknown", location.country or "Unknown"
+        if (result.city, result.country) != (city, country):
+            result = dataclasses.replace(result, city=intern_name(city), country=intern_name(country))
+        return result
+
+    def location_key(self, endpoint: str, location: GeoLocation) -> Tuple[Hashable, GeoLocation]:
+        """Return the cache key for a lookup and the location to fetch upstream"""
+        if self.grid is None:
+            return (endpoint,) + coordinate_key(location), location
+
+        tile = self.grid.tile(location.lat, location.lon)
+        lat, lon = self.grid.center(tile)
+        upstream = GeoLocation(lat=lat, lon=lon, city=location.city, country=location.country)
+        return (endpoint,) + tile, upstream
+
+    async def refresh(self, key: Hashable, endpoint: str, location: GeoLocation) -> Any:
+        """Fetch an entry from the wrapped provider and store it, bypassing the cache"""
+        result = await getattr(self.provider, ENDPOINT_METHODS[endpoint])(location)
+        await self._store(key, result, self.ttls[endpoint], location)
+        return result
+
+    async def _lookup(self, endpoint: str, location: GeoLocation) -> Any:
+        key, upstream = self.location_key(endpoint, location)
+        self.hot_set.record(key, (endpoint, upstream))
+
+        cached, fresh = self.cache.lookup(key)
+        if cached is None or not fresh:
+            # Another worker may already have fetched (or refreshed) this entry
+            shared = await self._from_shared(key, upstream)
+            if shared is not None:
+                return shared
+        if cached is not None:
+            if not fresh:
+                self._revalidate(key, endpoint, upstream)
+            return cached
+
+        if self.nearest_km > 0:
+            cached = self._nearest(endpoint, location)
+            if cached is not None:
+                return cached
+
+        try:
+            return await self.refresh(key, endpoint, upstream)
+        except Exception as e:
+            unavailable = isinstance(e, (CircuitOpenError, RateLimitExceeded)) or is_upstream_failure(e)
+            fallback = self.cache.fallback(key) if unavailable else None
+            if fallback is None:
+                raise
+            self.stale_if_error_hits += 1
+            return fallback
+
+    async def _store(self, key: Hashable, value: Any, ttl: float, location: Optional[GeoLocation] = None) -> None:
+        """Cache a value locally and publish it to the shared cache"""
+        self._cache_locally(key, value, ttl, location)
+        if self.shared is not None:
+            # SQLite may wait on another worker's write lock, so keep it off the event loop
+            await asyncio.to_thread(self.shared.set, key, value, ttl)
+
+    def _cache_locally(self, key: Hashable, value: Any, ttl: float, location: Optional[GeoLocation]) -> None:
+        self.cache.set(key, value, ttl)
+        if location is not None and self.grid is not None:
+            self.spatial_index.add(key, location.lat, location.lon)
+
+    async def _from_shared(self, key: Hashable, location: Optional[GeoLocation] = None) -> Optional[Any]:
+        """Adopt a live entry from the shared cache into the local one, keeping its remaining TTL"""
+        if self.shared is None:
+            return None
+        entry = await asyncio.to_thread(self.shared.get, key)
+        if entry is None:
+            return None
+        value, ttl = entry
+        self._cache_locally(key, value, ttl, location)
+        self.shared_hits += 1
+        return value
+
+    def _revalidate(self, key: Hashable, endpoint: str, location: GeoLocation) -> None:
+        """Refresh a stale entry in the background unless a refresh is already running"""
+        if key in self._revalidating:
+            return
+        self.revalidations += 1
+        task = asyncio.ensure_future(self._background_refresh(key, endpoint, location))
+        self._revalidating[key] = task
+        task.add_done_callback(lambda t: self._revalidated(key, t))
+
+    async def _background_refresh(self, key: Hashable, endpoint: str, location: GeoLocation) -> Any:
+        with request_priority(Priority.BACKGROUND):
+            return await self.refresh(key, endpoint, location)
+
+    def _revalidated(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        self._revalidating.pop(key, None)
+        if not task.cancelled():
+            # A failed revalidation keeps serving the stale value until it ages out
+            task.exception()
+
+    def _nearest(self, endpoint: str, location: GeoLocation) -> Optional[Any]:
+        """Return the closest fresh cached result for the endpoint within nearest_km"""
+        match = self.spatial_index.nearest(
+            location.lat,
+            location.lon,
+            self.nearest_km,
+            accept=lambda key: key[0] == endpoint and key in self.cache,
+        )
+        if match is None:
+            return None
+        self.nearest_hits += 1
+        return self.cache.peek(match[0])
+
+    def _forget(self, key: Hashable) -> None:
+        self.spatial_index.remove(key)
+
+    async def close(self) -> None:
+        """Cancel pending revalidations and close the wrapped provider"""
+        for task in list(self._revalidating.values()):
+            task.cancel()
+        await super().close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache hit/miss/eviction counters"""
+        stats = self.cache.stats()
+        stats["nearest_hits"] = self.nearest_hits
+        stats["revalidations"] = self.revalidations
+        stats["shared_hits"] = self.shared_hits
+        stats["stale_if_error_hits"] = self.stale_if_error_hits
+        return stats
@@ -0,0 +1,224 @@
+import asyncio
+import math
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from backend.src.models.weather import GeoLocation
+from backend.src.models.records import CurrentRecord, ForecastRecord, AirQualityRecord
+from backend.src.services.weather_service import WeatherProvider
+
+# Weight of the newest sample in the latency and error-rate moving averages
+DEFAULT_EWMA_ALPHA = 0.2
+
+# A backend's error rate decays by half every this many seconds without calls,
+# so one that failed is tried again once it has been left alone for a while
+DEFAULT_ERROR_HALF_LIFE = 30.0
+
+# Each unit of error rate counts as this much extra latency when ranking
+DEFAULT_ERROR_PENALTY = 10.0
+
+# Latency assumed for a backend that has failed every call so far
+UNMEASURED_LATENCY = 1.0
+
+DEFAULT_RACE_METHODS = ("get_current_weather",)
+
+
+@dataclass
+class Backend:
+    """A provider behind CompositeWeatherProvider; fallback_only backends are tried last and never raced"""
+    name: str
+    provider: WeatherProvider
+    fallback_only: bool = False
+
+
+class BackendHealth:
+    """Moving averages of one backend's latency and error rate for one method"""
+
+    __slots__ = ("latency", "error_rate", "updated", "calls", "failures", "wins")
+
+    def __init__(self):
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.updated = time.monotonic()
+        self.calls = 0
+        self.failures = 0
+        self.wins = 0
+
+    def current_error_rate(self, half_life: float) -> float:
+        return self.error_rate * 0.5 ** ((time.monotonic() - self.updated) / half_life)
+
+    def record(self, latency: Optional[float], failed: bool, alpha: float, half_life: float) -> None:
+        self.calls += 1
+        self.failures += failed
+        self.error_rate = (1 - alpha) * self.current_error_rate(half_life) + alpha * failed
+        self.updated = time.monotonic()
+        if latency is not None:
+            self.latency = latency if self.latency is None else (1 - alpha) * self.latency + alpha * latency
+
+
+class CompositeWeatherProvider(WeatherProvider):
+    """
+    WeatherProvider that routes each call across several backends.
+
+    Backends are ranked per method by a moving average of their latency,
+    penalized by their (decaying) error rate; backends with no samples yet
+    rank first so every backend gets measured. Calls go to the best backend
+    and fall back down the ranking on failure. For race_methods the two best
+    backends are called at once and the first good answer wins.
+
+    A ValueError (e.g. an unknown city) is not held against a backend, since
+    backends may cover different places, but still falls back to the next.
+    """
+
+    def __init__(
+        self,
+        backends: Sequence[Backend],
+        race_methods: Optional[Iterable[str]] = None,
+        alpha: float = DEFAULT_EWMA_ALPHA,
+        error_half_life: float = DEFAULT_ERROR_HALF_LIFE,
+        error_penalty: float = DEFAULT_ERROR_PENALTY,
+    ):
+        if not backends:
+            raise ValueError("CompositeWeatherProvider needs at least one backend")
+        self.backends = list(backends)
+        if race_methods is None:
+            configured = os.getenv("WEATHER_PROVIDER_RACE_METHODS")
+            race_methods = configured.split(",") if configured is not None else DEFAULT_RACE_METHODS
+        self.race_methods = {method.strip() for method in race_methods if method.strip()}
+        self.alpha = alpha
+        self.error_half_life = error_half_life
+        self.error_penalty = error_penalty
+        self._health: Dict[Tuple[str, str], BackendHealth] = {}
+        self.fallbacks = 0
+        self.races = 0
+
+    def health(self, backend: Backend, method: str) -> BackendHealth:
+        key = (backend.name, method)
+        health = self._health.get(key)
+        if health is None:
+            health = self._health[key] = BackendHealth()
+        return health
+
+    def _score(self, backend: Backend, method: str) -> float:
+        health = self.health(backend, method)
+        if health.calls == 0:
+            return -math.inf
+        latency = health.latency if health.latency is not None else UNMEASURED_LATENCY
+        return latency * (1 + self.error_penalty * health.current_error_rate(self.error_half_life))
+
+    def ranked(self, method: str) -> List[Backend]:
+        """Backends in the order a call to method would try them"""
+        return sorted(self.backends, key=lambda b: (b.fallback_only, self._score(b, method)))
+
+    async def get_current_weather(self, location: GeoLocation) -> CurrentRecord:
+        """Get current weather from the best-ranked backend"""
+        return await self._route("get_current_weather", location)
+
+    async def get_forecast(self, location: GeoLocation) -> ForecastRecord:
+        """Get weather forecast from the best-ranked backend"""
+        return await self._route("get_forecast", location)
+
+    async def geocode(self, city_name: str) -> GeoLocation:
+        """Geocode a city name with the best-ranked backend"""
+        return await self._route("geocode", city_name)
+
+    async def get_air_quality(self, location: GeoLocation) -> AirQualityRecord:
+        """Get air quality data from the best-ranked backend"""
+        return await self._route("get_air_quality", location)
+
+    async def open(self) -> None:
+        """Open every backend"""
+        await asyncio.gather(*(backend.provider.open() for backend in self.backends))
+
+    async def close(self) -> None:
+        """Close every backend"""
+        await asyncio.gather(*(backend.provider.close() for backend in self.backends), return_exceptions=True)
+
+    async def _call(self, backend: Backend, method: str, argument: Any) -> Any:
+        """Call one backend, recording its latency and outcome"""
+        health = self.health(backend, method)
+        start = time.perf_counter()
+        try:
+            result = await getattr(backend.provider, method)(argument)
+        except asyncio.CancelledError:
+            raise
+        except ValueError:
+            health.record(time.perf_counter() - start, False, self.alpha, self.error_half_life)
+            raise
+        except Exception:
+            health.record(None, True, self.alpha, self.error_half_life)
+            raise
+        health.record(time.perf_counter() - start, False, self.alpha, self.error_half_life)
+        return result
+
+    async def _route(self, method: str, argument: Any) -> Any:
+        ranked = self.ranked(method)
+        errors: List[Exception] = []
+
+        primaries = [backend for backend in ranked if not backend.fallback_only]
+        if method in self.race_methods and len(primaries) >= 2:
+            contenders, ranked = primaries[:2], [b for b in ranked if b not in primaries[:2]]
+            try:
+                return await self._race(contenders, method, argument)
+            except _RaceLost as lost:
+                errors.extend(lost.errors)
+
+        for backend in ranked:
+            try:
+                result = await self._call(backend, method, argument)
+            except Exception as e:
+                errors.append(e)
+                continue
+            if errors:
+                self.fallbacks += 1
+            return result
+
+        # Prefer reporting an outage over "not found" from a backend with less coverage
+        raise next((e for e in errors if not isinstance(e, ValueError)), errors[0])
+
+    async def _race(self, contenders: List[Backend], method: str, argument: Any) -> Any:
+        """Call the contenders concurrently and return the first successful result"""
+        self.races += 1
+        tasks = {
+            asyncio.ensure_future(self._call(backend, method, argument)): backend for backend in contenders
+        }
+        pending = set(tasks)
+        errors: List[Exception] = []
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self.health(tasks[task], method).wins += 1
+                        return task.result()
+                    errors.append(task.exception())
+        finally:
+            for task in pending:
+                task.cancel()
+        raise _RaceLost(errors)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-backend, per-method latency, error rate and call counters"""
+        backends: Dict[str, Dict[str, Any]] = {}
+        for (name, method), health in sorted(self._health.items()):
+            backends.setdefault(name, {})[method] = {
+                "latency_ms": round(health.latency * 1000, 2) if health.latency is not None else None,
+                "error_rate": round(health.current_error_rate(self.error_half_life), 4),
+                "calls": health.calls,
+                "failures": health.failures,
+                "race_wins": health.wins,
+            }
+        return {
+            "backends": backends,
+            "race_methods": sorted(self.race_methods),
+            "races": self.races,
+            "fallbacks": self.fallbacks,
+        }
+
+
+class _RaceLost(Exception):
+    def __init__(self, errors: List[Exception]):
+        self.errors = errors
+        super().__init__("Every raced backend failed")
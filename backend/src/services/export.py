@@ -0,0 +1,227 @@
+import asyncio
+import csv
+import io
+import os
+import re
+import tempfile
+from typing import IO, Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import orjson
+from pydantic import ValidationError
+
+from backend.src.models.records import ForecastRecord, forecast_item_kwargs
+from backend.src.models.weather import BatchItem, BatchLocation
+
+DEFAULT_CITY_LIST_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "city_lists"
+)
+
+# Upper bounds on an uploaded list's size and on the locations in any list
+DEFAULT_MAX_UPLOAD_BYTES = 16 * 1024 * 1024
+DEFAULT_MAX_LOCATIONS = 100_000
+
+# Uploaded chunks are gathered to about this size before each write to disk
+SPOOL_WRITE_BYTES = 1024 * 1024
+
+# Media types accepted for location lists, and the file extensions that imply them
+LIST_FORMATS = {
+    "text/plain": ".txt",
+    "text/csv": ".csv",
+    "application/x-ndjson": ".ndjson",
+}
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+CSV_COLUMNS = [
+    "query_city", "query_lat", "query_lon", "city", "country", "date",
+    "temp_min", "temp_max", "temp_mean", "humidity", "conditions", "description",
+    "precipitation_chance", "wind_speed", "wind_speed_max", "error_status", "error",
+]
+
+_LIST_NAME = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+class LocationListError(ValueError):
+    """A location list that cannot be parsed; line is 1-based"""
+
+    def __init__(self, line: int, detail: str):
+        self.line = line
+        super().__init__(f"Line {line}: {detail}")
+
+
+class ListTooLarge(ValueError):
+    """A location list over the export size limits"""
+
+
+def list_format(media_type: str) -> str:
+    """Normalize a Content-Type header to one of LIST_FORMATS"""
+    media_type = media_type.split(";")[0].strip().lower()
+    if media_type not in LIST_FORMATS:
+        raise ValueError(f"Unsupported location list type {media_type!r}; use one of {', '.join(LIST_FORMATS)}")
+    return media_type
+
+
+def find_city_list(name: str, directory: Optional[str] = None) -> Optional[Tuple[str, str]]:
+    """Return (path, media type) of a named server-side city list, or None"""
+    if not _LIST_NAME.match(name):
+        return None
+    directory = directory or os.getenv("EXPORT_CITY_LIST_DIR", DEFAULT_CITY_LIST_DIR)
+    for media_type, extension in LIST_FORMATS.items():
+        path = os.path.join(directory, name + extension)
+        if os.path.isfile(path):
+            return path, media_type
+    return None
+
+
+def iter_locations(stream: IO[str], media_type: str) -> Iterator[BatchLocation]:
+    """
+    Parse a location list lazily, one location per line.
+    text/plain has one city name per line; text/csv has a header with a city
+    column and/or lat and lon columns; application/x-ndjson has one
+    BatchLocation object per line. Blank lines and lines starting with #
+    (outside CSV) are skipped. Raises LocationListError on the first bad line.
+    """
+    if media_type == "text/csv":
+        yield from _iter_csv(stream)
+        return
+
+    for number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if media_type == "text/plain":
+            yield _location(number, city=line)
+            continue
+        try:
+            fields = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            raise LocationListError(number, f"invalid JSON ({e})")
+        if not isinstance(fields, dict):
+            raise LocationListError(number, "expected a JSON object")
+        yield _location(number, **fields)
+
+
+def _iter_csv(stream: IO[str]) -> Iterator[BatchLocation]:
+    reader = csv.reader(stream)
+    header = [column.strip().lower() for column in next(reader, [])]
+    if "city" not in header and not {"lat", "lon"} <= set(header):
+        raise LocationListError(1, "CSV header needs a city column or lat and lon columns")
+    for row in reader:
+        if not any(value.strip() for value in row):
+            continue
+        fields = {name: value.strip() for name, value in zip(header, row) if value.strip()}
+        yield _location(reader.line_num, **{k: fields[k] for k in ("city", "lat", "lon") if k in fields})
+
+
+def _location(line: int, **fields: Any) -> BatchLocation:
+    try:
+        return BatchLocation(**fields)
+    except (ValidationError, TypeError) as e:
+        errors = e.errors() if isinstance(e, ValidationError) else None
+        raise LocationListError(line, errors[0]["msg"] if errors else str(e))
+
+
+def spool_text(stream: IO[bytes]) -> IO[str]:
+    """Wrap a binary upload file as text, rewound to the start"""
+    stream.seek(0)
+    return io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+
+async def spool_upload(chunks: AsyncIterator[bytes], max_bytes: Optional[int] = None) -> IO[str]:
+    """
+    Spool an uploaded list to a temporary file and return it as text.
+    Raises ListTooLarge as soon as the upload passes max_bytes
+    (EXPORT_MAX_UPLOAD_BYTES). Chunks are written in batches of about
+    SPOOL_WRITE_BYTES, and all file I/O runs in a worker thread.
+    """
+    max_bytes = max_bytes or int(os.getenv("EXPORT_MAX_UPLOAD_BYTES", DEFAULT_MAX_UPLOAD_BYTES))
+    # A plain TemporaryFile, since SpooledTemporaryFile cannot be wrapped as text before Python 3.11
+    upload = await asyncio.to_thread(tempfile.TemporaryFile)
+    size = 0
+    pending: List[bytes] = []
+    pending_size = 0
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                raise ListTooLarge(f"Location list is larger than {max_bytes} bytes")
+            pending.append(chunk)
+            pending_size += len(chunk)
+            if pending_size >= SPOOL_WRITE_BYTES:
+                await asyncio.to_thread(upload.writelines, pending)
+                pending, pending_size = [], 0
+        await asyncio.to_thread(upload.writelines, pending)
+        return await asyncio.to_thread(spool_text, upload)
+    except BaseException:
+        # Closing an unlinked temporary file does no disk I/O, and must happen even on cancellation
+        upload.close()
+        raise
+
+
+def count_locations(stream: IO[str], media_type: str, max_locations: Optional[int] = None) -> int:
+    """
+    Validate a whole location list and count its locations, then rewind it.
+    Blocking; run it in a thread. Raises LocationListError on a bad line and
+    ListTooLarge past max_locations (EXPORT_MAX_LOCATIONS).
+    """
+    max_locations = max_locations or int(os.getenv("EXPORT_MAX_LOCATIONS", DEFAULT_MAX_LOCATIONS))
+    count = 0
+    for _ in iter_locations(stream, media_type):
+        count += 1
+        if count > max_locations:
+            raise ListTooLarge(f"Location list has more than {max_locations} locations")
+    stream.seek(0)
+    return count
+
+
+def forecast_rows(item: BatchItem) -> List[Dict[str, Any]]:
+    """Flatten one batch item into export rows: one per forecast bucket, or one error row"""
+    query = {
+        "query_city": item.location.city,
+        "query_lat": item.location.lat,
+        "query_lon": item.location.lon,
+    }
+    if item.error is not None:
+        return [{**query, "error_status": item.error.status_code, "error": item.error.detail}]
+
+    record: ForecastRecord = item.result
+    rows = []
+    for bucket in forecast_item_kwargs(record):
+        condition = bucket["conditions"][0]
+        rows.append({
+            **query,
+            "city": record.city,
+            "country": record.country,
+            "date": bucket["date"].isoformat(),
+            "temp_min": bucket["temp_min"],
+            "temp_max": bucket["temp_max"],
+            "temp_mean": bucket["temp_mean"],
+            "humidity": bucket["humidity"],
+            "conditions": condition["main"],
+            "description": condition["description"],
+            "precipitation_chance": bucket["precipitation_chance"],
+            "wind_speed": bucket["wind_speed"],
+            "wind_speed_max": bucket["wind_speed_max"],
+        })
+    return rows
+
+
+def encode_ndjson(rows: List[Dict[str, Any]]) -> bytes:
+    """Encode rows as newline-delimited JSON"""
+    return b"".join(orjson.dumps(row) + b"\n" for row in rows)
+
+
+def csv_header() -> bytes:
+    """The CSV export's header line"""
+    return encode_csv_rows([dict(zip(CSV_COLUMNS, CSV_COLUMNS))])
+
+
+def encode_csv_rows(rows: List[Dict[str, Any]]) -> bytes:
+    """Encode rows as CSV lines in CSV_COLUMNS order"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, lineterminator="\n")
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
@@ -0,0 +1,219 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.src.models.records import (
+    ForecastRecord,
+    forecast_item_kwargs,
+    forecast_row_dtype,
+    intern_condition,
+    intern_name
+)
+
+
+# Supported aggregation buckets, in hours
+BUCKET_HOURS = {
+    "hourly": 1,
+    "3-hourly": 3,
+    "6-hourly": 6,
+    "daily": 24,
+}
+
+DEFAULT_PERCENTILES = (10, 50, 90)
+
+
+class ForecastColumns:
+    """
+    Struct-of-arrays view of one or more raw OpenWeatherMap forecast lists.
+    Condition (main, description, icon) triples are interned into a shared
+    table and referenced by integer code, and `series` records which input
+    forecast each slot came from so many forecasts aggregate in one pass.
+    """
+
+    __slots__ = (
+        "dt", "offset", "series", "temp", "temp_min", "temp_max",
+        "humidity", "wind_speed", "pop", "condition", "conditions",
+    )
+
+    def __init__(self, items: Sequence[Dict[str, Any]], utc_offset: int = 0, series: int = 0):
+        self.conditions: List[Tuple[str, str, str]] = []
+        self._fill([(items, utc_offset)], first_series=series)
+
+    @classmethod
+    def concat(cls, forecasts: Sequence[Tuple[Sequence[Dict[str, Any]], int]]) -> "ForecastColumns":
+        """Build columns from many (items, utc_offset) pairs, one series per pair"""
+        columns = cls.__new__(cls)
+        columns.conditions = []
+        columns._fill(forecasts, first_series=0)
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.dt)
+
+    def _fill(self, forecasts: Sequence[Tuple[Sequence[Dict[str, Any]], int]], first_series: int) -> None:
+        total = sum(len(items) for items, _ in forecasts)
+        self.dt = np.empty(total, dtype=np.int64)
+        self.offset = np.empty(total, dtype=np.int64)
+        self.series = np.empty(total, dtype=np.int64)
+        self.temp = np.empty(total, dtype=np.float64)
+        self.temp_min = np.empty(total, dtype=np.float64)
+        self.temp_max = np.empty(total, dtype=np.float64)
+        self.humidity = np.empty(total, dtype=np.float64)
+        self.wind_speed = np.empty(total, dtype=np.float64)
+        self.pop = np.empty(total, dtype=np.float64)
+        self.condition = np.empty(total, dtype=np.int64)
+
+        codes: Dict[Tuple[str, str, str], int] = {}
+        i = 0
+        for series, (items, utc_offset) in enumerate(forecasts, start=first_series):
+            for item in items:
+                main = item["main"]
+                weather = item["weather"][0] if item.get("weather") else {}
+                condition = (
+                    weather.get("main", "Unknown"),
+                    weather.get("description", ""),
+                    weather.get("icon", ""),
+                )
+                code = codes.get(condition)
+                if code is None:
+                    code = codes[condition] = len(self.conditions)
+                    self.conditions.append(condition)
+
+                self.dt[i] = item["dt"]
+                self.offset[i] = utc_offset
+                self.series[i] = series
+                self.temp[i] = main.get("temp", (main["temp_min"] + main["temp_max"]) / 2)
+                self.temp_min[i] = main["temp_min"]
+                self.temp_max[i] = main["temp_max"]
+                self.humidity[i] = main["humidity"]
+                self.wind_speed[i] = item["wind"]["speed"]
+                self.pop[i] = item.get("pop", 0)
+                self.condition[i] = code
+                i += 1
+
+
+def aggregate_forecast(
+    columns: ForecastColumns,
+    bucket_hours: int = 24,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+) -> Dict[str, np.ndarray]:
+    """
+    Aggregate forecast slots into per-bucket summaries in one vectorized pass.
+
+    Bucket boundaries are aligned to each slot's local time (UTC + offset), so
+    a daily bucket is a calendar day in the forecast city. Returns a dict of
+    equal-length arrays, one row per (series, bucket), ordered by series and
+    then time.
+    """
+    if len(columns) == 0:
+        return {name: np.empty(0) for name in _OUTPUT_COLUMNS}
+
+    bucket_seconds = bucket_hours * 3600
+    local = columns.dt + columns.offset
+    bucket = np.floor_divide(local, bucket_seconds)
+
+    order = np.lexsort((columns.dt, bucket, columns.series))
+    series = columns.series[order]
+    bucket = bucket[order]
+
+    boundary = np.empty(len(order), dtype=bool)
+    boundary[0] = True
+    boundary[1:] = (series[1:] != series[:-1]) | (bucket[1:] != bucket[:-1])
+    starts = np.flatnonzero(boundary)
+    counts = np.diff(np.append(starts, len(order)))
+    group = np.cumsum(boundary) - 1
+    n_groups = len(starts)
+
+    def reduce(values: np.ndarray, ufunc: np.ufunc) -> np.ndarray:
+        return ufunc.reduceat(values[order], starts)
+
+    temp = columns.temp[order]
+    result = {
+        "series": series[starts],
+        "start": bucket[starts] * bucket_seconds - columns.offset[order][starts],
+        "first_dt": columns.dt[order][starts],
+        "utc_offset": columns.offset[order][starts],
+        "slots": counts,
+        "temp_min": reduce(columns.temp_min, np.minimum),
+        "temp_max": reduce(columns.temp_max, np.maximum),
+        "temp_mean": np.add.reduceat(temp, starts) / counts,
+        "humidity_mean": reduce(columns.humidity, np.add) / counts,
+        "wind_speed_mean": reduce(columns.wind_speed, np.add) / counts,
+        "wind_speed_max": reduce(columns.wind_speed, np.maximum),
+        "pop_max": reduce(columns.pop, np.maximum),
+    }
+
+    # Percentiles: sort temperatures within each group, then interpolate
+    # between the two ranks around p * (n - 1) for every group at once
+    sorted_temp = temp[np.lexsort((temp, group))]
+    for p in percentiles:
+        rank = (p / 100.0) * (counts - 1)
+        lower = np.floor(rank).astype(np.int64)
+        upper = np.minimum(lower + 1, counts - 1)
+        weight = rank - lower
+        low_values = sorted_temp[starts + lower]
+        high_values = sorted_temp[starts + upper]
+        result[f"temp_p{_format_percentile(p)}"] = low_values + (high_values - low_values) * weight
+
+    # Dominant condition: most frequent code per group, earliest-seen code on ties
+    n_codes = max(len(columns.conditions), 1)
+    tallies = np.bincount(group * n_codes + columns.condition[order], minlength=n_groups * n_codes)
+    result["dominant_condition"] = tallies.reshape(n_groups, n_codes).argmax(axis=1)
+
+    return result
+
+
+def pack_forecast(
+    columns: ForecastColumns,
+    aggregated: Dict[str, np.ndarray],
+    city: str = "",
+    country: str = "",
+    series: Optional[int] = None,
+) -> ForecastRecord:
+    """Pack aggregated rows (optionally for one series) into a compact ForecastRecord"""
+    selected = np.arange(len(aggregated["series"]))
+    if series is not None:
+        selected = np.flatnonzero(aggregated["series"] == series)
+
+    percentile_keys = [key for key in aggregated if key.startswith("temp_p")]
+    rows = np.empty(len(selected), dtype=forecast_row_dtype(len(percentile_keys)))
+    rows["dt"] = aggregated["first_dt"][selected]
+    rows["utc_offset"] = aggregated["utc_offset"][selected]
+    rows["condition"] = aggregated["dominant_condition"][selected]
+    rows["humidity"] = np.rint(aggregated["humidity_mean"][selected])
+    rows["temp_min"] = aggregated["temp_min"][selected]
+    rows["temp_max"] = aggregated["temp_max"][selected]
+    rows["temp_mean"] = np.round(aggregated["temp_mean"][selected], 2)
+    rows["precipitation_chance"] = aggregated["pop_max"][selected] * 100  # Convert to percentage
+    rows["wind_speed"] = np.round(aggregated["wind_speed_mean"][selected], 2)
+    rows["wind_speed_max"] = aggregated["wind_speed_max"][selected]
+    for i, key in enumerate(percentile_keys):
+        rows["temp_percentiles"][:, i] = np.round(aggregated[key][selected], 2)
+
+    return ForecastRecord(
+        city=intern_name(city),
+        country=intern_name(country),
+        rows=rows,
+        conditions=tuple(intern_condition(*condition) for condition in columns.conditions),
+        percentile_names=tuple(key[len("temp_"):] for key in percentile_keys)
+    )
+
+
+def to_forecast_items(
+    columns: ForecastColumns,
+    aggregated: Dict[str, np.ndarray],
+    series: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Convert aggregated rows into ForecastItem keyword dicts, optionally for one series"""
+    return forecast_item_kwargs(pack_forecast(columns, aggregated, series=series))
+
+
+def _format_percentile(p: float) -> str:
+    return str(int(p)) if float(p).is_integer() else str(p).replace(".", "_")
+
+
+_OUTPUT_COLUMNS = (
+    "series", "start", "first_dt", "utc_offset", "slots", "temp_min", "temp_max",
+    "temp_mean", "humidity_mean", "wind_speed_mean", "wind_speed_max", "pop_max",
+    "dominant_condition",
+)
@@ -0,0 +1,117 @@
+import csv
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+from backend.src.models.weather import GeoLocation
+from backend.src.services.cache import normalize_city_name
+
+
+GeocodeEntry = Union[Tuple[str, GeoLocation], Dict[str, Any]]
+
+
+class GeocodeIndex:
+    """
+    Persistent index of normalized city name -> GeoLocation backed by SQLite.
+    Lookups are primary-key reads on a WITHOUT ROWID table, so they stay in
+    the microsecond range and survive process restarts.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        if path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS geocode (
+                name TEXT PRIMARY KEY,
+                lat REAL NOT NULL,
+                lon REAL NOT NULL,
+                city TEXT,
+                country TEXT
+            ) WITHOUT ROWID
+            """
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM geocode").fetchone()[0]
+
+    def get(self, city_name: str) -> Optional[GeoLocation]:
+        """Look up a city name, ignoring case and whitespace differences"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT lat, lon, city, country FROM geocode WHERE name = ?",
+                (normalize_city_name(city_name),),
+            ).fetchone()
+        if row is None:
+            return None
+        return GeoLocation(lat=row[0], lon=row[1], city=row[2], country=row[3])
+
+    def put(self, city_name: str, location: GeoLocation) -> None:
+        """
+        Store a location under the queried name only. Entries never expire,
+        so a qualified query such as "London, CA" must not take over the
+        bare name its result is called by.
+        """
+        self._write([(city_name, location)])
+
+    def seed(self, entries: Iterable[GeocodeEntry]) -> int:
+        """
+        Bulk-load entries in a single transaction.
+        Each entry is either a (name, GeoLocation) pair or a dict with
+        name/city, lat, lon and optional country keys.
+        Returns the number of rows written.
+        """
+        return self._write(self._parse_entry(entry) for entry in entries)
+
+    def seed_from_file(self, path: str) -> int:
+        """Bulk-load a CSV (with a header row) or JSON list of city records"""
+        with open(path, newline="", encoding="utf-8") as f:
+            if path.endswith(".json"):
+                return self.seed(json.load(f))
+            return self.seed(csv.DictReader(f))
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection"""
+        self._conn.close()
+
+    def _write(self, rows: Iterable[Tuple[str, GeoLocation]]) -> int:
+        params = [
+            (normalize_city_name(name), loc.lat, loc.lon, loc.city, loc.country)
+            for name, loc in rows
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO geocode (name, lat, lon, city, country) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    params,
+                )
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return len(params)
+
+    @staticmethod
+    def _parse_entry(entry: GeocodeEntry) -> Tuple[str, GeoLocation]:
+        if isinstance(entry, tuple):
+            return entry
+        name = entry.get("name") or entry["city"]
+        location = GeoLocation(
+            lat=float(entry["lat"]),
+            lon=float(entry["lon"]),
+            city=entry.get("city") or name,
+            country=entry.get("country") or None,
+        )
+        return name, location
@@ -0,0 +1,203 @@
+import asyncio
+import math
+import os
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from backend.src.models.weather import BatchLocation
+from backend.src.services.aqi import index_map
+from backend.src.services.weather_service import WeatherService
+
+# Current-weather fields that can be gridded, read straight off the record
+CURRENT_FIELDS = ("temperature", "feels_like", "humidity", "pressure", "wind_speed")
+
+# Air quality fields and the index scale each one maps pollutants to
+AIR_QUALITY_FIELDS = {"aqi": "us_epa", "caqi": "eu_caqi"}
+
+GRID_FIELDS = CURRENT_FIELDS + tuple(AIR_QUALITY_FIELDS)
+
+# Sample spacings, in degrees. Samples sit on multiples of the spacing rather
+# than relative to the requested box, so panning a map reuses cached samples
+SAMPLE_STEPS_DEG = (0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0, 15.0, 30.0, 45.0)
+
+DEFAULT_MAX_SAMPLES = 64
+DEFAULT_GRID_SIZE = 64
+MAX_GRID_SIZE = 256
+DEFAULT_IDW_POWER = 2.0
+
+# Interpolation works on blocks of at most this many (cell, sample) pairs
+IDW_BLOCK_PAIRS = 1 << 20
+
+# Quantized value marking cells with no data
+NODATA = 0xFFFF
+
+
+class Bounds(NamedTuple):
+    """Bounding box in degrees"""
+    min_lat: float
+    min_lon: float
+    max_lat: float
+    max_lon: float
+
+
+class WeatherGrid(NamedTuple):
+    """Interpolated field over a box; values run north to south, west to east"""
+    values: np.ndarray
+    step: float
+    samples: int
+    sampled: int
+
+
+class GridUnavailable(Exception):
+    """No sample of a grid could be fetched"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def sample_points(bounds: Bounds, max_samples: int) -> Tuple[np.ndarray, np.ndarray, float]:
+    """
+    Latitudes and longitudes of the samples for a box, with their spacing:
+    the finest standard spacing whose lattice covering the box, one step
+    beyond each edge, has at most max_samples points (or the coarsest one).
+    """
+    for step in SAMPLE_STEPS_DEG:
+        lats = _lattice(bounds.min_lat, bounds.max_lat, step, 90.0)
+        lons = _lattice(bounds.min_lon, bounds.max_lon, step, 180.0)
+        if len(lats) * len(lons) <= max_samples:
+            break
+    grid_lats, grid_lons = np.meshgrid(lats, lons, indexing="ij")
+    return grid_lats.ravel(), grid_lons.ravel(), step
+
+
+def _lattice(low: float, high: float, step: float, limit: float) -> np.ndarray:
+    start = max(math.floor(low / step + 1e-9) * step, -limit)
+    end = min(math.ceil(high / step - 1e-9) * step, limit)
+    count = int(round((end - start) / step)) + 1
+    return np.round(start + np.arange(count) * step, 6)
+
+
+def cell_centers(bounds: Bounds, rows: int, cols: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Cell-center latitudes (north to south) and longitudes (west to east) of a grid"""
+    lat_step = (bounds.max_lat - bounds.min_lat) / rows
+    lon_step = (bounds.max_lon - bounds.min_lon) / cols
+    lats = bounds.max_lat - (np.arange(rows) + 0.5) * lat_step
+    lons = bounds.min_lon + (np.arange(cols) + 0.5) * lon_step
+    return lats, lons
+
+
+def idw(
+    sample_lats: np.ndarray,
+    sample_lons: np.ndarray,
+    values: np.ndarray,
+    lats: np.ndarray,
+    lons: np.ndarray,
+    power: float = DEFAULT_IDW_POWER,
+) -> np.ndarray:
+    """
+    Inverse-distance-weighted interpolation of sample values onto the grid
+    of lats x lons. values has one row per sample and optionally a trailing
+    axis of several quantities; NaN values are left out of their quantity's
+    weighting. Distances are equirectangular, which is accurate at the scale
+    of a map view. Cells with no valid sample are NaN.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    columns = values.reshape(len(values), -1)
+    valid = ~np.isnan(columns)
+    filled = np.where(valid, columns, 0.0)
+
+    cell_lats, cell_lons = (axis.ravel() for axis in np.meshgrid(lats, lons, indexing="ij"))
+    result = np.empty((len(cell_lats), columns.shape[1]))
+    block = max(1, IDW_BLOCK_PAIRS // max(1, len(sample_lats)))
+    for start in range(0, len(cell_lats), block):
+        block_lats = cell_lats[start:start + block, None]
+        block_lons = cell_lons[start:start + block, None]
+        dy = block_lats - sample_lats
+        dx = (block_lons - sample_lons) * np.cos(np.radians((block_lats + sample_lats) / 2))
+        # A sample at a cell center gets a weight large enough to stand for the exact value
+        weights = np.maximum(dx * dx + dy * dy, 1e-12) ** (-power / 2)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result[start:start + block] = (weights @ filled) / (weights @ valid)
+    return result.reshape((len(lats), len(lons)) + values.shape[1:])
+
+
+def quantize(values: np.ndarray) -> Tuple[np.ndarray, float, float]:
+    """
+    Quantize values to uint16 codes with value = offset + code * scale;
+    NaN becomes NODATA. Returns (codes, offset, scale).
+    """
+    known = values[~np.isnan(values)]
+    if not len(known):
+        return np.full(values.shape, NODATA, dtype="<u2"), 0.0, 1.0
+    offset, high = float(known.min()), float(known.max())
+    scale = (high - offset) / (NODATA - 1) if high > offset else 1.0
+    with np.errstate(invalid="ignore"):
+        codes = np.rint((values - offset) / scale)
+    return np.where(np.isnan(values), NODATA, codes).astype("<u2"), offset, scale
+
+
+def interpolate_field(
+    field: str,
+    sample_lats: np.ndarray,
+    sample_lons: np.ndarray,
+    samples: np.ndarray,
+    bounds: Bounds,
+    rows: int,
+    cols: int,
+) -> np.ndarray:
+    """
+    Interpolate one field's samples onto a rows x cols grid over the box.
+    Air quality samples are rows of pollutant concentrations, interpolated
+    and then mapped to the field's index per cell. CPU-bound; run it in a thread.
+    """
+    lats, lons = cell_centers(bounds, rows, cols)
+    values = idw(sample_lats, sample_lons, samples, lats, lons)
+    if field in AIR_QUALITY_FIELDS:
+        values, _ = index_map(values, AIR_QUALITY_FIELDS[field])
+    return values
+
+
+async def sample_grid(
+    weather_service: WeatherService,
+    bounds: Bounds,
+    rows: int,
+    cols: int,
+    field: str,
+    max_samples: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+) -> WeatherGrid:
+    """
+    Fetch a field at a bounded lattice of sample points and interpolate it
+    onto a rows x cols grid over the box. Samples are fetched as a batch,
+    so they share the service's concurrency limit and response cache.
+    Air quality fields interpolate pollutant concentrations and compute the
+    index per cell. Raises GridUnavailable when no sample can be fetched.
+    """
+    if field not in GRID_FIELDS:
+        raise ValueError(f"Unknown grid field: {field}")
+    max_samples = max_samples or int(os.getenv("GRID_MAX_SAMPLES", DEFAULT_MAX_SAMPLES))
+    sample_lats, sample_lons, step = sample_points(bounds, max_samples)
+    locations = [BatchLocation(lat=lat, lon=lon) for lat, lon in zip(sample_lats.tolist(), sample_lons.tolist())]
+
+    if field in AIR_QUALITY_FIELDS:
+        items = await weather_service.get_air_quality_batch(locations, max_concurrency)
+    else:
+        items = await weather_service.get_current_weather_batch(locations, max_concurrency)
+    fetched = np.array([item.result is not None for item in items], dtype=bool)
+    if not fetched.any():
+        error = items[0].error
+        raise GridUnavailable(error.status_code, error.detail)
+    records = [item.result for item in items if item.result is not None]
+
+    if field in AIR_QUALITY_FIELDS:
+        samples = np.array([record.pollutants for record in records], dtype=np.float64)
+    else:
+        samples = np.array([getattr(record, field) for record in records], dtype=np.float64)
+    # Interpolation is millions of distance/weight pairs at the largest grids, so keep it off the event loop
+    values = await asyncio.to_thread(
+        interpolate_field, field, sample_lats[fetched], sample_lons[fetched], samples, bounds, rows, cols
+    )
+    return WeatherGrid(values=values, step=step, samples=len(items), sampled=len(records))
@@ -0,0 +1,377 @@
+import asyncio
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from backend.src.models.weather import GeoLocation
+from backend.src.models.records import POLLUTANTS, AirQualityRecord, CurrentRecord
+from backend.src.services.spatial import TileGrid
+from backend.src.services.weather_service import DelegatingWeatherProvider, WeatherProvider
+
+# Observations are keyed by grid cell; the default matches the cache's coordinate tiles
+DEFAULT_CELL_SIZE_DEG = 0.01
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+# Observations waiting to be written beyond this are dropped, oldest first
+DEFAULT_MAX_PENDING = 50_000
+
+DEFAULT_RETENTION_DAYS = 30
+
+# Downsampling steps offered when a query does not ask for one, in seconds
+DOWNSAMPLE_STEPS = (60, 300, 900, 1800, 3600, 3 * 3600, 6 * 3600, 12 * 3600, 86400)
+
+DEFAULT_MAX_POINTS = 500
+
+CURRENT_COLUMNS = (
+    "temperature", "feels_like", "humidity", "pressure", "wind_speed", "wind_direction",
+)
+
+# Aggregates returned per downsampled bucket, as (output name, SQL expression)
+CURRENT_AGGREGATES = (
+    ("temperature", "AVG(temperature)"),
+    ("temperature_min", "MIN(temperature)"),
+    ("temperature_max", "MAX(temperature)"),
+    ("feels_like", "AVG(feels_like)"),
+    ("humidity", "AVG(humidity)"),
+    ("pressure", "AVG(pressure)"),
+    ("wind_speed", "AVG(wind_speed)"),
+    ("wind_speed_max", "MAX(wind_speed)"),
+)
+
+AIR_QUALITY_AGGREGATES = (
+    ("aqi", "AVG(aqi)"),
+    ("aqi_max", "MAX(aqi)"),
+) + tuple((name, f"AVG({name})") for name in POLLUTANTS)
+
+HistoryRow = Tuple[Any, ...]
+
+
+def downsample_step(span: float, max_points: int = DEFAULT_MAX_POINTS) -> int:
+    """Smallest standard step that covers span seconds in at most max_points buckets"""
+    for step in DOWNSAMPLE_STEPS:
+        if span / step <= max_points:
+            return step
+    return int(math.ceil(span / max_points / 86400)) * 86400
+
+
+class ObservationStore:
+    """
+    Append-only SQLite store of current-weather and air quality observations.
+
+    Rows are keyed by (grid cell, observation time) in WITHOUT ROWID tables,
+    so each location's observations are stored contiguously in time order
+    and a time-range query is a single index range scan. Re-fetching an
+    observation that is already stored (same cell and upstream timestamp)
+    is a no-op.
+    """
+
+    def __init__(self, path: str = ":memory:", cell_size: Optional[float] = None):
+        if path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.grid = TileGrid(cell_size or float(os.getenv("HISTORY_CELL_SIZE_DEG", DEFAULT_CELL_SIZE_DEG)))
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS current_observations (
+                cell_lat INTEGER NOT NULL,
+                cell_lon INTEGER NOT NULL,
+                dt INTEGER NOT NULL,
+                city TEXT,
+                country TEXT,
+                {", ".join(f"{name} REAL" for name in CURRENT_COLUMNS)},
+                conditions TEXT,
+                PRIMARY KEY (cell_lat, cell_lon, dt)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS air_quality_observations (
+                cell_lat INTEGER NOT NULL,
+                cell_lon INTEGER NOT NULL,
+                dt INTEGER NOT NULL,
+                aqi INTEGER,
+                {", ".join(f"{name} REAL" for name in POLLUTANTS)},
+                PRIMARY KEY (cell_lat, cell_lon, dt)
+            ) WITHOUT ROWID
+            """
+        )
+
+    def cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        """Grid cell holding a coordinate"""
+        return self.grid.tile(lat, lon)
+
+    def current_row(self, location: GeoLocation, record: CurrentRecord) -> HistoryRow:
+        """Row for a current-weather observation"""
+        return self.cell(location.lat, location.lon) + (
+            record.dt,
+            record.city,
+            record.country,
+            record.temperature,
+            record.feels_like,
+            record.humidity,
+            record.pressure,
+            record.wind_speed,
+            record.wind_direction,
+            record.conditions[0].main if record.conditions else None,
+        )
+
+    def air_quality_row(self, location: GeoLocation, record: AirQualityRecord) -> HistoryRow:
+        """Row for an air quality observation; missing pollutants are stored as NULL"""
+        pollutants = tuple(None if math.isnan(value) else value for value in record.pollutants)
+        return self.cell(location.lat, location.lon) + (record.dt, record.aqi) + pollutants
+
+    def write(self, current: Sequence[HistoryRow], air_quality: Sequence[HistoryRow]) -> int:
+        """Append rows in a single transaction; returns the number of rows offered"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO current_observations "
+                    f"VALUES ({', '.join('?' * (6 + len(CURRENT_COLUMNS)))})",
+                    current,
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO air_quality_observations "
+                    f"VALUES ({', '.join('?' * (4 + len(POLLUTANTS)))})",
+                    air_quality,
+                )
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return len(current) + len(air_quality)
+
+    def query_current(self, lat: float, lon: float, start: int, end: int, step: int) -> List[Dict[str, Any]]:
+        """Current-weather observations from start to end inclusive, in epoch-aligned step-second buckets"""
+        return self._query("current_observations", CURRENT_AGGREGATES, lat, lon, start, end, step)
+
+    def query_air_quality(self, lat: float, lon: float, start: int, end: int, step: int) -> List[Dict[str, Any]]:
+        """Air quality observations from start to end inclusive, in epoch-aligned step-second buckets"""
+        return self._query("air_quality_observations", AIR_QUALITY_AGGREGATES, lat, lon, start, end, step)
+
+    def air_quality_rows(self, lat: float, lon: float, start: int, end: int) -> List[HistoryRow]:
+        """Raw (dt, *pollutants) air quality rows for a location between start and end, oldest first"""
+        cell_lat, cell_lon = self.cell(lat, lon)
+        sql = (
+            f"SELECT dt, {', '.join(POLLUTANTS)} FROM air_quality_observations "
+            "WHERE cell_lat = ? AND cell_lon = ? AND dt BETWEEN ? AND ? ORDER BY dt"
+        )
+        with self._lock:
+            return self._conn.execute(sql, (cell_lat, cell_lon, start, end)).fetchall()
+
+    def latest_place(self, lat: float, lon: float) -> Tuple[Optional[str], Optional[str]]:
+        """City and country of the most recent current-weather observation in a cell"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT city, country FROM current_observations "
+                "WHERE cell_lat = ? AND cell_lon = ? ORDER BY dt DESC LIMIT 1",
+                self.cell(lat, lon),
+            ).fetchone()
+        return (row[0], row[1]) if row else (None, None)
+
+    def prune(self, before: int) -> int:
+        """Delete observations older than a Unix timestamp; returns the number deleted"""
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM current_observations WHERE dt < ?", (before,)).rowcount
+            deleted += self._conn.execute("DELETE FROM air_quality_observations WHERE dt < ?", (before,)).rowcount
+        return deleted
+
+    def count(self) -> Dict[str, int]:
+        """Number of stored observations per table"""
+        with self._lock:
+            return {
+                table: self._conn.execute(f"SELECT COUNT(*) FROM {table}_observations").fetchone()[0]
+                for table in ("current", "air_quality")
+            }
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection"""
+        self._conn.close()
+
+    def _query(
+        self,
+        table: str,
+        aggregates: Sequence[Tuple[str, str]],
+        lat: float,
+        lon: float,
+        start: int,
+        end: int,
+        step: int,
+    ) -> List[Dict[str, Any]]:
+        columns = ", ".join(expression for _, expression in aggregates)
+        sql = (
+            f"SELECT dt / :step * :step AS bucket, COUNT(*), {columns} FROM {table} "
+            "WHERE cell_lat = :cell_lat AND cell_lon = :cell_lon AND dt BETWEEN :start AND :end "
+            "GROUP BY bucket ORDER BY bucket"
+        )
+        cell_lat, cell_lon = self.cell(lat, lon)
+        params = {"cell_lat": cell_lat, "cell_lon": cell_lon, "start": start, "end": end, "step": step}
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        names = [name for name, _ in aggregates]
+        return [
+            {"timestamp": bucket, "samples": samples, **dict(zip(names, values))}
+            for bucket, samples, *values in rows
+        ]
+
+
+class ObservationRecorder:
+    """
+    Buffers observations in memory and writes them to an ObservationStore in
+    batches from a background task, so recording never waits on disk.
+
+    A flush runs every flush_interval seconds, or as soon as batch_size
+    observations are waiting; the SQLite write itself runs on a worker
+    thread. At most max_pending observations are buffered; beyond that the
+    oldest are dropped and counted. Observations older than retention_days
+    are pruned about once an hour.
+    """
+
+    def __init__(
+        self,
+        store: ObservationStore,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_pending: Optional[int] = None,
+        retention_days: Optional[float] = None,
+    ):
+        self.store = store
+        self.batch_size = batch_size or int(os.getenv("HISTORY_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+        self.flush_interval = flush_interval or float(os.getenv("HISTORY_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL))
+        max_pending = max_pending or int(os.getenv("HISTORY_MAX_PENDING", DEFAULT_MAX_PENDING))
+        self.retention_days = retention_days if retention_days is not None else float(
+            os.getenv("HISTORY_RETENTION_DAYS", DEFAULT_RETENTION_DAYS)
+        )
+
+        self._current: Deque[HistoryRow] = deque(maxlen=max_pending)
+        self._air_quality: Deque[HistoryRow] = deque(maxlen=max_pending)
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._last_prune = 0.0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.failures = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def pending(self) -> int:
+        return len(self._current) + len(self._air_quality)
+
+    def record_current(self, location: GeoLocation, record: CurrentRecord) -> None:
+        """Queue a current-weather observation for writing"""
+        self._append(self._current, self.store.current_row(location, record))
+
+    def record_air_quality(self, location: GeoLocation, record: AirQualityRecord) -> None:
+        """Queue an air quality observation for writing"""
+        self._append(self._air_quality, self.store.air_quality_row(location, record))
+
+    def _append(self, buffer: Deque[HistoryRow], row: HistoryRow) -> None:
+        if len(buffer) == buffer.maxlen:
+            self.dropped += 1
+        buffer.append(row)
+        if self.pending >= self.batch_size:
+            self._wake.set()
+
+    def start(self) -> None:
+        """Start the flush loop on the running event loop"""
+        if not self.running:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def flush(self) -> int:
+        """Write every buffered observation now; returns the number written"""
+        async with self._flush_lock:
+            current, air_quality = list(self._current), list(self._air_quality)
+            self._current.clear()
+            self._air_quality.clear()
+            if not current and not air_quality:
+                return 0
+            try:
+                written = await asyncio.to_thread(self.store.write, current, air_quality)
+            except Exception:
+                self.failures += 1
+                raise
+            self.flushes += 1
+            self.written += written
+            return written
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+                await self._prune()
+            except Exception:
+                # Keep recording; the failure is counted and the batch is lost
+                pass
+
+    async def _prune(self) -> None:
+        now = time.time()
+        if self.retention_days <= 0 or now - self._last_prune < 3600:
+            return
+        self._last_prune = now
+        await asyncio.to_thread(self.store.prune, int(now - self.retention_days * 86400))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return buffering and write counters"""
+        return {
+            "running": self.running,
+            "pending": self.pending,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "failures": self.failures,
+        }
+
+
+class RecordingWeatherProvider(DelegatingWeatherProvider):
+    """WeatherProvider that records every current-weather and air quality result it passes on"""
+
+    def __init__(self, provider: WeatherProvider, recorder: ObservationRecorder):
+        super().__init__(provider)
+        self.recorder = recorder
+
+    async def get_current_weather(self, location: GeoLocation) -> CurrentRecord:
+        """Get current weather and queue it for the history store"""
+        record = await self.provider.get_current_weather(location)
+        self.recorder.record_current(location, record)
+        return record
+
+    async def get_air_quality(self, location: GeoLocation) -> AirQualityRecord:
+        """Get air quality data and queue it for the history store"""
+        record = await self.provider.get_air_quality(location)
+        self.recorder.record_air_quality(location, record)
+        return record
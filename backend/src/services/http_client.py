@@ -0,0 +1,68 @@
+import os
+from typing import Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - depends on installed extras
+    HTTP2_AVAILABLE = False
+
+
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_CONNECT_TIMEOUT = 5.0
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def create_async_client(
+    max_connections: Optional[int] = None,
+    max_keepalive_connections: Optional[int] = None,
+    keepalive_expiry: Optional[float] = None,
+    timeout: Optional[float] = None,
+    connect_timeout: Optional[float] = None,
+    http2: Optional[bool] = None,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> httpx.AsyncClient:
+    """
+    Create a long-lived async HTTP client with keep-alive connection pooling.
+    Unset arguments are read from the environment (UPSTREAM_* variables)
+    and fall back to the module defaults. HTTP/2 is used when the `h2`
+    package is installed unless explicitly disabled.
+    """
+    limits = httpx.Limits(
+        max_connections=max_connections
+        or _env_int("UPSTREAM_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS),
+        max_keepalive_connections=max_keepalive_connections
+        or _env_int("UPSTREAM_MAX_KEEPALIVE_CONNECTIONS", DEFAULT_MAX_KEEPALIVE_CONNECTIONS),
+        keepalive_expiry=keepalive_expiry
+        or _env_float("UPSTREAM_KEEPALIVE_EXPIRY", DEFAULT_KEEPALIVE_EXPIRY),
+    )
+    timeouts = httpx.Timeout(
+        timeout or _env_float("UPSTREAM_TIMEOUT", DEFAULT_TIMEOUT),
+        connect=connect_timeout
+        or _env_float("UPSTREAM_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT),
+    )
+
+    if http2 is None:
+        http2 = HTTP2_AVAILABLE and os.getenv("UPSTREAM_HTTP2", "true").lower() == "true"
+
+    return httpx.AsyncClient(
+        limits=limits,
+        timeout=timeouts,
+        http2=http2 and HTTP2_AVAILABLE,
+        transport=transport,
+    )
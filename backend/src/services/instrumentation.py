@@ -0,0 +1,39 @@
+from typing import Optional
+
+from backend.src.models.weather import GeoLocation
+from backend.src.models.records import CurrentRecord, ForecastRecord, AirQualityRecord
+from backend.src.services.metrics import PROVIDER_CALL_DURATION
+from backend.src.services.weather_service import WeatherProvider, DelegatingWeatherProvider
+
+
+class InstrumentedWeatherProvider(DelegatingWeatherProvider):
+    """WeatherProvider decorator that records the latency of every call in provider_call_duration_seconds"""
+
+    def __init__(self, provider: WeatherProvider, name: Optional[str] = None):
+        super().__init__(provider)
+        self.name = name or type(provider).__name__
+        # Resolve the labelled children once so each call is a single observe()
+        self._timers = {
+            method: PROVIDER_CALL_DURATION.labels(provider=self.name, method=method)
+            for method in ("get_current_weather", "get_forecast", "geocode", "get_air_quality")
+        }
+
+    async def get_current_weather(self, location: GeoLocation) -> CurrentRecord:
+        """Get current weather, timing the wrapped provider call"""
+        with self._timers["get_current_weather"].time():
+            return await self.provider.get_current_weather(location)
+
+    async def get_forecast(self, location: GeoLocation) -> ForecastRecord:
+        """Get weather forecast, timing the wrapped provider call"""
+        with self._timers["get_forecast"].time():
+            return await self.provider.get_forecast(location)
+
+    async def geocode(self, city_name: str) -> GeoLocation:
+        """Geocode a city name, timing the wrapped provider call"""
+        with self._timers["geocode"].time():
+            return await self.provider.geocode(city_name)
+
+    async def get_air_quality(self, location: GeoLocation) -> AirQualityRecord:
+        """Get air quality data, timing the wrapped provider call"""
+        with self._timers["get_air_quality"].time():
+            return await self.provider.get_air_quality(location)
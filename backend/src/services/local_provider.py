@@ -0,0 +1,154 @@
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from backend.src.models.weather import GeoLocation
+from backend.src.models.records import (
+    POLLUTANTS,
+    AirQualityRecord,
+    CurrentRecord,
+    ForecastRecord,
+    forecast_row_dtype,
+    intern_condition,
+    intern_name
+)
+from backend.src.services.cache import normalize_city_name
+from backend.src.services.spatial import haversine_km
+from backend.src.services.weather_service import WeatherProvider
+
+DEFAULT_DATASET_PATH = os.path.join(os.path.dirname(__file__), "local_weather.json")
+
+# Coordinate lookups are answered from the nearest station within this distance
+DEFAULT_MAX_DISTANCE_KM = 50.0
+
+
+class LocalDatasetProvider(WeatherProvider):
+    """
+    WeatherProvider backed by a static dataset of recorded station data.
+
+    Each station holds one current observation, air quality readings and
+    daily forecast values; coordinate lookups use the nearest station within
+    max_distance_km and raise ValueError beyond it. Current and air quality
+    records keep the dataset's recorded_at timestamp, while the daily
+    forecast is rolled forward to start today in the station's time zone.
+    Needs no network access, so it can serve as an opt-in last-resort
+    fallback and as an offline backend for testing provider routing.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_distance_km: Optional[float] = None):
+        self.path = path or os.getenv("LOCAL_WEATHER_DATASET", DEFAULT_DATASET_PATH)
+        if max_distance_km is None:
+            max_distance_km = float(os.getenv("LOCAL_WEATHER_MAX_DISTANCE_KM", DEFAULT_MAX_DISTANCE_KM))
+        self.max_distance_km = max_distance_km
+        self._stations: Optional[List[Dict[str, Any]]] = None
+        self._by_name: Dict[str, Dict[str, Any]] = {}
+        self._recorded_at = 0
+
+    @property
+    def stations(self) -> List[Dict[str, Any]]:
+        """Dataset stations, loaded on first use"""
+        if self._stations is None:
+            with open(self.path) as f:
+                dataset = json.load(f)
+            self._recorded_at = int(dataset.get("recorded_at", time.time()))
+            self._stations = dataset["stations"]
+            self._by_name = {}
+            for station in self._stations:
+                self._by_name[normalize_city_name(station["name"])] = station
+                self._by_name[normalize_city_name(f"{station['name']}, {station['country']}")] = station
+        return self._stations
+
+    async def open(self) -> None:
+        """Load the dataset ahead of the first request"""
+        self.stations
+
+    def _nearest(self, location: GeoLocation) -> Dict[str, Any]:
+        station = min(
+            self.stations, key=lambda s: haversine_km(location.lat, location.lon, s["lat"], s["lon"])
+        )
+        if haversine_km(location.lat, location.lon, station["lat"], station["lon"]) > self.max_distance_km:
+            raise ValueError(f"No local weather data near {location.lat:.4f}, {location.lon:.4f}")
+        return station
+
+    async def get_current_weather(self, location: GeoLocation) -> CurrentRecord:
+        """Get the nearest station's recorded observation"""
+        station = self._nearest(location)
+        current = station["current"]
+        return CurrentRecord(
+            temperature=float(current["temperature"]),
+            feels_like=float(current["feels_like"]),
+            humidity=int(current["humidity"]),
+            pressure=int(current["pressure"]),
+            wind_speed=float(current["wind_speed"]),
+            wind_direction=int(current["wind_direction"]),
+            conditions=tuple(intern_condition(c["main"], c["description"], c["icon"]) for c in current["conditions"]),
+            city=intern_name(station["name"]),
+            country=intern_name(station["country"]),
+            dt=self._recorded_at
+        )
+
+    async def get_forecast(self, location: GeoLocation) -> ForecastRecord:
+        """Get the nearest station's daily forecast values, starting today local time"""
+        station = self._nearest(location)
+        offset = int(station.get("utc_offset", 0))
+        local_tz = timezone(timedelta(seconds=offset))
+        today = datetime.now(local_tz).replace(hour=0, minute=0, second=0, microsecond=0)
+
+        daily = station["daily"]
+        conditions = []
+        rows = []
+        for day, values in enumerate(daily):
+            first = values["conditions"][0]
+            condition = intern_condition(first["main"], first["description"], first["icon"])
+            if condition not in conditions:
+                conditions.append(condition)
+            rows.append((
+                int((today + timedelta(days=day)).timestamp()),
+                offset,
+                conditions.index(condition),
+                int(values["humidity"]),
+                float(values["temp_min"]),
+                float(values["temp_max"]),
+                float("nan"),
+                float(values["precipitation_chance"]),
+                float(values["wind_speed"]),
+                float("nan"),
+                (),
+            ))
+
+        return ForecastRecord(
+            city=intern_name(station["name"]),
+            country=intern_name(station["country"]),
+            rows=np.array(rows, dtype=forecast_row_dtype(0)),
+            conditions=tuple(conditions),
+            percentile_names=()
+        )
+
+    async def geocode(self, city_name: str) -> GeoLocation:
+        """
+        Look a city up among the dataset's stations by its name, alone or
+        qualified with the station's country code ("Paris" or "Paris, FR");
+        any other qualifier, such as "Paris, TX", is not found
+        """
+        self.stations
+        station = self._by_name.get(normalize_city_name(city_name))
+        if station is None:
+            raise ValueError(f"City not found: {city_name}")
+        return GeoLocation(lat=station["lat"], lon=station["lon"], city=station["name"], country=station["country"])
+
+    async def get_air_quality(self, location: GeoLocation) -> AirQualityRecord:
+        """Get the nearest station's recorded air quality"""
+        station = self._nearest(location)
+        readings = station["air_quality"]
+        return AirQualityRecord(
+            aqi=int(readings["aqi"]),
+            pollutants=tuple(float(readings["pollutants"].get(name, float("nan"))) for name in POLLUTANTS),
+            city=intern_name(location.city or "Unknown"),
+            country=intern_name(location.country or "Unknown"),
+            dt=self._recorded_at,
+            analysis=None
+        )
@@ -0,0 +1,226 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import math
+import os
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class Priority(IntEnum):
+    """Upstream call priority; lower values are served first"""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+    BATCH = 2
+
+
+# How long a call may wait in the queue before giving up, per priority (seconds)
+DEFAULT_DEADLINES = {
+    Priority.INTERACTIVE: 5.0,
+    Priority.BACKGROUND: 30.0,
+    Priority.BATCH: 60.0,
+}
+
+DEFAULT_CALLS_PER_MINUTE = 60
+
+# Backoff after an upstream 429 without a usable Retry-After header (seconds)
+DEFAULT_RETRY_AFTER = 60.0
+
+_current_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar(
+    "upstream_priority", default=Priority.INTERACTIVE
+)
+
+
+def current_priority() -> Priority:
+    """Priority that upstream calls made from the current context will use"""
+    return _current_priority.get()
+
+
+@contextmanager
+def request_priority(priority: Priority) -> Iterator[None]:
+    """Run upstream calls made inside the block at the given priority"""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def retry_after_seconds(value: Optional[str], default: float = DEFAULT_RETRY_AFTER) -> float:
+    """
+    Seconds to wait from a Retry-After header, which is either delay-seconds
+    or an HTTP date; the default when it is missing or malformed.
+    """
+    if value is None:
+        return default
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if retry_at is None:
+        return default
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RateLimitExceeded(Exception):
+    """Raised when an upstream call could not be scheduled before its deadline"""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"Upstream rate limit reached, retry in {math.ceil(retry_after)}s")
+
+
+class TokenBucket:
+    """Token bucket holding up to capacity tokens, refilled continuously at rate per second"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self) -> float:
+        """Seconds until one whole token is available"""
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    Quota-aware scheduler for upstream calls.
+
+    Calls take one token from every bucket (per-minute and, optionally,
+    per-day). When no token is available they queue by priority, FIFO within
+    a priority, and fail with RateLimitExceeded if not granted before their
+    deadline. backoff() pauses all grants, e.g. after an upstream 429.
+    """
+
+    def __init__(
+        self,
+        calls_per_minute: Optional[int] = None,
+        calls_per_day: Optional[int] = None,
+        deadlines: Optional[Dict[Priority, float]] = None,
+    ):
+        self.calls_per_minute = calls_per_minute or int(
+            os.getenv("UPSTREAM_CALLS_PER_MINUTE", DEFAULT_CALLS_PER_MINUTE)
+        )
+        self.calls_per_day = calls_per_day or int(os.getenv("UPSTREAM_CALLS_PER_DAY", 0)) or None
+        self.deadlines = dict(DEFAULT_DEADLINES)
+        if deadlines:
+            self.deadlines.update(deadlines)
+
+        self._buckets: List[TokenBucket] = [
+            TokenBucket(self.calls_per_minute / 60.0, self.calls_per_minute)
+        ]
+        if self.calls_per_day:
+            self._buckets.append(TokenBucket(self.calls_per_day / 86400.0, self.calls_per_day))
+
+        self._waiters: List[List[Any]] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._blocked_until = 0.0
+
+        self.granted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.backoffs = 0
+
+    async def acquire(self, priority: Optional[Priority] = None, deadline: Optional[float] = None) -> None:
+        """Wait for an upstream call slot, raising RateLimitExceeded after the deadline"""
+        if priority is None:
+            priority = current_priority()
+        if not self._waiters and self._try_take():
+            self.granted += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, [priority, next(self._sequence), future])
+        self.queued += 1
+        self._schedule()
+
+        timeout = deadline if deadline is not None else self.deadlines[priority]
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise RateLimitExceeded(retry_after=self._wait_time())
+
+    def backoff(self, seconds: float) -> None:
+        """Stop granting calls for the given number of seconds"""
+        self.backoffs += 1
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def usage(self) -> Dict[str, Any]:
+        """Return quota limits, remaining budget and queue counters"""
+        now = time.monotonic()
+        for bucket in self._buckets:
+            bucket.refill(now)
+        waiting = {priority.name.lower(): 0 for priority in Priority}
+        for priority, _, future in self._waiters:
+            if not future.done():
+                waiting[Priority(priority).name.lower()] += 1
+        return {
+            "calls_per_minute": self.calls_per_minute,
+            "calls_per_day": self.calls_per_day,
+            "minute_budget_remaining": math.floor(self._buckets[0].tokens),
+            "day_budget_remaining": math.floor(self._buckets[1].tokens) if self.calls_per_day else None,
+            "blocked_for": max(0.0, round(self._blocked_until - now, 2)),
+            "waiting": waiting,
+            "granted": self.granted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "backoffs": self.backoffs,
+        }
+
+    def _try_take(self) -> bool:
+        now = time.monotonic()
+        if now < self._blocked_until:
+            return False
+        for bucket in self._buckets:
+            bucket.refill(now)
+        if any(bucket.tokens < 1 for bucket in self._buckets):
+            return False
+        for bucket in self._buckets:
+            bucket.tokens -= 1
+        return True
+
+    def _wait_time(self) -> float:
+        now = time.monotonic()
+        for bucket in self._buckets:
+            bucket.refill(now)
+        blocked = max(0.0, self._blocked_until - now)
+        return max([blocked] + [bucket.wait_time() for bucket in self._buckets])
+
+    def _dispatch(self) -> None:
+        """Grant slots to queued callers in priority order while tokens last"""
+        self._timer = None
+        while self._waiters:
+            future = self._waiters[0][2]
+            if future.done():
+                # Timed out or cancelled while queued
+                heapq.heappop(self._waiters)
+                continue
+            if not self._try_take():
+                break
+            heapq.heappop(self._waiters)
+            future.set_result(None)
+            self.granted += 1
+        self._schedule()
+
+    def _schedule(self) -> None:
+        if self._timer is not None or not self._waiters:
+            return
+        loop = asyncio.get_running_loop()
+        self._timer = loop.call_later(self._wait_time(), self._dispatch)
@@ -0,0 +1,179 @@
+import asyncio
+import heapq
+import math
+import os
+import time
+from typing import Any, Dict, Hashable, List, Optional, Tuple, TYPE_CHECKING
+
+from backend.src.models.weather import GeoLocation
+from backend.src.services.rate_limit import Priority, request_priority
+
+if TYPE_CHECKING:
+    from backend.src.services.cache import CachingWeatherProvider
+
+
+DEFAULT_HOT_SET_SIZE = 100
+DEFAULT_REFRESH_BUDGET_PER_MINUTE = 60
+DEFAULT_REFRESH_AHEAD = 60.0
+DEFAULT_REFRESH_INTERVAL = 5.0
+DEFAULT_HALF_LIFE = 10 * 60.0
+DEFAULT_MIN_SCORE = 2.0
+
+
+class HotSetTracker:
+    """
+    Tracks request frequency per key with exponential decay.
+    Each hit adds 1 to a score that halves every half_life seconds, so the
+    highest scores are the locations requested most often recently. Only
+    max_tracked keys are kept; the coldest are pruned when it overflows.
+    """
+
+    def __init__(self, half_life: float = DEFAULT_HALF_LIFE, max_tracked: int = 10_000):
+        self.half_life = half_life
+        self.max_tracked = max_tracked
+        self._decay = math.log(2) / half_life
+        # Scores are stored scaled by e^(decay * (t - epoch)) ("forward decay"),
+        # so recording a hit never has to touch the other keys' scores
+        self._epoch = time.monotonic()
+        self._scores: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def record(self, key: Hashable, payload: Any) -> None:
+        """Count one request for key; payload is returned by top() for refreshing"""
+        now = time.monotonic()
+        if self._decay * (now - self._epoch) > 50:
+            self._rescale(now)
+        weight = math.exp(self._decay * (now - self._epoch))
+        score = self._scores.get(key, (0.0, None))[0] + weight
+        self._scores[key] = (score, payload)
+        if len(self._scores) > self.max_tracked:
+            self._prune()
+
+    def top(self, n: int, min_score: float = 0.0) -> List[Tuple[Hashable, Any]]:
+        """
+        Return up to n (key, payload) pairs, hottest first.
+        Keys whose decayed score is below min_score (roughly: fewer than that
+        many requests in the last half-life) are left out.
+        """
+        hottest = heapq.nlargest(n, self._scores.items(), key=lambda item: item[1][0])
+        threshold = min_score * math.exp(self._decay * (time.monotonic() - self._epoch))
+        return [(key, payload) for key, (score, payload) in hottest if score >= threshold]
+
+    def _rescale(self, now: float) -> None:
+        factor = math.exp(-self._decay * (now - self._epoch))
+        self._scores = {key: (score * factor, payload) for key, (score, payload) in self._scores.items()}
+        self._epoch = now
+
+    def _prune(self) -> None:
+        keep = heapq.nlargest(self.max_tracked // 2, self._scores.items(), key=lambda item: item[1][0])
+        self._scores = dict(keep)
+
+
+class BackgroundRefresher:
+    """
+    Periodically refreshes the hottest cached locations ahead of expiry.
+
+    Every interval seconds the top hot_set_size keys (with a decayed score of
+    at least min_score) are checked; any whose entry expires within
+    refresh_ahead seconds, or is already stale or missing, is re-fetched,
+    limited to budget_per_minute upstream calls.
+    """
+
+    def __init__(
+        self,
+        provider: "CachingWeatherProvider",
+        hot_set_size: Optional[int] = None,
+        budget_per_minute: Optional[int] = None,
+        refresh_ahead: Optional[float] = None,
+        interval: Optional[float] = None,
+        min_score: Optional[float] = None,
+    ):
+        self.provider = provider
+        self.hot_set_size = hot_set_size or int(os.getenv("REFRESH_HOT_SET_SIZE", DEFAULT_HOT_SET_SIZE))
+        self.budget_per_minute = budget_per_minute or int(
+            os.getenv("REFRESH_BUDGET_PER_MINUTE", DEFAULT_REFRESH_BUDGET_PER_MINUTE)
+        )
+        self.refresh_ahead = refresh_ahead if refresh_ahead is not None else float(
+            os.getenv("REFRESH_AHEAD_SECONDS", DEFAULT_REFRESH_AHEAD)
+        )
+        self.interval = interval or float(os.getenv("REFRESH_INTERVAL_SECONDS", DEFAULT_REFRESH_INTERVAL))
+        self.min_score = min_score if min_score is not None else float(
+            os.getenv("REFRESH_MIN_SCORE", DEFAULT_MIN_SCORE)
+        )
+
+        self._tokens = float(self.budget_per_minute)
+        self._last_refill = time.monotonic()
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.refreshed = 0
+        self.failures = 0
+        self.over_budget = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the refresh loop on the running event loop"""
+        if not self.running:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop the refresh loop and wait for it to exit"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run_once(self) -> int:
+        """Refresh hot entries that are due, within budget; returns the number refreshed"""
+        self._refill()
+        due = []
+        hot = self.provider.hot_set.top(self.hot_set_size, min_score=self.min_score)
+        for key, (endpoint, location) in hot:
+            remaining = self.provider.cache.ttl_remaining(key)
+            if remaining is not None and remaining > self.refresh_ahead:
+                continue
+            if self._tokens < 1:
+                self.over_budget += 1
+                continue
+            self._tokens -= 1
+            due.append(self._refresh(key, endpoint, location))
+
+        results = await asyncio.gather(*due, return_exceptions=True)
+        failures = sum(1 for result in results if isinstance(result, Exception))
+        self.failures += failures
+        self.refreshed += len(results) - failures
+        return len(results) - failures
+
+    async def _refresh(self, key: Hashable, endpoint: str, location: GeoLocation) -> Any:
+        with request_priority(Priority.BACKGROUND):
+            return await self.provider.refresh(key, endpoint, location)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.run_once()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        rate = self.budget_per_minute / 60.0
+        self._tokens = min(float(self.budget_per_minute), self._tokens + (now - self._last_refill) * rate)
+        self._last_refill = now
+
+    def stats(self) -> Dict[str, Any]:
+        """Return refresh counters"""
+        return {
+            "running": self.running,
+            "hot_set_size": self.hot_set_size,
+            "budget_per_minute": self.budget_per_minute,
+            "tokens": round(self._tokens, 2),
+            "refreshed": self.refreshed,
+            "failures": self.failures,
+            "over_budget": self.over_budget,
+        }
@@ -0,0 +1,419 @@
+import asyncio
+import math
+import os
+import random
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+import httpx
+
+
+T = TypeVar("T")
+
+# Adaptive timeouts: p99 of recent successful calls times the multiplier,
+# clamped to [min, max]; max (UPSTREAM_TIMEOUT) applies until enough samples
+DEFAULT_MIN_TIMEOUT = 0.5
+DEFAULT_MAX_TIMEOUT = 10.0
+DEFAULT_TIMEOUT_MULTIPLIER = 2.0
+DEFAULT_LATENCY_WINDOW = 256
+DEFAULT_MIN_SAMPLES = 20
+
+# Circuit breaker: trips when, over the last window calls (at least min_calls),
+# the failure or slow-call share reaches its threshold
+DEFAULT_FAILURE_RATE = 0.5
+DEFAULT_SLOW_CALL_RATE = 0.8
+DEFAULT_SLOW_CALL_SECONDS = 2.0
+DEFAULT_BREAKER_WINDOW = 20
+DEFAULT_BREAKER_MIN_CALLS = 10
+DEFAULT_OPEN_SECONDS = 30.0
+
+# Hedging: at most this share of calls may send a second, speculative request
+DEFAULT_HEDGE_BUDGET = 0.1
+DEFAULT_RETRIES = 1
+RETRY_BACKOFF = 0.1
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """Whether an error says the upstream is unhealthy: transport errors, timeouts and 5xx"""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream endpoint whose circuit is open"""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+        super().__init__(
+            f"Upstream {endpoint} is unavailable, retry in {math.ceil(retry_after)}s"
+        )
+
+
+class LatencyTracker:
+    """
+    Sliding window of recent successful call latencies.
+    Derives the per-call timeout from their p99 and the hedging delay from
+    their p95.
+    """
+
+    def __init__(
+        self,
+        min_timeout: float = DEFAULT_MIN_TIMEOUT,
+        max_timeout: float = DEFAULT_MAX_TIMEOUT,
+        multiplier: float = DEFAULT_TIMEOUT_MULTIPLIER,
+        window: int = DEFAULT_LATENCY_WINDOW,
+        min_samples: int = DEFAULT_MIN_SAMPLES,
+    ):
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def observe(self, latency: float) -> None:
+        self._samples.append(latency)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """The q-th percentile of the window, or None until min_samples are recorded"""
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1)]
+
+    def timeout(self) -> float:
+        """Per-call timeout in seconds"""
+        p99 = self.percentile(99)
+        if p99 is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, p99 * self.multiplier))
+
+    def hedge_delay(self) -> Optional[float]:
+        """How long to wait on a call before hedging it, or None while still learning"""
+        return self.percentile(95)
+
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Count-based circuit breaker for one upstream endpoint.
+
+    Closed: calls pass and their outcomes fill a window of the last `window`
+    calls; once it holds min_calls, a failure share of failure_rate or a
+    slow-call share of slow_call_rate trips the breaker. Open: calls fail
+    fast with CircuitOpenError for open_seconds. Half-open: one probe call
+    is let through; success closes the breaker, failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: Optional[float] = None,
+        slow_call_rate: Optional[float] = None,
+        slow_call_seconds: Optional[float] = None,
+        window: Optional[int] = None,
+        min_calls: Optional[int] = None,
+        open_seconds: Optional[float] = None,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate or _env_float("UPSTREAM_BREAKER_FAILURE_RATE", DEFAULT_FAILURE_RATE)
+        self.slow_call_rate = slow_call_rate or _env_float("UPSTREAM_BREAKER_SLOW_CALL_RATE", DEFAULT_SLOW_CALL_RATE)
+        self.slow_call_seconds = slow_call_seconds or _env_float(
+            "UPSTREAM_BREAKER_SLOW_CALL_SECONDS", DEFAULT_SLOW_CALL_SECONDS
+        )
+        self.min_calls = min_calls or int(_env_float("UPSTREAM_BREAKER_MIN_CALLS", DEFAULT_BREAKER_MIN_CALLS))
+        self.open_seconds = open_seconds or _env_float("UPSTREAM_BREAKER_OPEN_SECONDS", DEFAULT_OPEN_SECONDS)
+        window = window or int(_env_float("UPSTREAM_BREAKER_WINDOW", DEFAULT_BREAKER_WINDOW))
+
+        # (failed, slow) per recent call
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=max(window, self.min_calls))
+        self._state = BreakerState.CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> BreakerState:
+        if self._state is BreakerState.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = BreakerState.HALF_OPEN
+            self._probing = False
+        return self._state
+
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_at + self.open_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        """
+        Admit one call or raise CircuitOpenError.
+        Returns True when the admitted call is the half-open probe, which
+        must then be passed to record() or release().
+        """
+        state = self.state
+        if state is BreakerState.CLOSED:
+            return False
+        if state is BreakerState.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        self.rejected += 1
+        raise CircuitOpenError(self.name, self.retry_after() or self.open_seconds)
+
+    def record(self, failed: bool, latency: float, probe: bool = False) -> None:
+        """Record a finished call's outcome"""
+        slow = latency >= self.slow_call_seconds
+        if probe:
+            self._probing = False
+            if failed or slow:
+                self._open()
+            else:
+                self._state = BreakerState.CLOSED
+                self._outcomes.clear()
+            return
+
+        if self._state is not BreakerState.CLOSED:
+            # A call that started before the breaker opened
+            return
+        self._outcomes.append((failed, slow))
+        if len(self._outcomes) < self.min_calls:
+            return
+        failures = sum(1 for failed, _ in self._outcomes if failed)
+        slow_calls = sum(1 for _, slow in self._outcomes if slow)
+        if (
+            failures >= self.failure_rate * len(self._outcomes)
+            or slow_calls >= self.slow_call_rate * len(self._outcomes)
+        ):
+            self._open()
+
+    def release(self, probe: bool) -> None:
+        """Give back an admission whose call never reached the upstream, or was cancelled"""
+        if probe:
+            self._probing = False
+
+    def _open(self) -> None:
+        self._state = BreakerState.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.trips += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return breaker state and counters"""
+        state = self.state
+        return {
+            "state": state.value,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "retry_after": round(self.retry_after(), 2) if state is BreakerState.OPEN else 0.0,
+            "window_calls": len(self._outcomes),
+            "window_failures": sum(1 for failed, _ in self._outcomes if failed),
+        }
+
+
+class UpstreamResilience:
+    """
+    Resilience layer for idempotent upstream GETs, kept per endpoint.
+
+    Each call runs under a timeout adapted to the endpoint's recent latency
+    and behind its circuit breaker. A call still pending after the
+    endpoint's p95 latency is hedged with a second request (within
+    hedge_budget of all calls) and the first success wins. A call that
+    fails with a transport error, timeout or 5xx is retried up to retries
+    times while the breaker stays closed.
+    """
+
+    def __init__(
+        self,
+        hedge: Optional[bool] = None,
+        hedge_budget: Optional[float] = None,
+        retries: Optional[int] = None,
+        min_timeout: Optional[float] = None,
+        max_timeout: Optional[float] = None,
+        timeout_multiplier: Optional[float] = None,
+        breaker_factory: Optional[Callable[[str], CircuitBreaker]] = None,
+    ):
+        if hedge is None:
+            hedge = os.getenv("UPSTREAM_HEDGE", "true").lower() == "true"
+        self.hedge = hedge
+        self.hedge_budget = hedge_budget if hedge_budget is not None else _env_float(
+            "UPSTREAM_HEDGE_BUDGET", DEFAULT_HEDGE_BUDGET
+        )
+        self.retries = retries if retries is not None else int(_env_float("UPSTREAM_RETRIES", DEFAULT_RETRIES))
+        self.min_timeout = min_timeout or _env_float("UPSTREAM_MIN_TIMEOUT", DEFAULT_MIN_TIMEOUT)
+        self.max_timeout = max_timeout or _env_float("UPSTREAM_TIMEOUT", DEFAULT_MAX_TIMEOUT)
+        self.timeout_multiplier = timeout_multiplier or _env_float(
+            "UPSTREAM_TIMEOUT_MULTIPLIER", DEFAULT_TIMEOUT_MULTIPLIER
+        )
+        self._breaker_factory = breaker_factory or CircuitBreaker
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.latencies: Dict[str, LatencyTracker] = {}
+
+        # Hedge tokens accrue at hedge_budget per call, up to a small burst
+        self._hedge_tokens = 1.0
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.retried = 0
+        self.timeouts = 0
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        breaker = self.breakers.get(endpoint)
+        if breaker is None:
+            breaker = self.breakers[endpoint] = self._breaker_factory(endpoint)
+        return breaker
+
+    def latency(self, endpoint: str) -> LatencyTracker:
+        tracker = self.latencies.get(endpoint)
+        if tracker is None:
+            tracker = self.latencies[endpoint] = LatencyTracker(
+                self.min_timeout, self.max_timeout, self.timeout_multiplier
+            )
+        return tracker
+
+    async def call(
+        self,
+        endpoint: str,
+        attempt: Callable[[float], Awaitable[T]],
+        acquire: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> T:
+        """
+        Run attempt(timeout) with hedging and retries.
+        attempt must be safe to run more than once concurrently. acquire,
+        if given, is awaited before every attempt (e.g. for a rate-limit
+        token); time spent in it does not count towards the attempt's
+        latency, timeout, slow-call tracking or hedge delay.
+        """
+        self.calls += 1
+        self._hedge_tokens = min(5.0, self._hedge_tokens + self.hedge_budget)
+        retries = 0
+        while True:
+            try:
+                return await self._hedged(endpoint, attempt, acquire)
+            except Exception as e:
+                if (
+                    retries >= self.retries
+                    or not is_upstream_failure(e)
+                    or self.breaker(endpoint).state is not BreakerState.CLOSED
+                ):
+                    raise
+            retries += 1
+            self.retried += 1
+            await asyncio.sleep(RETRY_BACKOFF * (1 + random.random()))
+
+    async def _hedged(
+        self,
+        endpoint: str,
+        attempt: Callable[[float], Awaitable[T]],
+        acquire: Optional[Callable[[], Awaitable[None]]],
+    ) -> T:
+        # The hedge delay only starts once the first attempt is admitted and actually sent
+        probe = await self._admit(endpoint, acquire)
+        tasks = [asyncio.ensure_future(self._attempt(endpoint, attempt, probe))]
+        try:
+            delay = self.latency(endpoint).hedge_delay() if self.hedge else None
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if (
+                    not done
+                    and self._hedge_tokens >= 1
+                    and self.breaker(endpoint).state is BreakerState.CLOSED
+                ):
+                    self._hedge_tokens -= 1
+                    self.hedges += 1
+                    tasks.append(asyncio.ensure_future(self._admitted_attempt(endpoint, attempt, acquire)))
+
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not tasks[0]:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            # Losing or abandoned attempts are cancelled, including on caller cancellation
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _admit(self, endpoint: str, acquire: Optional[Callable[[], Awaitable[None]]]) -> bool:
+        """Pass the breaker, then wait in acquire; returns whether the attempt is the half-open probe"""
+        breaker = self.breaker(endpoint)
+        probe = breaker.allow()
+        if acquire is not None:
+            try:
+                await acquire()
+            except BaseException:
+                breaker.release(probe)
+                raise
+        return probe
+
+    async def _admitted_attempt(
+        self,
+        endpoint: str,
+        attempt: Callable[[float], Awaitable[T]],
+        acquire: Optional[Callable[[], Awaitable[None]]],
+    ) -> T:
+        probe = await self._admit(endpoint, acquire)
+        return await self._attempt(endpoint, attempt, probe)
+
+    async def _attempt(self, endpoint: str, attempt: Callable[[float], Awaitable[T]], probe: bool) -> T:
+        breaker = self.breaker(endpoint)
+        tracker = self.latency(endpoint)
+        start = time.perf_counter()
+        try:
+            result = await attempt(tracker.timeout())
+        except asyncio.CancelledError:
+            breaker.release(probe)
+            raise
+        except Exception as e:
+            failed = is_upstream_failure(e)
+            if isinstance(e, httpx.TimeoutException):
+                self.timeouts += 1
+            if failed or isinstance(e, httpx.HTTPStatusError):
+                # A 4xx still shows the upstream is answering
+                breaker.record(failed, time.perf_counter() - start, probe)
+            else:
+                breaker.release(probe)
+            raise
+        latency = time.perf_counter() - start
+        tracker.observe(latency)
+        breaker.record(False, latency, probe)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-endpoint breaker state and timeouts, and hedging/retry counters"""
+        endpoints = {}
+        for endpoint in sorted(set(self.breakers) | set(self.latencies)):
+            tracker = self.latency(endpoint)
+            endpoints[endpoint] = dict(
+                self.breaker(endpoint).stats(),
+                timeout=round(tracker.timeout(), 3),
+                hedge_delay=round(tracker.hedge_delay(), 3) if tracker.hedge_delay() is not None else None,
+                latency_samples=len(tracker),
+            )
+        return {
+            "endpoints": endpoints,
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "retries": self.retried,
+            "timeouts": self.timeouts,
+        }
@@ -0,0 +1,114 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple, Union
+
+from backend.src.models.weather import CurrentWeather, WeatherForecast, GeoLocation, AirQuality
+from backend.src.models.records import (
+    CurrentRecord,
+    ForecastRecord,
+    AirQualityRecord,
+    WeatherRecord,
+    from_model,
+    to_model
+)
+
+
+# Values that may be stored, by type name, with the public model used to encode
+# them; entries are kept as that model's JSON so any worker can decode them
+CACHEABLE_TYPES: Dict[str, type] = {
+    CurrentRecord.__name__: CurrentWeather,
+    ForecastRecord.__name__: WeatherForecast,
+    AirQualityRecord.__name__: AirQuality,
+    GeoLocation.__name__: GeoLocation,
+}
+
+# Expired rows are purged after this many writes
+PURGE_EVERY = 1000
+
+
+def default_shared_cache_path() -> str:
+    """Prefer tmpfs (/dev/shm) so the shared cache never touches disk"""
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, "weather-api-cache.sqlite3")
+
+
+class SharedCache:
+    """
+    Response cache shared by every worker process on a host.
+
+    Entries live in a SQLite database in shared memory (/dev/shm by default)
+    opened in WAL mode, so readers in one worker never block on a writer in
+    another. It sits behind each worker's in-process TTLCache: a local miss
+    checks here before going upstream, and every upstream result is written
+    here, so N workers warm one cache instead of N.
+    Expiry uses wall-clock time because deadlines are compared across processes.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("WEATHER_SHARED_CACHE_PATH") or default_shared_cache_path()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                expires_at REAL NOT NULL,
+                model TEXT NOT NULL,
+                value BLOB NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def encode_key(key: Hashable) -> str:
+        return repr(key)
+
+    def get(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """Return (value, seconds of TTL left) for a live entry, or None"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires_at, model, value FROM entries WHERE key = ? AND expires_at > ?",
+                (self.encode_key(key), now),
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        expires_at, type_name, value = row
+        result = from_model(CACHEABLE_TYPES[type_name].model_validate_json(value))
+        return result, expires_at - now
+
+    def set(self, key: Hashable, value: Union[WeatherRecord, GeoLocation], ttl: float) -> None:
+        """Store a record for ttl seconds, replacing any entry another worker wrote"""
+        type_name = type(value).__name__
+        if type_name not in CACHEABLE_TYPES:
+            raise TypeError(f"Cannot share values of type {type_name}")
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, expires_at, model, value) VALUES (?, ?, ?, ?)",
+                (self.encode_key(key), time.time() + ttl, type_name, to_model(value).json_bytes()),
+            )
+            self._writes += 1
+            if self._writes % PURGE_EVERY == 0:
+                self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters"""
+        return {"path": self.path, "hits": self.hits, "misses": self.misses, "writes": self._writes}
@@ -0,0 +1,91 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+from backend.src.models.weather import GeoLocation
+from backend.src.models.records import CurrentRecord, ForecastRecord, AirQualityRecord
+from backend.src.services.cache import coordinate_key, normalize_city_name
+from backend.src.services.weather_service import WeatherProvider, DelegatingWeatherProvider
+
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into a single execution.
+    The first caller starts the work as a task; callers arriving while it is
+    in flight await the same task instead of starting their own.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self.calls = 0
+        self.executions = 0
+        self.deduplicated = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn() once for all concurrent callers of the same key"""
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            self.deduplicated += 1
+
+        # Shield so one caller being cancelled does not cancel the shared work
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved in case every waiter was cancelled
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        """Return call, execution and deduplication counters"""
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "deduplicated": self.deduplicated,
+            "in_flight": self.in_flight,
+        }
+
+
+class CoalescingWeatherProvider(DelegatingWeatherProvider):
+    """WeatherProvider decorator that shares one upstream call among identical concurrent requests"""
+
+    def __init__(self, provider: WeatherProvider, flight: Optional[SingleFlight] = None):
+        super().__init__(provider)
+        self.flight = flight or SingleFlight()
+
+    async def get_current_weather(self, location: GeoLocation) -> CurrentRecord:
+        """Get current weather, joining an identical in-flight call if there is one"""
+        key = ("current",) + coordinate_key(location)
+        return await self.flight.do(key, lambda: self.provider.get_current_weather(location))
+
+    async def get_forecast(self, location: GeoLocation) -> ForecastRecord:
+        """Get weather forecast, joining an identical in-flight call if there is one"""
+        key = ("forecast",) + coordinate_key(location)
+        return await self.flight.do(key, lambda: self.provider.get_forecast(location))
+
+    async def geocode(self, city_name: str) -> GeoLocation:
+        """Geocode a city name, joining an identical in-flight call if there is one"""
+        key = ("geocode", normalize_city_name(city_name))
+        return await self.flight.do(key, lambda: self.provider.geocode(city_name))
+
+    async def get_air_quality(self, location: GeoLocation) -> AirQualityRecord:
+        """Get air quality data, joining an identical in-flight call if there is one"""
+        key = ("air_quality",) + coordinate_key(location) + (location.city, location.country)
+        return await self.flight.do(key, lambda: self.provider.get_air_quality(location))
+
+    def stats(self) -> Dict[str, int]:
+        """Return single-flight counters"""
+        return self.flight.stats()
@@ -0,0 +1,121 @@
+import math
+from typing import Callable, Dict, Hashable, Optional, Set, Tuple
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class TileGrid:
+    """
+    Fixed-degree grid that quantizes coordinates into tiles.
+    Every coordinate inside a tile maps to the same tile id and center, so
+    nearby lookups share one cache key and one upstream fetch.
+    """
+
+    def __init__(self, tile_size_deg: float):
+        if tile_size_deg <= 0:
+            raise ValueError("tile_size_deg must be positive")
+        self.tile_size_deg = tile_size_deg
+
+    def tile(self, lat: float, lon: float) -> Tuple[int, int]:
+        """Return the (row, column) tile id containing a coordinate"""
+        # The epsilon keeps exact multiples of the tile size (e.g. 35.12 / 0.01)
+        # from landing in the tile below due to floating-point division
+        return (
+            math.floor(lat / self.tile_size_deg + 1e-9),
+            math.floor(lon / self.tile_size_deg + 1e-9),
+        )
+
+    def center(self, tile: Tuple[int, int]) -> Tuple[float, float]:
+        """Return the center coordinate of a tile"""
+        lat = (tile[0] + 0.5) * self.tile_size_deg
+        lon = (tile[1] + 0.5) * self.tile_size_deg
+        return (round(max(-90.0, min(90.0, lat)), 6), round(max(-180.0, min(180.0, lon)), 6))
+
+
+class SpatialIndex:
+    """
+    Bucketed point index supporting nearest-neighbour lookups within a radius.
+    Points are hashed into square cells of cell_size_deg degrees; a query
+    only scans the cells overlapping its search radius.
+    """
+
+    def __init__(self, cell_size_deg: float = 0.1):
+        self._grid = TileGrid(cell_size_deg)
+        self._cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self._points: Dict[Hashable, Tuple[float, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._points
+
+    def add(self, key: Hashable, lat: float, lon: float) -> None:
+        """Insert or move a point"""
+        self.remove(key)
+        self._points[key] = (lat, lon)
+        self._cells.setdefault(self._grid.tile(lat, lon), set()).add(key)
+
+    def remove(self, key: Hashable) -> None:
+        """Remove a point if present"""
+        point = self._points.pop(key, None)
+        if point is None:
+            return
+        cell = self._grid.tile(*point)
+        members = self._cells.get(cell)
+        if members is not None:
+            members.discard(key)
+            if not members:
+                del self._cells[cell]
+
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        max_distance_km: float,
+        accept: Optional[Callable[[Hashable], bool]] = None,
+    ) -> Optional[Tuple[Hashable, float]]:
+        """
+        Return (key, distance_km) of the closest point within max_distance_km,
+        skipping points for which accept(key) is false.
+        """
+        lat_span = max_distance_km / KM_PER_DEGREE_LAT
+        cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+        lon_span = min(180.0, lat_span / cos_lat)
+
+        row_min, col_min = self._grid.tile(lat - lat_span, lon - lon_span)
+        row_max, col_max = self._grid.tile(lat + lat_span, lon + lon_span)
+        if (row_max - row_min + 1) * (col_max - col_min + 1) > len(self._cells):
+            candidates = self._points.keys()
+        else:
+            candidates = [
+                key
+                for row in range(row_min, row_max + 1)
+                for col in range(col_min, col_max + 1)
+                for key in self._cells.get((row, col), ())
+            ]
+
+        best: Optional[Tuple[Hashable, float]] = None
+        for key in list(candidates):
+            point = self._points.get(key)
+            if point is None:
+                continue
+            point_lat, point_lon = point
+            distance = haversine_km(lat, lon, point_lat, point_lon)
+            if distance > max_distance_km or (best is not None and distance >= best[1]):
+                continue
+            if accept is not None and not accept(key):
+                continue
+            best = (key, distance)
+        return best
@@ -0,0 +1,301 @@
+import asyncio
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+import orjson
+
+from backend.src.models.records import to_model
+from backend.src.models.weather import BatchLocation
+from backend.src.services.cache import normalize_city_name
+from backend.src.services.rate_limit import Priority, RateLimitExceeded, request_priority
+from backend.src.services.resilience import CircuitOpenError
+from backend.src.services.weather_service import WeatherService
+
+DEFAULT_REFRESH_INTERVAL = 60.0
+DEFAULT_KEEPALIVE = 15.0
+
+# Messages a subscriber may fall behind by before it is resynchronized with snapshots
+DEFAULT_SUBSCRIBER_BUFFER = 64
+
+DEFAULT_MAX_LOCATIONS = 50
+
+# Locations polled at once across every subscriber; each one costs an
+# upstream call per refresh interval once its cache entry expires
+DEFAULT_MAX_TOPICS = 200
+
+# Fields that change with every observation and are not a change on their own
+VOLATILE_FIELDS = frozenset({"timestamp"})
+
+Message = Tuple[str, Dict[str, Any]]
+
+
+def topic_key(location: BatchLocation) -> str:
+    """Key shared by every subscription to the same city or coordinates"""
+    if location.city:
+        return normalize_city_name(location.city)
+    return f"{location.lat:.4f},{location.lon:.4f}"
+
+
+def parse_location(value: str) -> BatchLocation:
+    """Parse "lat,lon" as coordinates and anything else as a city name"""
+    parts = value.split(",")
+    if len(parts) == 2 and _is_number(parts[0]) and _is_number(parts[1]):
+        return BatchLocation(lat=float(parts[0]), lon=float(parts[1]))
+    return BatchLocation(city=value.strip())
+
+
+def _is_number(value: str) -> bool:
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+
+def merge_patch(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """RFC 7386 merge patch turning old into new: changed fields, removed ones as None"""
+    patch: Dict[str, Any] = {key: value for key, value in new.items() if old.get(key) != value or key not in old}
+    patch.update({key: None for key in old if key not in new})
+    return patch
+
+
+def format_event(event: str, data: Dict[str, Any]) -> bytes:
+    """Encode one Server-Sent Event; keepalives become comment lines"""
+    if event == "keepalive":
+        return b": keepalive\n\n"
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+class TooManyTopics(Exception):
+    """Raised when a subscription would start polling more locations than the hub allows"""
+
+    def __init__(self, max_topics: int):
+        self.max_topics = max_topics
+        super().__init__(f"Subscriptions are limited to {max_topics} distinct locations; try again later")
+
+
+class Subscriber:
+    """One client's queue of pending messages"""
+
+    __slots__ = ("queue", "resync")
+
+    def __init__(self, buffer: int):
+        self.queue: "asyncio.Queue[Message]" = asyncio.Queue(maxsize=buffer)
+        self.resync = False
+
+    def send(self, message: Message) -> bool:
+        """Queue a message; on overflow drop the backlog and ask for a resync"""
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.resync = True
+            # Wake the consumer so it resyncs rather than waiting for the next change
+            self.queue.put_nowait(("resync", {}))
+            return False
+
+
+class Topic:
+    """One location polled on behalf of all of its subscribers"""
+
+    def __init__(self, key: str, location: BatchLocation):
+        self.key = key
+        self.location = location
+        self.subscribers: Set[Subscriber] = set()
+        self.snapshot: Optional[Dict[str, Any]] = None
+        # Last observation pushed to subscribers, which deltas are computed against
+        self.sent: Optional[Dict[str, Any]] = None
+        self.error: Optional[Dict[str, Any]] = None
+        self.task: Optional["asyncio.Task[None]"] = None
+
+    def current(self) -> Optional[Message]:
+        """The message that brings a new subscriber up to date, if any"""
+        if self.error is not None:
+            return "error", {"location": self.key, **self.error}
+        if self.snapshot is not None:
+            return "snapshot", {"location": self.key, "data": self.snapshot}
+        return None
+
+
+class SubscriptionHub:
+    """
+    Pushes current-weather changes to subscribers of a set of locations.
+
+    Each subscribed location is a topic with a single polling task that
+    fetches it every refresh_interval seconds, however many clients
+    subscribe to it; fetches go through the WeatherService, so they are
+    answered from the response cache while it is fresh. A new subscriber
+    gets the latest full observation per location as a "snapshot", then a
+    "delta" (a JSON merge patch against the last observation pushed,
+    computed once per topic) whenever a field other than the timestamp
+    changes.
+    Subscribers that fall buffer messages behind have their backlog
+    dropped and get fresh snapshots instead. A topic's task stops when its
+    last subscriber leaves.
+    Polls run at BACKGROUND priority so they never take the upstream quota
+    ahead of interactive requests, and at most max_topics locations are
+    polled at once; subscriptions that would add more raise TooManyTopics.
+    """
+
+    def __init__(
+        self,
+        weather_service: WeatherService,
+        refresh_interval: Optional[float] = None,
+        buffer: Optional[int] = None,
+        max_topics: Optional[int] = None,
+    ):
+        self.weather_service = weather_service
+        self.refresh_interval = refresh_interval or float(
+            os.getenv("SUBSCRIPTION_REFRESH_INTERVAL", DEFAULT_REFRESH_INTERVAL)
+        )
+        self.buffer = buffer or int(os.getenv("SUBSCRIPTION_BUFFER", DEFAULT_SUBSCRIBER_BUFFER))
+        self.max_topics = max_topics or int(os.getenv("SUBSCRIPTION_MAX_TOPICS", DEFAULT_MAX_TOPICS))
+        self.topics: Dict[str, Topic] = {}
+        self.subscribers = 0
+        self.fetches = 0
+        self.deltas = 0
+        self.messages = 0
+        self.resyncs = 0
+        self.rejected = 0
+
+    def check_capacity(self, locations: List[BatchLocation]) -> None:
+        """Raise TooManyTopics if subscribing to locations would exceed max_topics"""
+        new_keys = {topic_key(location) for location in locations} - self.topics.keys()
+        if len(self.topics) + len(new_keys) > self.max_topics:
+            self.rejected += 1
+            raise TooManyTopics(self.max_topics)
+
+    async def subscribe(
+        self, locations: List[BatchLocation], keepalive: Optional[float] = None
+    ) -> AsyncIterator[Message]:
+        """
+        Yield (event, data) messages for the given locations until closed.
+        Events are "snapshot", "delta" and "error"; each data dict names its
+        topic under "location". With keepalive, a ("keepalive", {}) message
+        is yielded after that many idle seconds. Raises TooManyTopics on
+        first iteration when the locations do not fit under max_topics.
+        """
+        subscriber = Subscriber(self.buffer)
+        topics = self._join(subscriber, locations)
+        self.subscribers += 1
+        try:
+            for topic in topics:
+                message = topic.current()
+                if message is not None:
+                    yield message
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(subscriber.queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    yield "keepalive", {}
+                    continue
+                if subscriber.resync:
+                    subscriber.resync = False
+                    self.resyncs += 1
+                    for topic in topics:
+                        message = topic.current()
+                        if message is not None:
+                            yield message
+                    continue
+                if event != "resync":
+                    yield event, data
+        finally:
+            self.subscribers -= 1
+            self._leave(subscriber, topics)
+
+    def _join(self, subscriber: Subscriber, locations: List[BatchLocation]) -> List[Topic]:
+        self.check_capacity(locations)
+        topics = []
+        for location in locations:
+            key = topic_key(location)
+            topic = self.topics.get(key)
+            if topic is None:
+                topic = self.topics[key] = Topic(key, location)
+                topic.task = asyncio.ensure_future(self._poll(topic))
+            if subscriber not in topic.subscribers:
+                topic.subscribers.add(subscriber)
+                topics.append(topic)
+        return topics
+
+    def _leave(self, subscriber: Subscriber, topics: List[Topic]) -> None:
+        for topic in topics:
+            topic.subscribers.discard(subscriber)
+            if not topic.subscribers and self.topics.get(topic.key) is topic:
+                del self.topics[topic.key]
+                if topic.task is not None:
+                    topic.task.cancel()
+
+    async def _poll(self, topic: Topic) -> None:
+        while True:
+            await self.refresh(topic)
+            await asyncio.sleep(self.refresh_interval)
+
+    async def refresh(self, topic: Topic) -> None:
+        """Fetch a topic's location once, at background priority, and push whatever changed"""
+        self.fetches += 1
+        location = topic.location
+        try:
+            with request_priority(Priority.BACKGROUND):
+                if location.city:
+                    record = await self.weather_service.get_current_weather_by_city(location.city)
+                else:
+                    record = await self.weather_service.get_current_weather_by_coordinates(location.lat, location.lon)
+        except ValueError as e:
+            self._publish_error(topic, 404, str(e))
+            return
+        except (RateLimitExceeded, CircuitOpenError) as e:
+            self._publish_error(topic, 503, str(e))
+            return
+        except Exception as e:
+            self._publish_error(topic, 500, str(e))
+            return
+
+        snapshot = to_model(record).model_dump(mode="json")
+        previous, recovered = topic.sent, topic.error is not None
+        topic.snapshot, topic.error = snapshot, None
+        if previous is None or recovered:
+            topic.sent = snapshot
+            self._broadcast(topic, ("snapshot", {"location": topic.key, "data": snapshot}))
+            return
+
+        patch = merge_patch(previous, snapshot)
+        if patch.keys() - VOLATILE_FIELDS:
+            topic.sent = snapshot
+            self.deltas += 1
+            self._broadcast(topic, ("delta", {"location": topic.key, "changes": patch}))
+
+    def _publish_error(self, topic: Topic, status_code: int, detail: str) -> None:
+        error = {"status_code": status_code, "detail": detail}
+        if topic.error == error:
+            return
+        topic.error = error
+        self._broadcast(topic, ("error", {"location": topic.key, **error}))
+
+    def _broadcast(self, topic: Topic, message: Message) -> None:
+        for subscriber in topic.subscribers:
+            subscriber.send(message)
+        self.messages += len(topic.subscribers)
+
+    async def close(self) -> None:
+        """Stop polling every topic"""
+        tasks = [topic.task for topic in self.topics.values() if topic.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.topics.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return topic, subscriber and push counters"""
+        return {
+            "topics": len(self.topics),
+            "subscribers": self.subscribers,
+            "refresh_interval": self.refresh_interval,
+            "fetches": self.fetches,
+            "deltas": self.deltas,
+            "messages": self.messages,
+            "resyncs": self.resyncs,
+            "max_topics": self.max_topics,
+            "rejected": self.rejected,
+        }
@@ -1,29 +1,68 @@
 import os
-import requests
-from datetime import datetime
-from typing import Dict, Any, List, Optional
+import time
+import asyncio
+import httpx
+from typing import (
+    Dict, Any, List, Optional, Callable, Awaitable, TypeVar, TYPE_CHECKING,
+    AsyncIterable, AsyncIterator, Iterable, Union
+)
 from abc import ABC, abstractmethod
 
-from backend.src.models.weather import (
-    CurrentWeather, 
-    WeatherForecast, 
-    WeatherCondition,
-    ForecastItem,
-    GeoLocation,
-    AirQuality
+from backend.src.models.weather import GeoLocation, BatchLocation, BatchItem, BatchError
+from backend.src.models.records import (
+    POLLUTANTS,
+    CurrentRecord,
+    ForecastRecord,
+    AirQualityRecord,
+    intern_condition,
+    intern_name
+)
+from backend.src.services.http_client import create_async_client
+from backend.src.services.metrics import (
+    STAGE_DURATION,
+    UPSTREAM_ERRORS,
+    UPSTREAM_IN_FLIGHT,
+    UPSTREAM_REQUEST_DURATION
+)
+from backend.src.services.resilience import CircuitOpenError, UpstreamResilience
+from backend.src.services.rate_limit import (
+    Priority,
+    RateLimiter,
+    RateLimitExceeded,
+    request_priority,
+    retry_after_seconds
 )
+from backend.src.services.forecast_aggregation import (
+    BUCKET_HOURS,
+    ForecastColumns,
+    aggregate_forecast,
+    pack_forecast
+)
+
+if TYPE_CHECKING:
+    from backend.src.services.geocode_index import GeocodeIndex
+
+T = TypeVar("T")
+
+DEFAULT_API_ROOT = "https://api.openweathermap.org"
+
+# Default number of upstream lookups a single batch runs concurrently
+DEFAULT_BATCH_CONCURRENCY = 10
+
+MODEL_BUILD_TIMER = STAGE_DURATION.labels(stage="model_build")
+GEOCODE_TIMER = STAGE_DURATION.labels(stage="geocode")
 
 
 class WeatherProvider(ABC):
     """Abstract base class for weather providers"""
     
     @abstractmethod
-    async def get_current_weather(self, location: GeoLocation) -> CurrentWeather:
+    async def get_current_weather(self, location: GeoLocation) -> CurrentRecord:
         """Get current weather for a location"""
         pass
     
     @abstractmethod
-    async def get_forecast(self, location: GeoLocation) -> WeatherForecast:
+    async def get_forecast(self, location: GeoLocation) -> ForecastRecord:
         """Get weather forecast for a location"""
         pass
     
@@ -33,23 +72,139 @@ class WeatherProvider(ABC):
         pass
 
     @abstractmethod
-    async def get_air_quality(self, location: GeoLocation) -> AirQuality:
+    async def get_air_quality(self, location: GeoLocation) -> AirQualityRecord:
         """Get air quality data for a location"""
         pass
 
+    async def open(self) -> None:
+        """Acquire long-lived resources such as HTTP connection pools"""
+        pass
+
+    async def close(self) -> None:
+        """Release resources acquired by open()"""
+        pass
+
+
+class DelegatingWeatherProvider(WeatherProvider):
+    """Base class for providers that wrap another provider and forward calls to it"""
+
+    def __init__(self, provider: WeatherProvider):
+        self.provider = provider
+
+    async def get_current_weather(self, location: GeoLocation) -> CurrentRecord:
+        """Get current weather from the wrapped provider"""
+        return await self.provider.get_current_weather(location)
+
+    async def get_forecast(self, location: GeoLocation) -> ForecastRecord:
+        """Get weather forecast from the wrapped provider"""
+        return await self.provider.get_forecast(location)
+
+    async def geocode(self, city_name: str) -> GeoLocation:
+        """Geocode a city name with the wrapped provider"""
+        return await self.provider.geocode(city_name)
+
+    async def get_air_quality(self, location: GeoLocation) -> AirQualityRecord:
+        """Get air quality data from the wrapped provider"""
+        return await self.provider.get_air_quality(location)
+
+    async def open(self) -> None:
+        """Open the wrapped provider"""
+        await self.provider.open()
+
+    async def close(self) -> None:
+        """Close the wrapped provider"""
+        await self.provider.close()
+
 
 class OpenWeatherMapProvider(WeatherProvider):
     """Implementation of WeatherProvider using OpenWeatherMap API"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        forecast_bucket: Optional[str] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        api_root: Optional[str] = None,
+        resilience: Optional[UpstreamResilience] = None
+    ):
         self.api_key = api_key or os.getenv("OPENWEATHERMAP_API_KEY")
         if not self.api_key:
             raise ValueError("OpenWeatherMap API key is required")
+
+        self.forecast_bucket = forecast_bucket or os.getenv("FORECAST_BUCKET", "daily")
+        if self.forecast_bucket not in BUCKET_HOURS:
+            raise ValueError(f"Unsupported forecast bucket: {self.forecast_bucket}")
         
-        self.base_url = "https://api.openweathermap.org/data/2.5"
-        self.geo_url = "https://api.openweathermap.org/geo/1.0"
+        # Overridable so benchmarks can point the provider at a local stand-in
+        api_root = (api_root or os.getenv("OPENWEATHERMAP_API_ROOT", DEFAULT_API_ROOT)).rstrip("/")
+        self.base_url = f"{api_root}/data/2.5"
+        self.geo_url = f"{api_root}/geo/1.0"
+
+        # A client passed in by the caller is borrowed, not owned
+        self._client = client
+        self._owns_client = client is None
+
+        # Shared by every method so all upstream calls draw from one quota
+        self.rate_limiter = rate_limiter or RateLimiter()
+
+        # Adaptive timeouts, circuit breakers and hedging, per upstream endpoint
+        self.resilience = resilience or UpstreamResilience()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared pooled HTTP client, created on first use if open() was not called"""
+        if self._client is None or self._client.is_closed:
+            self._client = create_async_client()
+            self._owns_client = True
+        return self._client
+
+    async def open(self) -> None:
+        """Create the pooled HTTP client ahead of the first request"""
+        self.client
+
+    async def close(self) -> None:
+        """Close the pooled HTTP client if this provider created it"""
+        if self._client is None or not self._owns_client:
+            return
+        if not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    async def _get(self, url: str, params: Dict[str, Any]) -> Any:
+        """Issue a guarded GET against the upstream API and return the decoded JSON body"""
+        endpoint = url.rsplit("/", 1)[-1]
+        # The quota wait happens before each attempt is timed, so a saturated
+        # limiter is not mistaken for a slow upstream
+        return await self.resilience.call(
+            endpoint,
+            lambda timeout: self._request(url, endpoint, params, timeout),
+            acquire=self.rate_limiter.acquire
+        )
+
+    async def _request(self, url: str, endpoint: str, params: Dict[str, Any], timeout: float) -> Any:
+        """Issue one GET attempt with the given timeout; the caller has taken its rate-limit slot"""
+        in_flight = UPSTREAM_IN_FLIGHT.labels(endpoint=endpoint)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            response = await self.client.get(url, params=params, timeout=timeout)
+        except httpx.HTTPError as e:
+            UPSTREAM_ERRORS.labels(endpoint=endpoint, status=type(e).__name__).inc()
+            raise
+        finally:
+            in_flight.dec()
+            UPSTREAM_REQUEST_DURATION.labels(endpoint=endpoint).observe(time.perf_counter() - start)
+
+        if response.status_code >= 400:
+            UPSTREAM_ERRORS.labels(endpoint=endpoint, status=str(response.status_code)).inc()
+        if response.status_code == 429:
+            # Pause every queued call instead of letting them all hit 429 too
+            self.rate_limiter.backoff(retry_after_seconds(response.headers.get("Retry-After")))
+        response.raise_for_status()
+        return response.json()
     
-    async def get_current_weather(self, location: GeoLocation) -> CurrentWeather:
+    async def get_current_weather(self, location: GeoLocation) -> CurrentRecord:
         """Get current weather for a location using OpenWeatherMap API"""
         params = {
             "lat": location.lat,
@@ -58,33 +213,28 @@ class OpenWeatherMapProvider(WeatherProvider):
             "units": "metric"
         }
         
-        response = requests.get(f"{self.base_url}/weather", params=params)
-        response.raise_for_status()
-        data = response.json()
-        
-        conditions = [
-            WeatherCondition(
-                main=weather["main"],
-                description=weather["description"],
-                icon=weather["icon"]
+        data = await self._get(f"{self.base_url}/weather", params)
+
+        with MODEL_BUILD_TIMER.time():
+            conditions = tuple(
+                intern_condition(weather["main"], weather["description"], weather["icon"])
+                for weather in data["weather"]
+            )
+
+            return CurrentRecord(
+                temperature=float(data["main"]["temp"]),
+                feels_like=float(data["main"]["feels_like"]),
+                humidity=int(data["main"]["humidity"]),
+                pressure=int(data["main"]["pressure"]),
+                wind_speed=float(data["wind"]["speed"]),
+                wind_direction=int(data["wind"]["deg"]),
+                conditions=conditions,
+                city=intern_name(data["name"]),
+                country=intern_name(data["sys"]["country"]),
+                dt=int(data["dt"])
             )
-            for weather in data["weather"]
-        ]
-        
-        return CurrentWeather(
-            temperature=data["main"]["temp"],
-            feels_like=data["main"]["feels_like"],
-            humidity=data["main"]["humidity"],
-            pressure=data["main"]["pressure"],
-            wind_speed=data["wind"]["speed"],
-            wind_direction=data["wind"]["deg"],
-            conditions=conditions,
-            city=data["name"],
-            country=data["sys"]["country"],
-            timestamp=datetime.fromtimestamp(data["dt"])
-        )
     
-    async def get_forecast(self, location: GeoLocation) -> WeatherForecast:
+    async def get_forecast(self, location: GeoLocation) -> ForecastRecord:
         """Get 5-day weather forecast for a location using OpenWeatherMap API"""
         params = {
             "lat": location.lat,
@@ -93,54 +243,14 @@ class OpenWeatherMapProvider(WeatherProvider):
             "units": "metric"
         }
         
-        response = requests.get(f"{self.base_url}/forecast", params=params)
-        response.raise_for_status()
-        data = response.json()
-        
-        # Group forecast by day
-        daily_forecasts = {}
-        
-        for item in data["list"]:
-            dt = datetime.fromtimestamp(item["dt"])
-            day_key = dt.date().isoformat()
-            
-            conditions = [
-                WeatherCondition(
-                    main=weather["main"],
-                    description=weather["description"],
-                    icon=weather["icon"]
-                )
-                for weather in item["weather"]
-            ]
-            
-            if day_key not in daily_forecasts:
-                daily_forecasts[day_key] = {
-                    "date": dt,
-                    "temp_min": item["main"]["temp_min"],
-                    "temp_max": item["main"]["temp_max"],
-                    "conditions": conditions,
-                    "humidity": item["main"]["humidity"],
-                    "precipitation_chance": item.get("pop", 0) * 100,  # Convert to percentage
-                    "wind_speed": item["wind"]["speed"]
-                }
-            else:
-                # Update min/max temperatures if needed
-                daily_forecasts[day_key]["temp_min"] = min(
-                    daily_forecasts[day_key]["temp_min"], 
-                    item["main"]["temp_min"]
-                )
-                daily_forecasts[day_key]["temp_max"] = max(
-                    daily_forecasts[day_key]["temp_max"], 
-                    item["main"]["temp_max"]
-                )
-        
-        forecast_items = [ForecastItem(**forecast) for forecast in daily_forecasts.values()]
-        
-        return WeatherForecast(
-            city=data["city"]["name"],
-            country=data["city"]["country"],
-            forecast=forecast_items
-        )
+        data = await self._get(f"{self.base_url}/forecast", params)
+
+        with MODEL_BUILD_TIMER.time():
+            # Aggregate the 3-hour slots into buckets aligned to the city's local time
+            columns = ForecastColumns(data["list"], utc_offset=data["city"].get("timezone", 0))
+            aggregated = aggregate_forecast(columns, bucket_hours=BUCKET_HOURS[self.forecast_bucket])
+
+            return pack_forecast(columns, aggregated, city=data["city"]["name"], country=data["city"]["country"])
     
     async def geocode(self, city_name: str) -> GeoLocation:
         """Convert city name to coordinates using OpenWeatherMap Geocoding API"""
@@ -150,21 +260,20 @@ class OpenWeatherMapProvider(WeatherProvider):
             "appid": self.api_key
         }
         
-        response = requests.get(f"{self.geo_url}/direct", params=params)
-        response.raise_for_status()
-        data = response.json()
-        
-        if not data:
-            raise ValueError(f"City not found: {city_name}")
-        
-        return GeoLocation(
-            lat=data[0]["lat"],
-            lon=data[0]["lon"],
-            city=data[0]["name"],
-            country=data[0].get("country")
-        )
+        data = await self._get(f"{self.geo_url}/direct", params)
+
+        with MODEL_BUILD_TIMER.time():
+            if not data:
+                raise ValueError(f"City not found: {city_name}")
 
-    async def get_air_quality(self, location: GeoLocation) -> AirQuality:
+            return GeoLocation(
+                lat=data[0]["lat"],
+                lon=data[0]["lon"],
+                city=data[0]["name"],
+                country=data[0].get("country")
+            )
+
+    async def get_air_quality(self, location: GeoLocation) -> AirQualityRecord:
         """Get air quality data for a location using OpenWeatherMap API"""
         params = {
             "lat": location.lat,
@@ -172,66 +281,245 @@ class OpenWeatherMapProvider(WeatherProvider):
             "appid": self.api_key
         }
         
-        response = requests.get(f"{self.base_url}/air_pollution", params=params)
-        response.raise_for_status()
-        data = response.json()
-        
-        # Map AQI values to descriptions
-        aqi_descriptions = {
-            1: "Good",
-            2: "Fair",
-            3: "Moderate",
-            4: "Poor",
-            5: "Very Poor"
-        }
-        
-        # Extract pollutant concentrations
-        pollutants = {
-            "co": data["list"][0]["components"]["co"],  # Carbon monoxide
-            "no2": data["list"][0]["components"]["no2"],  # Nitrogen dioxide
-            "o3": data["list"][0]["components"]["o3"],  # Ozone
-            "pm2_5": data["list"][0]["components"]["pm2_5"],  # Fine particles
-            "pm10": data["list"][0]["components"]["pm10"],  # Coarse particles
-            "so2": data["list"][0]["components"]["so2"]  # Sulfur dioxide
-        }
-        
-        return AirQuality(
-            aqi=data["list"][0]["main"]["aqi"],
-            description=aqi_descriptions.get(data["list"][0]["main"]["aqi"], "Unknown"),
-            pollutants=pollutants,
-            city=location.city or "Unknown",
-            country=location.country or "Unknown",
-            timestamp=datetime.fromtimestamp(data["list"][0]["dt"])
-        )
+        data = await self._get(f"{self.base_url}/air_pollution", params)
+
+        with MODEL_BUILD_TIMER.time():
+            if not data.get("list"):
+                raise ValueError("No air quality data for location")
+            latest = max(data["list"], key=lambda entry: entry["dt"])
+            # Pollutant concentrations (CO, NO2, O3, PM2.5, PM10, SO2) in POLLUTANTS order
+            components = latest["components"]
+            pollutants = tuple(float(components.get(name, "nan")) for name in POLLUTANTS)
+
+            return AirQualityRecord(
+                aqi=int(latest["main"]["aqi"]),
+                pollutants=pollutants,
+                city=intern_name(location.city or "Unknown"),
+                country=intern_name(location.country or "Unknown"),
+                dt=int(latest["dt"]),
+                analysis=None
+            )
 
 
 class WeatherService:
     """Service for retrieving weather information"""
     
-    def __init__(self, provider: WeatherProvider):
+    def __init__(
+        self,
+        provider: WeatherProvider,
+        geocode_index: Optional["GeocodeIndex"] = None,
+        batch_concurrency: Optional[int] = None
+    ):
         self.provider = provider
+        self.geocode_index = geocode_index
+        self.batch_concurrency = batch_concurrency or int(
+            os.getenv("BATCH_MAX_CONCURRENCY", DEFAULT_BATCH_CONCURRENCY)
+        )
+
+    async def open(self) -> None:
+        """Open the underlying provider's resources"""
+        await self.provider.open()
+
+    async def close(self) -> None:
+        """Close the underlying provider's resources"""
+        await self.provider.close()
     
-    async def get_current_weather_by_city(self, city: str) -> CurrentWeather:
+    async def geocode(self, city: str) -> GeoLocation:
+        """
+        Resolve a city name, answering from the local geocode index when possible.
+        Index reads and writes are SQLite calls, so they run in a worker thread.
+        """
+        with GEOCODE_TIMER.time():
+            if self.geocode_index is not None:
+                location = await asyncio.to_thread(self.geocode_index.get, city)
+                if location is not None:
+                    return location
+
+            location = await self.provider.geocode(city)
+            if self.geocode_index is not None:
+                await asyncio.to_thread(self.geocode_index.put, city, location)
+            return location
+
+    async def get_current_weather_by_city(self, city: str) -> CurrentRecord:
         """Get current weather for a city"""
-        location = await self.provider.geocode(city)
+        location = await self.geocode(city)
         return await self.provider.get_current_weather(location)
     
-    async def get_current_weather_by_coordinates(self, lat: float, lon: float) -> CurrentWeather:
+    async def get_current_weather_by_coordinates(self, lat: float, lon: float) -> CurrentRecord:
         """Get current weather for coordinates"""
         location = GeoLocation(lat=lat, lon=lon)
         return await self.provider.get_current_weather(location)
     
-    async def get_forecast_by_city(self, city: str) -> WeatherForecast:
+    async def get_forecast_by_city(self, city: str) -> ForecastRecord:
         """Get weather forecast for a city"""
-        location = await self.provider.geocode(city)
+        location = await self.geocode(city)
         return await self.provider.get_forecast(location)
 
-    async def get_air_quality_by_city(self, city: str) -> AirQuality:
+    async def get_air_quality_by_city(self, city: str) -> AirQualityRecord:
         """Get air quality data for a city"""
-        location = await self.provider.geocode(city)
+        location = await self.geocode(city)
         return await self.provider.get_air_quality(location)
     
-    async def get_air_quality_by_coordinates(self, lat: float, lon: float) -> AirQuality:
+    async def get_air_quality_by_coordinates(self, lat: float, lon: float) -> AirQualityRecord:
         """Get air quality data for coordinates"""
         location = GeoLocation(lat=lat, lon=lon)
         return await self.provider.get_air_quality(location)
+
+    async def get_current_weather_batch(
+        self, locations: List[BatchLocation], max_concurrency: Optional[int] = None
+    ) -> List[BatchItem]:
+        """Get current weather for many locations, one result or error per location"""
+        return await self._run_batch(
+            locations,
+            self.get_current_weather_by_city,
+            self.get_current_weather_by_coordinates,
+            max_concurrency
+        )
+
+    async def get_forecast_batch(
+        self, locations: List[BatchLocation], max_concurrency: Optional[int] = None
+    ) -> List[BatchItem]:
+        """Get weather forecasts for many locations, one result or error per location"""
+        return await self._run_batch(
+            locations,
+            self.get_forecast_by_city,
+            self._get_forecast_by_coordinates,
+            max_concurrency
+        )
+
+    async def get_air_quality_batch(
+        self, locations: List[BatchLocation], max_concurrency: Optional[int] = None
+    ) -> List[BatchItem]:
+        """Get air quality data for many locations, one result or error per location"""
+        return await self._run_batch(
+            locations,
+            self.get_air_quality_by_city,
+            self.get_air_quality_by_coordinates,
+            max_concurrency
+        )
+
+    async def stream_forecasts(
+        self,
+        locations: Union[Iterable[BatchLocation], AsyncIterable[BatchLocation]],
+        max_concurrency: Optional[int] = None
+    ) -> AsyncIterator[BatchItem]:
+        """
+        Yield a forecast result or error per location as lookups complete.
+        Unlike get_forecast_batch, results arrive in completion order and only
+        a bounded window of locations is read ahead, so any number of
+        locations can be streamed in constant memory.
+        """
+        stream = self._stream_batch(
+            locations,
+            self.get_forecast_by_city,
+            self._get_forecast_by_coordinates,
+            max_concurrency
+        )
+        try:
+            async for item in stream:
+                yield item
+        finally:
+            # Close the inner stream (and cancel its lookups) as soon as this one is closed
+            await stream.aclose()
+
+    async def _get_forecast_by_coordinates(self, lat: float, lon: float) -> ForecastRecord:
+        return await self.provider.get_forecast(GeoLocation(lat=lat, lon=lon))
+
+    async def _lookup_item(
+        self,
+        location: BatchLocation,
+        by_city: Callable[[str], Awaitable[T]],
+        by_coordinates: Callable[[float, float], Awaitable[T]]
+    ) -> BatchItem:
+        """Look one batch location up, turning failures into a per-item error"""
+        try:
+            # Batch lookups yield upstream quota to interactive requests
+            with request_priority(Priority.BATCH):
+                if location.city:
+                    result = await by_city(location.city)
+                else:
+                    result = await by_coordinates(location.lat, location.lon)
+        except ValueError as e:
+            return BatchItem(location=location, error=BatchError(status_code=404, detail=str(e)))
+        except (RateLimitExceeded, CircuitOpenError) as e:
+            return BatchItem(location=location, error=BatchError(status_code=503, detail=str(e)))
+        except Exception as e:
+            return BatchItem(location=location, error=BatchError(status_code=500, detail=str(e)))
+        return BatchItem(location=location, result=result)
+
+    async def _run_batch(
+        self,
+        locations: List[BatchLocation],
+        by_city: Callable[[str], Awaitable[T]],
+        by_coordinates: Callable[[float, float], Awaitable[T]],
+        max_concurrency: Optional[int]
+    ) -> List[BatchItem]:
+        """
+        Fan lookups out concurrently, bounded by a semaphore, preserving input order.
+        Item results are internal records; the API converts them with public_batch().
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.batch_concurrency)
+
+        async def run_one(location: BatchLocation) -> BatchItem:
+            async with semaphore:
+                return await self._lookup_item(location, by_city, by_coordinates)
+
+        return list(await asyncio.gather(*(run_one(location) for location in locations)))
+
+    async def _stream_batch(
+        self,
+        locations: Union[Iterable[BatchLocation], AsyncIterable[BatchLocation]],
+        by_city: Callable[[str], Awaitable[T]],
+        by_coordinates: Callable[[float, float], Awaitable[T]],
+        max_concurrency: Optional[int]
+    ) -> AsyncIterator[BatchItem]:
+        """
+        Run lookups on a fixed pool of workers and yield items as they finish.
+        Both the locations read ahead and the finished items waiting for the
+        consumer are held in queues of the pool's size, so a slow consumer
+        stalls the workers instead of letting results pile up in memory.
+        Stopping iteration early cancels the lookups still in flight.
+        """
+        concurrency = max_concurrency or self.batch_concurrency
+        pending: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+        finished: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+        done = object()
+
+        async def feed() -> None:
+            try:
+                if isinstance(locations, AsyncIterable):
+                    async for location in locations:
+                        await pending.put(location)
+                else:
+                    for location in locations:
+                        await pending.put(location)
+            except Exception as e:
+                # Surface a failing location source to the consumer
+                await finished.put(e)
+            for _ in range(concurrency):
+                await pending.put(done)
+
+        async def work() -> None:
+            while True:
+                location = await pending.get()
+                if location is done:
+                    await finished.put(done)
+                    return
+                await finished.put(await self._lookup_item(location, by_city, by_coordinates))
+
+        tasks = [asyncio.ensure_future(feed())]
+        tasks.extend(asyncio.ensure_future(work()) for _ in range(concurrency))
+        try:
+            remaining = concurrency
+            while remaining:
+                item = await finished.get()
+                if item is done:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
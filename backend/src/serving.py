@@ -0,0 +1,40 @@
+import os
+from typing import Optional
+
+import uvicorn
+
+# Seconds a worker gets to finish in-flight requests after SIGTERM / SIGHUP
+DEFAULT_GRACEFUL_TIMEOUT = 30
+
+
+def worker_count() -> int:
+    """Number of worker processes serving the app, from WEB_CONCURRENCY"""
+    return max(1, int(os.getenv("WEB_CONCURRENCY", 1)))
+
+
+def serve(
+    app,
+    host: str,
+    port: int,
+    ssl_keyfile: Optional[str] = None,
+    ssl_certfile: Optional[str] = None,
+) -> None:
+    """
+    Run the app under uvicorn.
+    With WEB_CONCURRENCY above 1 uvicorn supervises that many worker
+    processes; production deployments should prefer gunicorn with
+    backend/gunicorn.conf.py, which adds graceful reloads on SIGHUP.
+    """
+    workers = worker_count()
+    options = dict(
+        host=host,
+        port=port,
+        ssl_keyfile=ssl_keyfile,
+        ssl_certfile=ssl_certfile,
+        timeout_graceful_shutdown=int(os.getenv("GRACEFUL_TIMEOUT", DEFAULT_GRACEFUL_TIMEOUT)),
+    )
+    if workers > 1:
+        # Workers import the app themselves, so it must be passed by import path
+        uvicorn.run("backend.src.main:app", workers=workers, **options)
+    else:
+        uvicorn.run(app, **options)
@@ -0,0 +1,117 @@
+import math
+
+import numpy as np
+import pytest
+
+from backend.src.models.records import POLLUTANTS, AirQualityRecord, from_model, to_model
+from backend.src.models.weather import GeoLocation
+from backend.src.services.aqi import (
+    EU_CAQI,
+    US_EPA,
+    AirQualityAnalyticsProvider,
+    analyze_series,
+    index_map,
+    rolling_mean
+)
+from backend.src.services.history import ObservationStore
+from backend.src.tests.test_weather_service import MockWeatherProvider
+
+LONDON = GeoLocation(lat=51.5085, lon=-0.1257, city="London", country="GB")
+
+NAN = math.nan
+
+# 70 ppb of ozone in µg/m³
+O3_70_PPB = 70 * 48.00 / 24.45
+
+
+def test_us_epa_breakpoints_and_unit_conversion():
+    concentrations = np.array([
+        [NAN, NAN, O3_70_PPB, 35.4, 154.0, NAN],
+        [NAN, NAN, NAN, 35.45, 0.0, NAN],
+        [NAN, NAN, NAN, 1000.0, NAN, NAN],
+    ])
+
+    indices = US_EPA.sub_indices(concentrations)
+
+    np.testing.assert_array_equal(indices[0, 2:5], [100, 100, 100])
+    assert math.isnan(indices[0, 0])
+    # PM2.5 is truncated to 0.1 µg/m³, so 35.45 still falls in the moderate band
+    assert indices[1, 3] == 100
+    assert indices[2, 3] == 500
+
+
+def test_eu_caqi_interpolates_and_extrapolates():
+    concentrations = np.array([[0.0, 75.0, 60.0, 110.0, 270.0, NAN]])
+
+    indices = EU_CAQI.sub_indices(concentrations)
+
+    np.testing.assert_allclose(indices[0, :5], [0.0, 37.5, 25.0, 100.0, 125.0])
+    assert math.isnan(indices[0, 5])
+
+
+def test_rolling_mean_covers_window_and_skips_missing_values():
+    timestamps = np.array([0, 3600, 7200, 10800])
+    values = np.array([[1.0], [NAN], [3.0], [5.0]])
+
+    means = rolling_mean(timestamps, values, 2 * 3600)
+
+    np.testing.assert_allclose(means[:, 0], [1.0, 1.0, 3.0, 4.0])
+
+
+def test_analyze_series_averages_per_pollutant_window():
+    timestamps = np.arange(48) * 3600
+    concentrations = np.tile([100.0, 10.0, 50.0, 10.0, 20.0, 5.0], (48, 1))
+    concentrations[-1] = [100.0, 200.0, 50.0, 250.0, 20.0, 5.0]
+
+    series = analyze_series(timestamps[::-1], concentrations[::-1])
+
+    latest = dict(zip(POLLUTANTS, series.averages[-1]))
+    assert series.timestamps[-1] == timestamps[-1]
+    # One-hour pollutants are not averaged, PM2.5 is averaged over 24 hours
+    assert latest["no2"] == 200.0
+    assert latest["pm2_5"] == pytest.approx((23 * 10.0 + 250.0) / 24)
+    assert series.us_epa[-1][POLLUTANTS.index("pm2_5")] == US_EPA.sub_indices(
+        np.array([NAN, NAN, NAN, latest["pm2_5"], NAN, NAN])
+    )[3]
+
+
+def test_index_map_over_many_points():
+    rng = np.random.default_rng(0)
+    grid = rng.uniform(0, 200, size=(100, 100, len(POLLUTANTS)))
+    grid[0, 0] = NAN
+
+    values, dominant = index_map(grid)
+
+    assert values.shape == dominant.shape == (100, 100)
+    assert math.isnan(values[0, 0]) and dominant[0, 0] == -1
+    point = US_EPA.sub_indices(grid[5, 7])
+    assert values[5, 7] == np.max(point)
+    assert dominant[5, 7] == np.argmax(point)
+    with pytest.raises(ValueError):
+        index_map(grid, scale="unknown")
+
+
+@pytest.mark.asyncio
+async def test_analytics_provider_uses_recorded_history():
+    store = ObservationStore()
+    latest = await MockWeatherProvider().get_air_quality(LONDON)
+    recorded = [
+        AirQualityRecord(
+            aqi=1, pollutants=(NAN, NAN, NAN, 1.0, NAN, NAN), city="London", country="GB",
+            dt=latest.dt - hours * 3600, analysis=None
+        )
+        for hours in (1, 2, 30)
+    ]
+    store.write([], [store.air_quality_row(LONDON, record) for record in recorded])
+
+    record = await AirQualityAnalyticsProvider(MockWeatherProvider(), store).get_air_quality(LONDON)
+
+    pm2_5 = POLLUTANTS.index("pm2_5")
+    # The observation from 30 hours ago is outside the 24-hour window
+    assert record.analysis.averages[pm2_5] == pytest.approx((2 * 1.0 + latest.pollutants[pm2_5]) / 3)
+
+    model = to_model(record)
+    assert model.indices["us_epa"].dominant_pollutant in POLLUTANTS
+    assert "pm2_5_24h" in model.averages
+    # The analysis survives the model round trip used by the shared cache
+    assert to_model(from_model(model)).model_dump() == model.model_dump()
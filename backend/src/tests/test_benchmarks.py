@@ -0,0 +1,82 @@
+import json
+
+import httpx
+import pytest
+
+from backend.benchmarks.fake_owm import FakeUpstreamConfig, create_app
+from backend.benchmarks.loadtest import CITIES_FILE, Sample, Workload, summarize
+from backend.src.models.records import to_model
+from backend.src.models.weather import GeoLocation
+from backend.src.services.resilience import CircuitBreaker, UpstreamResilience
+from backend.src.services.weather_service import OpenWeatherMapProvider
+
+
+def make_provider(config: FakeUpstreamConfig) -> OpenWeatherMapProvider:
+    transport = httpx.ASGITransport(app=create_app(config))
+    client = httpx.AsyncClient(transport=transport, base_url="http://fake-owm")
+    # Every injected error should surface: no retries, hedges or tripped breakers
+    resilience = UpstreamResilience(
+        hedge=False, retries=0, breaker_factory=lambda name: CircuitBreaker(name, min_calls=1000)
+    )
+    return OpenWeatherMapProvider(
+        api_key="test-key", client=client, api_root="http://fake-owm", resilience=resilience
+    )
+
+
+@pytest.mark.asyncio
+async def test_provider_parses_replayed_payloads():
+    provider = make_provider(FakeUpstreamConfig(latency_ms=0, jitter_ms=0))
+
+    location = await provider.geocode("London")
+    current = await provider.get_current_weather(location)
+    forecast = to_model(await provider.get_forecast(location))
+    air_quality = await provider.get_air_quality(location)
+
+    assert location == GeoLocation(lat=51.5085, lon=-0.1257, city="London", country="GB")
+    assert current.city == "London"
+    assert len(forecast.forecast) >= 5
+    assert 1 <= air_quality.aqi <= 5
+    with pytest.raises(ValueError):
+        await provider.geocode("Atlantis")
+
+
+@pytest.mark.asyncio
+async def test_error_injection_is_seeded():
+    async def statuses(seed: int):
+        provider = make_provider(FakeUpstreamConfig(latency_ms=0, jitter_ms=0, error_rate=0.3, seed=seed))
+        seen = []
+        for _ in range(20):
+            try:
+                await provider.get_current_weather(GeoLocation(lat=1, lon=2))
+                seen.append(200)
+            except httpx.HTTPStatusError as e:
+                seen.append(e.response.status_code)
+        return seen
+
+    first = await statuses(seed=7)
+
+    assert first == await statuses(seed=7)
+    assert 500 in first and 200 in first
+
+
+def test_workload_is_deterministic_and_skewed():
+    with open(CITIES_FILE) as f:
+        cities = json.load(f)
+
+    workload, replay = Workload(cities, seed=3), Workload(cities, seed=3)
+    requests = [workload.next_request() for _ in range(2000)]
+
+    assert requests == [replay.next_request() for _ in range(2000)]
+    names = [params.get("city") for _, _, params in requests if "city" in params]
+    assert names.count("Tokyo") > names.count("Reykjavik")
+
+
+def test_summarize_percentiles():
+    samples = [Sample("current", 200, ms / 1000) for ms in range(1, 101)] + [Sample("geocode", 500, 0.5)]
+
+    summary = summarize(samples, elapsed=2.0)
+
+    assert summary["current"]["requests"] == 100
+    assert summary["current"]["p50_ms"] == pytest.approx(50.5)
+    assert summary["geocode"]["errors"] == 1
+    assert summary["all"]["rps"] == pytest.approx(50.5)
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from backend.src.models.weather import GeoLocation
+from backend.src.services.cache import TTLCache, CachingWeatherProvider
+from backend.src.tests.test_weather_service import MockWeatherProvider
+
+
+class CountingProvider(MockWeatherProvider):
+    def __init__(self):
+        self.calls = {}
+
+    def _count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    async def get_current_weather(self, location):
+        self._count("current")
+        return await super().get_current_weather(location)
+
+    async def geocode(self, city_name):
+        self._count("geocode")
+        return await super().geocode(city_name)
+
+
+def test_ttl_cache_lru_eviction():
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_expiry(monkeypatch):
+    cache = TTLCache()
+    cache.set("a", 1, ttl=10)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_caching_provider_serves_repeat_calls_from_cache():
+    inner = CountingProvider()
+    provider = CachingWeatherProvider(inner)
+    location = GeoLocation(lat=35.12, lon=-106.59)
+
+    await provider.get_current_weather(location)
+    await provider.get_current_weather(GeoLocation(lat=35.120001, lon=-106.59))
+
+    assert inner.calls["current"] == 1
+    assert provider.stats()["hits"] == 1
+    assert provider.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_caching_provider_normalizes_city_names():
+    inner = CountingProvider()
+    provider = CachingWeatherProvider(inner)
+
+    await provider.geocode("Test City")
+    await provider.geocode("  test   CITY ")
+
+    assert inner.calls["geocode"] == 1
+
+
+@pytest.mark.asyncio
+async def test_caching_provider_does_not_cache_failures():
+    inner = CountingProvider()
+    provider = CachingWeatherProvider(inner)
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            await provider.geocode("Nowhere")
+
+    assert inner.calls["geocode"] == 2
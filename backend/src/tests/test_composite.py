@@ -0,0 +1,144 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.src.main import app
+from backend.src.api.dependencies import get_upstream_provider
+from backend.src.auth.dependencies import get_current_active_user
+from backend.src.models.records import to_model
+from backend.src.models.user import User
+from backend.src.models.weather import GeoLocation
+from backend.src.services.composite import Backend, CompositeWeatherProvider
+from backend.src.services.local_provider import LocalDatasetProvider
+from backend.src.services.resilience import CircuitOpenError
+from backend.src.tests.test_weather_service import MockWeatherProvider
+
+
+LONDON = GeoLocation(lat=51.5085, lon=-0.1257, city="London", country="GB")
+
+
+class DelayedProvider(MockWeatherProvider):
+    def __init__(self, delay=0.0, error=None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def get_current_weather(self, location):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return await super().get_current_weather(location)
+
+    async def get_forecast(self, location):
+        return await self.get_current_weather(location)
+
+
+@pytest.mark.asyncio
+async def test_local_provider_answers_from_nearest_station():
+    provider = LocalDatasetProvider()
+
+    location = await provider.geocode("london")
+    current = await provider.get_current_weather(GeoLocation(lat=51.5, lon=-0.12))
+    forecast = to_model(await provider.get_forecast(location))
+
+    assert location.country == "GB"
+    assert (await provider.geocode("Paris, FR")).country == "FR"
+    with pytest.raises(ValueError):
+        await provider.geocode("Paris, TX")
+    assert current.city == "London"
+    assert len(forecast.forecast) == 5
+    assert forecast.forecast[0].date.utcoffset().total_seconds() == 3600
+    with pytest.raises(ValueError):
+        await provider.get_current_weather(GeoLocation(lat=0, lon=-140))
+
+
+@pytest.mark.asyncio
+async def test_routes_to_faster_backend():
+    slow, fast = DelayedProvider(delay=0.02), DelayedProvider()
+    composite = CompositeWeatherProvider([Backend("slow", slow), Backend("fast", fast)], race_methods=())
+
+    for _ in range(5):
+        await composite.get_forecast(LONDON)
+
+    assert [backend.name for backend in composite.ranked("get_forecast")] == ["fast", "slow"]
+    assert slow.calls == 1
+    assert fast.calls == 4
+
+
+@pytest.mark.asyncio
+async def test_race_takes_first_good_answer():
+    slow, failing = DelayedProvider(delay=0.05), DelayedProvider(error=httpx.ConnectError("down"))
+    composite = CompositeWeatherProvider(
+        [Backend("failing", failing), Backend("slow", slow)], race_methods=("get_current_weather",)
+    )
+
+    result = await composite.get_current_weather(LONDON)
+
+    assert result.city == "Test City"
+    stats = composite.stats()
+    assert stats["races"] == 1
+    assert stats["backends"]["slow"]["get_current_weather"]["race_wins"] == 1
+    assert stats["backends"]["failing"]["get_current_weather"]["failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_local_dataset_on_failure():
+    down = DelayedProvider(error=CircuitOpenError("weather", retry_after=30))
+    composite = CompositeWeatherProvider(
+        [Backend("openweathermap", down), Backend("local", LocalDatasetProvider(), fallback_only=True)],
+        race_methods=(),
+    )
+
+    result = await composite.get_current_weather(LONDON)
+
+    assert result.city == "London"
+    assert composite.stats()["fallbacks"] == 1
+
+
+@pytest.mark.asyncio
+async def test_outage_is_reported_over_not_found():
+    down = DelayedProvider(error=CircuitOpenError("weather", retry_after=30))
+    composite = CompositeWeatherProvider(
+        [Backend("openweathermap", down), Backend("local", LocalDatasetProvider(), fallback_only=True)],
+        race_methods=(),
+    )
+
+    with pytest.raises(CircuitOpenError):
+        await composite.get_current_weather(GeoLocation(lat=0, lon=-140))
+
+
+def test_local_fallback_is_opt_in(monkeypatch):
+    monkeypatch.setenv("OPENWEATHERMAP_API_KEY", "test-key")
+    monkeypatch.delenv("WEATHER_PROVIDERS", raising=False)
+    monkeypatch.delenv("WEATHER_FALLBACK_PROVIDERS", raising=False)
+    get_upstream_provider.cache_clear()
+    try:
+        default = get_upstream_provider()
+        get_upstream_provider.cache_clear()
+        monkeypatch.setenv("WEATHER_FALLBACK_PROVIDERS", "local")
+        with_fallback = get_upstream_provider()
+    finally:
+        get_upstream_provider.cache_clear()
+
+    assert not isinstance(default, CompositeWeatherProvider)
+    assert [(b.name, b.fallback_only) for b in with_fallback.backends] == [
+        ("openweathermap", False), ("local", True)
+    ]
+
+
+def test_provider_routing_requires_authentication():
+    provider = CompositeWeatherProvider([Backend("fast", DelayedProvider()), Backend("slow", DelayedProvider())])
+    app.dependency_overrides[get_upstream_provider] = lambda: provider
+    try:
+        anonymous = TestClient(app).get("/weather/providers")
+        app.dependency_overrides[get_current_active_user] = lambda: User(username="operator")
+        signed_in = TestClient(app).get("/weather/providers")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert anonymous.status_code == 401
+    assert signed_in.status_code == 200
+    assert signed_in.json()["providers"] == ["fast", "slow"]
@@ -0,0 +1,89 @@
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.src.main import app
+from backend.src.api import conditional
+from backend.src.api.conditional import MIN_MAX_AGE, REFRESH_INTERVALS, max_age, observation_etag
+from backend.src.api.dependencies import get_weather_service
+from backend.src.services.cache import CachingWeatherProvider
+from backend.src.services.weather_service import WeatherService
+from backend.src.tests.test_cache import CountingProvider
+
+
+@pytest.fixture
+def client():
+    upstream = CountingProvider()
+    service = WeatherService(provider=CachingWeatherProvider(upstream))
+    app.dependency_overrides[get_weather_service] = lambda: service
+    yield TestClient(app), upstream
+    app.dependency_overrides.clear()
+
+
+def test_max_age_counts_down_from_observation():
+    interval = REFRESH_INTERVALS["current"]
+    observed = datetime.fromtimestamp(time.time() - 100, tz=timezone.utc)
+
+    assert interval - 101 <= max_age("current", observed) <= interval - 100
+    assert max_age("current", datetime(2000, 1, 1, tzinfo=timezone.utc)) == MIN_MAX_AGE
+    assert max_age("forecast") == REFRESH_INTERVALS["forecast"]
+
+
+def test_response_carries_validators(client):
+    http, _ = client
+
+    response = http.get("/weather/current", params={"lat": 1, "lon": 2})
+
+    assert response.status_code == 200
+    assert response.headers["cache-control"].startswith("public, max-age=")
+    assert response.headers["last-modified"].endswith("GMT")
+    # The ETag is derived from the same observation time as Last-Modified
+    last_modified = parsedate_to_datetime(response.headers["last-modified"])
+    assert response.headers["etag"] == observation_etag("current", last_modified)
+
+
+def test_if_none_match_returns_304_from_cache(client, monkeypatch):
+    http, upstream = client
+    first = http.get("/weather/current", params={"lat": 1, "lon": 2})
+
+    def unexpected(record):
+        raise AssertionError("a 304 must not build the response body")
+
+    monkeypatch.setattr(conditional, "public_model", unexpected)
+    response = http.get(
+        "/weather/current", params={"lat": 1, "lon": 2}, headers={"If-None-Match": first.headers["etag"]}
+    )
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == first.headers["etag"]
+    assert upstream.calls == {"current": 1}
+
+
+def test_if_modified_since(client):
+    http, _ = client
+    first = http.get("/weather/current", params={"lat": 1, "lon": 2})
+
+    unchanged = http.get(
+        "/weather/current", params={"lat": 1, "lon": 2}, headers={"If-Modified-Since": first.headers["last-modified"]}
+    )
+    changed = http.get(
+        "/weather/current", params={"lat": 1, "lon": 2}, headers={"If-Modified-Since": "Sat, 01 Jan 2000 00:00:00 GMT"}
+    )
+
+    assert unchanged.status_code == 304
+    assert changed.status_code == 200
+
+
+def test_stale_etag_gets_full_response(client):
+    http, _ = client
+
+    response = http.get("/weather/geocode", params={"city": "Test City"}, headers={"If-None-Match": '"0000"'})
+
+    assert response.status_code == 200
+    assert response.json()["city"] == "Test City"
+    assert response.headers["etag"].startswith('"')
+    assert "last-modified" not in response.headers
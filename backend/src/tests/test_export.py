@@ -0,0 +1,188 @@
+import asyncio
+import csv
+import io
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.src.main import app
+from backend.src.api.dependencies import get_weather_service
+from backend.src.auth.dependencies import get_current_active_user
+from backend.src.models.user import User
+from backend.src.models.weather import BatchLocation, GeoLocation
+from backend.src.services import export
+from backend.src.services.export import LocationListError, iter_locations, spool_upload
+from backend.src.services.weather_service import WeatherService
+from backend.src.tests.test_weather_service import MockWeatherProvider
+
+
+class SlowForecastProvider(MockWeatherProvider):
+    """Forecast lookups that take a while and fail for a city named Nowhere"""
+
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.started = 0
+
+    async def get_forecast(self, location):
+        self.started += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            return await super().get_forecast(location)
+        finally:
+            self.in_flight -= 1
+
+    async def geocode(self, city_name):
+        if city_name == "Nowhere":
+            raise ValueError(f"City not found: {city_name}")
+        return GeoLocation(lat=1, lon=2, city=city_name)
+
+
+@pytest.fixture
+def client():
+    provider = SlowForecastProvider(delay=0)
+    app.dependency_overrides[get_weather_service] = lambda: WeatherService(provider=provider)
+    app.dependency_overrides[get_current_active_user] = lambda: User(username="analyst")
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_stream_forecasts_bounds_concurrency():
+    provider = SlowForecastProvider()
+    service = WeatherService(provider=provider)
+    locations = (BatchLocation(lat=i % 90, lon=0) for i in range(40))
+
+    items = [item async for item in service.stream_forecasts(locations, max_concurrency=4)]
+
+    assert len(items) == 40
+    assert all(item.result is not None for item in items)
+    assert provider.max_in_flight == 4
+
+
+@pytest.mark.asyncio
+async def test_stream_forecasts_stops_reading_ahead_when_consumer_stops():
+    provider = SlowForecastProvider()
+    service = WeatherService(provider=provider)
+    locations = (BatchLocation(city=f"City {i}") for i in range(10_000))
+
+    stream = service.stream_forecasts(locations, max_concurrency=4)
+    async for _ in stream:
+        break
+    await stream.aclose()
+
+    # Only the worker pool plus the bounded queues ever get started
+    assert provider.started <= 4 * 3
+    assert provider.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_forecasts_reports_errors_per_item():
+    service = WeatherService(provider=SlowForecastProvider(delay=0))
+
+    items = [item async for item in service.stream_forecasts([BatchLocation(city="Nowhere")])]
+
+    assert items[0].error.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_spool_upload_writes_in_batches(monkeypatch):
+    monkeypatch.setattr(export, "SPOOL_WRITE_BYTES", 16)
+
+    async def chunks():
+        for i in range(20):
+            yield f"City {i}\n".encode()
+
+    text = await spool_upload(chunks())
+    try:
+        assert [location.city for location in iter_locations(text, "text/plain")] == [f"City {i}" for i in range(20)]
+    finally:
+        text.close()
+
+
+def test_iter_locations_parses_each_format():
+    plain = list(iter_locations(io.StringIO("London\n\n# skipped\nParis, FR\n"), "text/plain"))
+    table = list(iter_locations(io.StringIO("city,lat,lon\nLondon,,\n,48.85,2.35\n"), "text/csv"))
+    ndjson = list(iter_locations(io.StringIO('{"city": "Oslo"}\n{"lat": 1, "lon": 2}\n'), "application/x-ndjson"))
+
+    assert [location.city for location in plain] == ["London", "Paris, FR"]
+    assert table[0].city == "London" and table[1].lat == 48.85
+    assert ndjson[1].lon == 2
+
+    with pytest.raises(LocationListError) as excinfo:
+        list(iter_locations(io.StringIO('{"city": "Oslo"}\n{"lat": 100, "lon": 2}\n'), "application/x-ndjson"))
+    assert excinfo.value.line == 2
+
+
+def test_export_streams_ndjson_rows(client):
+    response = client.post(
+        "/weather/forecast/export",
+        content="London\nNowhere\nParis\n",
+        headers={"Content-Type": "text/plain"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["x-export-locations"] == "3"
+    rows = [orjson.loads(line) for line in response.text.splitlines()]
+    assert sorted(row["query_city"] for row in rows) == ["London", "Nowhere", "Paris"]
+    error = next(row for row in rows if row["query_city"] == "Nowhere")
+    assert error["error_status"] == 404
+    assert next(row for row in rows if row["query_city"] == "Paris")["temp_max"] == 25.3
+
+
+def test_export_streams_csv_with_header(client):
+    response = client.post(
+        "/weather/forecast/export",
+        params={"format": "csv"},
+        content="lat,lon\n51.5,-0.12\n",
+        headers={"Content-Type": "text/csv"},
+    )
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert response.headers["content-type"].startswith("text/csv")
+    assert rows[0]["query_lat"] == "51.5"
+    assert rows[0]["city"] == "Test City"
+
+
+def test_export_rejects_bad_lists_before_streaming(client):
+    bad = client.post(
+        "/weather/forecast/export", content="name\nLondon\n", headers={"Content-Type": "text/csv"}
+    )
+    unsupported = client.post(
+        "/weather/forecast/export", content="<cities/>", headers={"Content-Type": "application/xml"}
+    )
+    missing = client.post("/weather/forecast/export", params={"list": "../secrets"})
+
+    assert bad.status_code == 400
+    assert unsupported.status_code == 415
+    assert missing.status_code == 404
+
+
+def test_export_reads_named_city_list(client, tmp_path, monkeypatch):
+    (tmp_path / "capitals.txt").write_text("London\nParis\n")
+    monkeypatch.setenv("EXPORT_CITY_LIST_DIR", str(tmp_path))
+
+    response = client.post("/weather/forecast/export", params={"list": "capitals"})
+
+    assert response.status_code == 200
+    assert response.headers["x-export-locations"] == "2"
+
+
+def test_export_rejects_oversized_lists(client, monkeypatch):
+    monkeypatch.setenv("EXPORT_MAX_UPLOAD_BYTES", "64")
+    monkeypatch.setenv("EXPORT_MAX_LOCATIONS", "3")
+
+    too_long = client.post(
+        "/weather/forecast/export", content="London\nParis\nRome\nOslo\n", headers={"Content-Type": "text/plain"}
+    )
+    too_big = client.post(
+        "/weather/forecast/export", content="London\n" * 20, headers={"Content-Type": "text/plain"}
+    )
+
+    assert too_long.status_code == 413
+    assert too_big.status_code == 413
@@ -0,0 +1,66 @@
+import numpy as np
+
+from backend.src.services.forecast_aggregation import (
+    ForecastColumns,
+    aggregate_forecast,
+    to_forecast_items
+)
+
+
+def make_slot(dt, temp, condition="Clear", humidity=50, wind=3.0, pop=0.0):
+    return {
+        "dt": dt,
+        "main": {"temp": temp, "temp_min": temp - 1, "temp_max": temp + 1, "humidity": humidity},
+        "weather": [{"main": condition, "description": condition.lower(), "icon": "01d"}],
+        "wind": {"speed": wind},
+        "pop": pop,
+    }
+
+
+# 2023-11-14 00:00:00 UTC
+MIDNIGHT_UTC = 1699920000
+
+
+def test_daily_buckets_follow_city_utc_offset():
+    slots = [make_slot(MIDNIGHT_UTC + hours * 3600, 10 + hours) for hours in range(0, 24, 3)]
+
+    utc = aggregate_forecast(ForecastColumns(slots, utc_offset=0), bucket_hours=24)
+    plus_five = aggregate_forecast(ForecastColumns(slots, utc_offset=5 * 3600), bucket_hours=24)
+
+    assert list(utc["slots"]) == [8]
+    # At UTC+5 the 21:00 UTC slot is 02:00 on the next local day
+    assert list(plus_five["slots"]) == [7, 1]
+
+
+def test_summaries_match_reference_statistics():
+    temps = [12.0, 15.0, 9.0, 20.0, 18.0, 11.0, 14.0, 16.0]
+    slots = [
+        make_slot(MIDNIGHT_UTC + i * 3 * 3600, t, condition="Rain" if i % 3 else "Clouds", pop=i / 10)
+        for i, t in enumerate(temps)
+    ]
+
+    aggregated = aggregate_forecast(ForecastColumns(slots), bucket_hours=24)
+
+    assert aggregated["temp_min"][0] == min(temps) - 1
+    assert aggregated["temp_max"][0] == max(temps) + 1
+    assert np.isclose(aggregated["temp_mean"][0], np.mean(temps))
+    assert np.isclose(aggregated["temp_p90"][0], np.percentile(temps, 90))
+    assert np.isclose(aggregated["pop_max"][0], 0.7)
+
+    item = to_forecast_items(ForecastColumns(slots), aggregated)[0]
+    assert item["conditions"][0]["main"] == "Rain"
+    assert item["precipitation_chance"] == 70.0
+
+
+def test_many_forecasts_aggregate_in_one_pass():
+    forecasts = [
+        ([make_slot(MIDNIGHT_UTC + h * 3600, city + h) for h in range(0, 48, 3)], 0)
+        for city in range(50)
+    ]
+    columns = ForecastColumns.concat(forecasts)
+
+    aggregated = aggregate_forecast(columns, bucket_hours=6)
+
+    assert len(aggregated["series"]) == 50 * 8
+    assert list(aggregated["slots"][:8]) == [2] * 8
+    assert len(to_forecast_items(columns, aggregated, series=7)) == 8
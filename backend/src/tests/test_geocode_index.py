@@ -0,0 +1,57 @@
+import pytest
+
+from backend.src.models.weather import GeoLocation
+from backend.src.services.geocode_index import GeocodeIndex
+from backend.src.services.weather_service import WeatherService
+from backend.src.tests.test_cache import CountingProvider
+
+
+def test_index_normalizes_names_and_persists(tmp_path):
+    path = str(tmp_path / "geocode.sqlite3")
+    index = GeocodeIndex(path)
+    index.put("new york", GeoLocation(lat=40.71, lon=-74.01, city="New York", country="US"))
+    index.close()
+
+    reopened = GeocodeIndex(path)
+    location = reopened.get("  NEW   York ")
+
+    assert location is not None
+    assert location.city == "New York"
+    assert location.country == "US"
+    assert reopened.get("Boston") is None
+
+
+def test_qualified_query_does_not_replace_bare_name():
+    index = GeocodeIndex()
+    index.put("London", GeoLocation(lat=51.51, lon=-0.13, city="London", country="GB"))
+
+    index.put("London, CA", GeoLocation(lat=42.98, lon=-81.24, city="London", country="CA"))
+
+    assert index.get("london").country == "GB"
+    assert index.get("london, ca").country == "CA"
+    assert len(index) == 2
+
+
+def test_index_seed_from_csv(tmp_path):
+    seed_file = tmp_path / "cities.csv"
+    seed_file.write_text("city,lat,lon,country\nParis,48.85,2.35,FR\nBerlin,52.52,13.40,DE\n")
+    index = GeocodeIndex()
+
+    written = index.seed_from_file(str(seed_file))
+
+    assert written == 2
+    assert len(index) == 2
+    assert index.get("paris").lat == 48.85
+
+
+@pytest.mark.asyncio
+async def test_service_answers_city_lookups_from_index():
+    provider = CountingProvider()
+    service = WeatherService(provider=provider, geocode_index=GeocodeIndex())
+
+    await service.get_current_weather_by_city("Test City")
+    await service.get_forecast_by_city("test city")
+    location = await service.geocode("TEST CITY")
+
+    assert provider.calls["geocode"] == 1
+    assert location.city == "Test City"
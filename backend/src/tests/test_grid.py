@@ -0,0 +1,164 @@
+import math
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.src.main import app
+from backend.src.api.dependencies import get_weather_service
+from backend.src.auth.dependencies import get_current_active_user
+from backend.src.models.records import CurrentRecord
+from backend.src.models.user import User
+from backend.src.models.weather import GeoLocation
+from backend.src.services.aqi import index_map
+from backend.src.services.grid import (
+    NODATA,
+    Bounds,
+    GridUnavailable,
+    cell_centers,
+    idw,
+    quantize,
+    sample_grid,
+    sample_points
+)
+from backend.src.services.rate_limit import Priority, current_priority
+from backend.src.services.weather_service import WeatherService
+from backend.src.tests.test_weather_service import MockWeatherProvider
+
+
+class GradientProvider(MockWeatherProvider):
+    """Temperature rises one degree per degree of longitude east"""
+
+    def __init__(self):
+        self.calls = 0
+        self.priorities = set()
+
+    async def get_current_weather(self, location: GeoLocation) -> CurrentRecord:
+        self.calls += 1
+        self.priorities.add(current_priority())
+        if location.lat > 10:
+            raise ValueError("No station here")
+        record = await super().get_current_weather(location)
+        return CurrentRecord(**{
+            **{name: getattr(record, name) for name in CurrentRecord.__slots__},
+            "temperature": location.lon,
+        })
+
+
+def test_sample_points_align_to_standard_steps():
+    lats, lons, step = sample_points(Bounds(0.03, 0.03, 0.27, 0.47), max_samples=64)
+
+    assert step == 0.1
+    assert lats.min() == 0.0 and lats.max() == pytest.approx(0.3)
+    assert lons.min() == 0.0 and lons.max() == pytest.approx(0.5)
+    # A panned box lands on the same lattice, so its samples are cache hits
+    panned_lats, panned_lons, _ = sample_points(Bounds(0.04, 0.06, 0.28, 0.46), max_samples=64)
+    assert set(zip(lats, lons)) == set(zip(panned_lats, panned_lons))
+
+
+def test_idw_reproduces_samples_and_skips_missing_values():
+    sample_lats = np.array([0.0, 0.0, 1.0])
+    sample_lons = np.array([0.0, 1.0, 0.0])
+    values = np.array([[10.0, math.nan], [20.0, 5.0], [30.0, math.nan]])
+
+    grid = idw(sample_lats, sample_lons, values, np.array([0.0, 0.5]), np.array([0.0, 1.0]))
+
+    assert grid.shape == (2, 2, 2)
+    assert grid[0, 0, 0] == pytest.approx(10.0)
+    assert grid[0, 1, 0] == pytest.approx(20.0)
+    assert 10.0 < grid[1, 0, 0] < 30.0
+    # The only sample with a second value decides it everywhere
+    np.testing.assert_allclose(grid[..., 1], 5.0)
+
+
+def test_quantize_round_trips_within_a_step():
+    values = np.array([[-5.0, 0.0], [math.nan, 35.0]])
+
+    codes, offset, scale = quantize(values)
+
+    assert codes.dtype == np.dtype("<u2")
+    assert codes[1, 0] == NODATA
+    decoded = offset + codes[[0, 0, 1], [0, 1, 1]] * scale
+    np.testing.assert_allclose(decoded, [-5.0, 0.0, 35.0], atol=scale)
+
+
+@pytest.mark.asyncio
+async def test_sample_grid_interpolates_between_samples():
+    provider = GradientProvider()
+    bounds = Bounds(0.0, 0.0, 1.0, 1.0)
+
+    grid = await sample_grid(WeatherService(provider=provider), bounds, 8, 8, "temperature", max_samples=16)
+
+    _, lons = cell_centers(bounds, 8, 8)
+    assert grid.values.shape == (8, 8)
+    assert grid.sampled == grid.samples == provider.calls
+    # Samples yield the upstream quota to interactive requests
+    assert provider.priorities == {Priority.BATCH}
+    # West-to-east ordering follows the gradient
+    assert np.all(np.diff(grid.values[0]) > 0)
+    assert grid.values[0, 0] < lons[-1] and grid.values[0, -1] > lons[0]
+
+    with pytest.raises(GridUnavailable) as e:
+        await sample_grid(WeatherService(provider=provider), Bounds(20.0, 0.0, 21.0, 1.0), 4, 4, "temperature")
+    assert e.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_air_quality_grid_uses_index_map():
+    service = WeatherService(provider=MockWeatherProvider())
+
+    grid = await sample_grid(service, Bounds(0.0, 0.0, 1.0, 1.0), 4, 4, "aqi", max_samples=9)
+
+    record = await service.get_air_quality_by_coordinates(0.0, 0.0)
+    expected, _ = index_map(np.array(record.pollutants))
+    np.testing.assert_allclose(grid.values, expected)
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_weather_service] = lambda: WeatherService(provider=GradientProvider())
+    app.dependency_overrides[get_current_active_user] = lambda: User(username="analyst")
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_grid_endpoint_requires_authentication():
+    provider = GradientProvider()
+    app.dependency_overrides[get_weather_service] = lambda: WeatherService(provider=provider)
+    try:
+        response = TestClient(app).get("/weather/grid", params={"min_lat": 0, "min_lon": 0, "max_lat": 1, "max_lon": 1})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 401
+    assert provider.calls == 0
+
+
+def test_grid_endpoint_returns_quantized_payloads(client):
+    params = {"min_lat": 0, "min_lon": 0, "max_lat": 1, "max_lon": 2, "rows": 3, "cols": 5}
+
+    binary = client.get("/weather/grid", params=params)
+    json_grid = client.get("/weather/grid", params={**params, "format": "json"})
+
+    assert binary.status_code == 200
+    assert binary.headers["content-type"] == "application/octet-stream"
+    assert binary.headers["x-grid-shape"] == "3,5"
+    assert len(binary.content) == 3 * 5 * 2
+    body = json_grid.json()
+    assert np.frombuffer(binary.content, dtype="<u2").tolist() == body["values"]
+    decoded = body["offset"] + np.array(body["values"]) * body["scale"]
+    assert decoded.min() >= 0 and decoded.max() <= 2
+
+
+def test_grid_endpoint_rejects_bad_requests(client):
+    inverted = client.get("/weather/grid", params={"min_lat": 1, "min_lon": 0, "max_lat": 0, "max_lon": 1})
+    unknown_field = client.get(
+        "/weather/grid", params={"min_lat": 0, "min_lon": 0, "max_lat": 1, "max_lon": 1, "field": "snow"}
+    )
+    too_large = client.get(
+        "/weather/grid", params={"min_lat": 0, "min_lon": 0, "max_lat": 1, "max_lon": 1, "rows": 10_000}
+    )
+
+    assert inverted.status_code == 400
+    assert unknown_field.status_code == 422
+    assert too_large.status_code == 422
@@ -0,0 +1,41 @@
+import asyncio
+import threading
+
+import pytest
+
+from backend.src.auth import utils
+from backend.src.auth.hashing_pool import HashingPool, HashingPoolBusy
+
+
+@pytest.mark.asyncio
+async def test_runs_work_off_the_event_loop_thread():
+    pool = HashingPool(max_workers=2, queue_size=0)
+
+    thread_name = await pool.run(lambda: threading.current_thread().name)
+
+    assert thread_name.startswith("bcrypt")
+    assert pool.stats()["completed"] == 1
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_rejects_calls_beyond_the_queue_bound():
+    pool = HashingPool(max_workers=1, queue_size=1)
+    release = threading.Event()
+
+    running = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+    await asyncio.sleep(0)
+    with pytest.raises(HashingPoolBusy):
+        await pool.run(release.wait)
+
+    release.set()
+    await asyncio.gather(*running)
+    assert pool.stats()["rejected"] == 1
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_authenticate_user_async_checks_password():
+    assert (await utils.authenticate_user_async("johndoe", "secret")).username == "johndoe"
+    assert await utils.authenticate_user_async("johndoe", "wrong") is None
+    assert await utils.authenticate_user_async("nobody", "secret") is None
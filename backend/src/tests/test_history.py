@@ -0,0 +1,147 @@
+import asyncio
+import math
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.src.main import app
+from backend.src.api.dependencies import get_observation_recorder, get_weather_service
+from backend.src.models.records import AirQualityRecord, CurrentRecord, intern_condition
+from backend.src.models.weather import GeoLocation
+from backend.src.services.history import (
+    ObservationRecorder,
+    ObservationStore,
+    RecordingWeatherProvider,
+    downsample_step
+)
+from backend.src.services.weather_service import WeatherService
+from backend.src.tests.test_weather_service import MockWeatherProvider
+
+LONDON = GeoLocation(lat=51.5085, lon=-0.1257, city="London", country="GB")
+
+
+def observation(dt, temperature):
+    return CurrentRecord(
+        temperature=temperature,
+        feels_like=temperature - 1,
+        humidity=60,
+        pressure=1010,
+        wind_speed=3.0,
+        wind_direction=180,
+        conditions=(intern_condition("Clouds", "broken clouds", "04d"),),
+        city="London",
+        country="GB",
+        dt=dt
+    )
+
+
+def test_downsample_step_bounds_points():
+    assert downsample_step(3600, max_points=500) == 60
+    assert downsample_step(7 * 86400, max_points=500) == 1800
+    assert downsample_step(400 * 86400, max_points=100) == 4 * 86400
+
+
+def test_store_downsamples_time_range():
+    store = ObservationStore()
+    rows = [store.current_row(LONDON, observation(3600 * 100 + i * 600, float(i))) for i in range(12)]
+    # A nearby point in the same cell, a repeated observation, and another place
+    rows.append(store.current_row(GeoLocation(lat=51.5089, lon=-0.1251), observation(3600 * 100 + 600, 99.0)))
+    rows.append(store.current_row(GeoLocation(lat=48.85, lon=2.35), observation(3600 * 100, 20.0)))
+    store.write(rows, [])
+
+    points = store.query_current(LONDON.lat, LONDON.lon, 3600 * 100, 3600 * 102 - 1, 3600)
+
+    assert [point["samples"] for point in points] == [6, 6]
+    assert points[0]["timestamp"] == 3600 * 100
+    assert points[0]["temperature"] == pytest.approx(2.5)
+    assert points[1]["temperature_max"] == 11.0
+    assert store.count() == {"current": 13, "air_quality": 0}
+
+
+def test_store_keeps_missing_pollutants_as_null():
+    store = ObservationStore()
+    record = AirQualityRecord(
+        aqi=2, pollutants=(1.0, 2.0, math.nan, 4.0, 5.0, 6.0), city="London", country="GB", dt=1000, analysis=None
+    )
+    store.write([], [store.air_quality_row(LONDON, record)])
+
+    (point,) = store.query_air_quality(LONDON.lat, LONDON.lon, 0, 2000, 3600)
+
+    assert point["aqi_max"] == 2
+    assert point["o3"] is None
+    assert point["pm2_5"] == 4.0
+
+
+@pytest.mark.asyncio
+async def test_recorder_writes_in_batches_off_the_request_path():
+    recorder = ObservationRecorder(ObservationStore(), batch_size=5, flush_interval=60)
+    recorder.start()
+    try:
+        for i in range(4):
+            recorder.record_current(LONDON, observation(1000 + i, 10.0))
+        await asyncio.sleep(0.05)
+        assert recorder.written == 0 and recorder.pending == 4
+
+        recorder.record_current(LONDON, observation(2000, 10.0))
+        for _ in range(100):
+            if recorder.written:
+                break
+            await asyncio.sleep(0.01)
+        assert recorder.written == 5
+        assert recorder.flushes == 1
+    finally:
+        await recorder.stop()
+
+
+@pytest.mark.asyncio
+async def test_recorder_drops_oldest_when_full():
+    recorder = ObservationRecorder(ObservationStore(), batch_size=100, max_pending=3)
+
+    for i in range(5):
+        recorder.record_current(LONDON, observation(1000 + i, float(i)))
+    await recorder.stop()
+
+    assert recorder.dropped == 2
+    assert recorder.store.query_current(LONDON.lat, LONDON.lon, 0, 2000, 3600)[0]["temperature_min"] == 2.0
+
+
+@pytest.fixture
+def client():
+    recorder = ObservationRecorder(ObservationStore())
+    provider = RecordingWeatherProvider(MockWeatherProvider(), recorder)
+    app.dependency_overrides[get_weather_service] = lambda: WeatherService(provider=provider)
+    app.dependency_overrides[get_observation_recorder] = lambda: recorder
+    yield TestClient(app), recorder
+    app.dependency_overrides.clear()
+
+
+def test_history_endpoints_return_recorded_observations(client):
+    http, recorder = client
+    http.get("/weather/current", params={"lat": 51.5, "lon": -0.12})
+    http.get("/weather/air-quality", params={"city": "Test City"})
+
+    weather = http.get("/weather/history", params={"lat": 51.5, "lon": -0.12})
+    air_quality = http.get("/weather/air-quality/history", params={"city": "Test City"})
+
+    assert weather.status_code == 200
+    body = weather.json()
+    assert body["city"] == "Test City"
+    assert body["interval"] == 300
+    assert [point["samples"] for point in body["points"]] == [1]
+    assert air_quality.json()["points"][0]["pollutants"]["pm2_5"] is not None
+    assert recorder.pending == 0
+
+
+def test_history_rejects_bad_ranges(client):
+    http, _ = client
+    now = int(time.time())
+
+    reversed_range = http.get("/weather/history", params={"lat": 1, "lon": 2, "start": now, "end": now - 60})
+    coarsened = http.get(
+        "/weather/history", params={"lat": 1, "lon": 2, "start": now - 30 * 86400, "end": now, "interval": 60}
+    )
+
+    assert reversed_range.status_code == 400
+    assert coarsened.json()["interval"] == 3 * 3600
+    assert http.get("/weather/history").status_code == 400
@@ -0,0 +1,62 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.src.main import app
+from backend.src.api.dependencies import get_weather_service
+from backend.src.services.metrics import Registry
+from backend.src.services.weather_service import WeatherService
+from backend.src.services.instrumentation import InstrumentedWeatherProvider
+from backend.src.models.weather import GeoLocation
+from backend.src.tests.test_weather_service import MockWeatherProvider
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.histogram("op_seconds", "Op latency", ("op",), buckets=(0.1, 1.0))
+
+    histogram.labels(op="read").observe(0.05)
+    histogram.labels(op="read").observe(0.5)
+    histogram.labels(op="read").observe(3)
+
+    text = registry.render()
+    assert "# TYPE op_seconds histogram" in text
+    assert 'op_seconds_bucket{op="read",le="0.1"} 1' in text
+    assert 'op_seconds_bucket{op="read",le="1"} 2' in text
+    assert 'op_seconds_bucket{op="read",le="+Inf"} 3' in text
+    assert 'op_seconds_count{op="read"} 3' in text
+
+
+def test_counter_and_collector_render():
+    registry = Registry()
+    registry.counter("errors", "Errors", ("status",)).labels(status="503").inc()
+    registry.register_collector(lambda: [("cache_lookups", "counter", "Lookups", [({"result": "hit"}, 4)])])
+
+    text = registry.render()
+    assert 'errors_total{status="503"} 1' in text
+    assert 'cache_lookups_total{result="hit"} 4' in text
+
+
+@pytest.mark.asyncio
+async def test_instrumented_provider_times_calls():
+    provider = InstrumentedWeatherProvider(MockWeatherProvider(), name="test-provider")
+    timer = provider._timers["get_current_weather"]
+    before = timer.count
+
+    await provider.get_current_weather(GeoLocation(lat=0, lon=0))
+
+    assert timer.count == before + 1
+
+
+def test_metrics_endpoint_reports_route_templates():
+    app.dependency_overrides[get_weather_service] = lambda: WeatherService(provider=MockWeatherProvider())
+    try:
+        client = TestClient(app)
+        assert client.get("/weather/current", params={"lat": 1, "lon": 2}).status_code == 200
+        response = client.get("/metrics")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'route="/weather/current",status="200"' in response.text
+    assert 'request_stage_duration_seconds_count{stage="serialization"}' in response.text
@@ -0,0 +1,98 @@
+import httpx
+import pytest
+
+from backend.src.models.records import CurrentRecord, to_model
+from backend.src.models.weather import GeoLocation
+from backend.src.services.weather_service import OpenWeatherMapProvider
+
+
+CURRENT_PAYLOAD = {
+    "weather": [{"main": "Clear", "description": "clear sky", "icon": "01d"}],
+    "main": {"temp": 21.3, "feels_like": 20.9, "humidity": 60, "pressure": 1012},
+    "wind": {"speed": 3.6, "deg": 200},
+    "name": "Test City",
+    "sys": {"country": "TC"},
+    "dt": 1700000000,
+}
+
+
+def make_provider(handler):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return OpenWeatherMapProvider(api_key="test-key", client=client), client
+
+
+@pytest.mark.asyncio
+async def test_get_current_weather_uses_shared_client():
+    requests_seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests_seen.append(request)
+        return httpx.Response(200, json=CURRENT_PAYLOAD)
+
+    provider, client = make_provider(handler)
+    location = GeoLocation(lat=35.12, lon=-106.59)
+
+    # Act
+    first = await provider.get_current_weather(location)
+    await provider.get_current_weather(location)
+
+    # Assert
+    assert isinstance(first, CurrentRecord)
+    assert first.city == "Test City"
+    assert len(requests_seen) == 2
+    assert requests_seen[0].url.path == "/data/2.5/weather"
+    assert requests_seen[0].url.params["appid"] == "test-key"
+    assert provider.client is client
+
+
+@pytest.mark.asyncio
+async def test_upstream_error_is_raised():
+    provider, _ = make_provider(lambda request: httpx.Response(503))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await provider.get_current_weather(GeoLocation(lat=0, lon=0))
+
+
+@pytest.mark.asyncio
+async def test_close_leaves_borrowed_client_open():
+    provider, client = make_provider(lambda request: httpx.Response(200, json=[]))
+
+    await provider.close()
+
+    assert not client.is_closed
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_owned_client_lifecycle():
+    provider = OpenWeatherMapProvider(api_key="test-key")
+
+    await provider.open()
+    client = provider.client
+    await provider.close()
+
+    assert client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_get_forecast_aggregates_slots_per_local_day():
+    slots = [
+        {
+            "dt": 1699920000 + hours * 3600,
+            "main": {"temp": 10 + hours, "temp_min": 9 + hours, "temp_max": 11 + hours, "humidity": 50},
+            "weather": [{"main": "Clouds", "description": "few clouds", "icon": "02d"}],
+            "wind": {"speed": 4.0},
+            "pop": 0.2,
+        }
+        for hours in range(0, 48, 3)
+    ]
+    payload = {"list": slots, "city": {"name": "Test City", "country": "TC", "timezone": 3600}}
+    provider, _ = make_provider(lambda request: httpx.Response(200, json=payload))
+
+    forecast = to_model(await provider.get_forecast(GeoLocation(lat=0, lon=0)))
+
+    assert len(forecast.forecast) == 2
+    assert forecast.forecast[0].temp_min == 9
+    assert forecast.forecast[0].conditions[0].main == "Clouds"
+    assert forecast.forecast[0].precipitation_chance == 20.0
+    assert forecast.forecast[0].date.utcoffset().total_seconds() == 3600
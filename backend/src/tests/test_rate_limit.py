@@ -0,0 +1,124 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.src.main import app
+from backend.src.api.dependencies import get_rate_limiter
+from backend.src.auth.dependencies import get_current_active_user
+from backend.src.models.user import User
+from backend.src.models.weather import GeoLocation
+from backend.src.services.rate_limit import (
+    Priority,
+    RateLimiter,
+    RateLimitExceeded,
+    request_priority,
+    retry_after_seconds
+)
+from backend.src.services.weather_service import OpenWeatherMapProvider
+from backend.src.tests.test_openweathermap_provider import CURRENT_PAYLOAD
+
+
+@pytest.mark.asyncio
+async def test_calls_within_budget_are_granted_immediately():
+    limiter = RateLimiter(calls_per_minute=3)
+
+    for _ in range(3):
+        await limiter.acquire()
+
+    usage = limiter.usage()
+    assert usage["granted"] == 3
+    assert usage["minute_budget_remaining"] == 0
+    assert usage["queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_queued_calls_fail_after_deadline():
+    limiter = RateLimiter(calls_per_minute=1)
+    await limiter.acquire()
+
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        await limiter.acquire(deadline=0.01)
+
+    assert excinfo.value.retry_after > 0
+    assert limiter.usage()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_interactive_calls_are_served_before_background():
+    # 600/min refills one token every 0.1 s
+    limiter = RateLimiter(calls_per_minute=600)
+    for _ in range(600):
+        await limiter.acquire()
+    order = []
+
+    async def call(name, priority):
+        with request_priority(priority):
+            await limiter.acquire()
+        order.append(name)
+
+    background = asyncio.ensure_future(call("background", Priority.BACKGROUND))
+    await asyncio.sleep(0)
+    interactive = asyncio.ensure_future(call("interactive", Priority.INTERACTIVE))
+    await asyncio.gather(background, interactive)
+
+    assert order == ["interactive", "background"]
+
+
+@pytest.mark.asyncio
+async def test_provider_backs_off_after_upstream_429():
+    responses = [httpx.Response(429, headers={"Retry-After": "30"}), httpx.Response(200, json=CURRENT_PAYLOAD)]
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: responses.pop(0)))
+    limiter = RateLimiter(calls_per_minute=60, deadlines={Priority.INTERACTIVE: 0.01})
+    provider = OpenWeatherMapProvider(api_key="test-key", client=client, rate_limiter=limiter)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await provider.get_current_weather(GeoLocation(lat=0, lon=0))
+    with pytest.raises(RateLimitExceeded):
+        await provider.get_current_weather(GeoLocation(lat=0, lon=0))
+
+    assert limiter.usage()["blocked_for"] > 29
+    await client.aclose()
+
+
+def test_retry_after_accepts_seconds_and_http_dates():
+    in_two_minutes = format_datetime(datetime.now(timezone.utc) + timedelta(minutes=2), usegmt=True)
+
+    assert retry_after_seconds("30") == 30
+    assert 115 <= retry_after_seconds(in_two_minutes) <= 120
+    assert retry_after_seconds("Sat, 01 Jan 2000 00:00:00 GMT") == 0
+    assert retry_after_seconds("soon") == 60
+    assert retry_after_seconds(None) == 60
+
+
+@pytest.mark.asyncio
+async def test_http_date_retry_after_still_backs_off():
+    retry_at = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=90), usegmt=True)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(429, headers={"Retry-After": retry_at})
+    ))
+    limiter = RateLimiter(calls_per_minute=60)
+    provider = OpenWeatherMapProvider(api_key="test-key", client=client, rate_limiter=limiter)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await provider.get_current_weather(GeoLocation(lat=0, lon=0))
+
+    assert limiter.usage()["blocked_for"] > 80
+    await client.aclose()
+
+
+def test_quota_requires_authentication():
+    app.dependency_overrides[get_rate_limiter] = lambda: RateLimiter(calls_per_minute=3)
+    try:
+        anonymous = TestClient(app).get("/weather/quota")
+        app.dependency_overrides[get_current_active_user] = lambda: User(username="operator")
+        signed_in = TestClient(app).get("/weather/quota")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert anonymous.status_code == 401
+    assert signed_in.status_code == 200
+    assert signed_in.json()["minute_budget_remaining"] == 3
@@ -0,0 +1,105 @@
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+from backend.src.api.responses import ModelMemo
+from backend.src.models.records import (
+    AirQualityRecord,
+    CurrentRecord,
+    ForecastRecord,
+    from_model,
+    intern_condition,
+    to_model,
+)
+from backend.src.models.weather import AirQuality, CurrentWeather, ForecastItem, WeatherCondition, WeatherForecast
+
+
+def make_current(city: str = "Test City") -> CurrentWeather:
+    return CurrentWeather(
+        temperature=20.5,
+        feels_like=19.8,
+        humidity=65,
+        pressure=1013,
+        wind_speed=5.1,
+        wind_direction=270,
+        conditions=[WeatherCondition(main="Clear", description="clear sky", icon="01d")],
+        city=city,
+        country="TC",
+        timestamp=datetime(2024, 5, 1, 12, 0),
+    )
+
+
+def test_current_round_trip():
+    model = make_current()
+
+    record = from_model(model)
+
+    assert isinstance(record, CurrentRecord)
+    assert to_model(record) == model
+
+
+def test_air_quality_drops_missing_pollutants():
+    model = AirQuality(
+        aqi=3, description="Moderate", pollutants={"pm2_5": 8.2, "o3": 61.0},
+        city="A", country="X", timestamp=datetime(2024, 5, 1, 12, 0),
+    )
+
+    record = from_model(model)
+
+    assert isinstance(record, AirQualityRecord)
+    assert np.isnan(record.pollutants[0])
+    assert to_model(record) == model
+
+
+def test_forecast_round_trip_shares_conditions():
+    clouds = WeatherCondition(main="Clouds", description="few clouds", icon="02d")
+    model = WeatherForecast(city="A", country="X", forecast=[
+        ForecastItem(
+            date=datetime(2024, 5, day), temp_min=9.0, temp_max=15.0, humidity=50,
+            conditions=[clouds], precipitation_chance=20.0, wind_speed=4.0,
+        )
+        for day in (1, 2, 3)
+    ])
+
+    record = from_model(model)
+
+    assert isinstance(record, ForecastRecord)
+    assert len(record) == 3
+    assert record.conditions == (intern_condition("Clouds", "few clouds", "02d"),)
+    assert record.rows["condition"].tolist() == [0, 0, 0]
+    assert from_model(to_model(record)) == record
+
+
+def test_conditions_are_interned():
+    first = from_model(make_current())
+    second = from_model(make_current(city="Other"))
+
+    assert first.conditions[0] is second.conditions[0]
+    assert first.country is second.country
+
+
+def test_records_use_less_memory_than_models():
+    def allocated(build):
+        tracemalloc.start()
+        objects = [build(i) for i in range(200)]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del objects
+        return size
+
+    models = allocated(lambda i: make_current(f"City {i}"))
+    records = allocated(lambda i: from_model(make_current(f"City {i}")))
+
+    assert records < models
+
+
+def test_model_memo_reuses_model_for_same_record():
+    memo = ModelMemo(max_entries=1)
+    record = from_model(make_current())
+
+    first = memo.get(record)
+
+    assert memo.get(record) is first
+    memo.get(from_model(make_current(city="Other")))
+    assert memo.get(record) is not first
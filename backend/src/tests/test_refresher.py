@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.src.models.weather import GeoLocation
+from backend.src.services.cache import CachingWeatherProvider
+from backend.src.services.refresher import BackgroundRefresher, HotSetTracker
+from backend.src.tests.test_cache import CountingProvider
+
+
+LOCATION = GeoLocation(lat=35.12, lon=-106.59)
+
+
+def advance_clock(monkeypatch, seconds):
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + seconds)
+
+
+def test_hot_set_ranks_by_recent_frequency():
+    tracker = HotSetTracker()
+    for _ in range(3):
+        tracker.record("a", "payload-a")
+    tracker.record("b", "payload-b")
+
+    assert tracker.top(2) == [("a", "payload-a"), ("b", "payload-b")]
+    assert tracker.top(2, min_score=2) == [("a", "payload-a")]
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_served_while_revalidating(monkeypatch):
+    inner = CountingProvider()
+    provider = CachingWeatherProvider(inner, ttls={"current": 10}, max_staleness=60)
+    first = await provider.get_current_weather(LOCATION)
+
+    advance_clock(monkeypatch, 30)
+    stale = await provider.get_current_weather(LOCATION)
+    await asyncio.sleep(0)
+
+    assert stale is first
+    assert inner.calls["current"] == 2
+    assert provider.stats()["stale_hits"] == 1
+    assert provider.cache.ttl_remaining(("current",) + provider.grid.tile(35.12, -106.59)) > 0
+
+
+@pytest.mark.asyncio
+async def test_entries_beyond_max_staleness_are_refetched(monkeypatch):
+    inner = CountingProvider()
+    provider = CachingWeatherProvider(inner, ttls={"current": 10}, max_staleness=5)
+    first = await provider.get_current_weather(LOCATION)
+
+    advance_clock(monkeypatch, 30)
+    second = await provider.get_current_weather(LOCATION)
+
+    assert second is not first
+    assert provider.stats()["stale_hits"] == 0
+
+
+@pytest.mark.asyncio
+async def test_refresher_refreshes_hot_entries_within_budget(monkeypatch):
+    inner = CountingProvider()
+    provider = CachingWeatherProvider(inner, ttls={"current": 10}, tile_size_deg=1, nearest_km=0)
+    for lat in (10, 20, 30):
+        for _ in range(3):
+            await provider.get_current_weather(GeoLocation(lat=lat, lon=0))
+    refresher = BackgroundRefresher(provider, budget_per_minute=2, refresh_ahead=60)
+
+    refreshed = await refresher.run_once()
+
+    assert refreshed == 2
+    assert inner.calls["current"] == 3 + 2
+    assert refresher.stats()["over_budget"] == 1
+
+
+@pytest.mark.asyncio
+async def test_refresher_skips_entries_not_due():
+    inner = CountingProvider()
+    provider = CachingWeatherProvider(inner, ttls={"current": 600})
+    for _ in range(3):
+        await provider.get_current_weather(LOCATION)
+    refresher = BackgroundRefresher(provider, refresh_ahead=60)
+
+    assert await refresher.run_once() == 0
+    refresher.start()
+    assert refresher.running
+    await refresher.stop()
+    assert not refresher.running
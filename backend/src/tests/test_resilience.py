@@ -0,0 +1,186 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.src.main import app
+from backend.src.api.dependencies import get_upstream_resilience
+from backend.src.auth.dependencies import get_current_active_user
+from backend.src.models.user import User
+from backend.src.models.weather import GeoLocation
+from backend.src.services.cache import CachingWeatherProvider
+from backend.src.services.resilience import (
+    BreakerState,
+    CircuitBreaker,
+    CircuitOpenError,
+    LatencyTracker,
+    UpstreamResilience,
+)
+from backend.src.tests.test_cache import CountingProvider
+
+
+def status_error(status_code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "https://upstream.test/weather")
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(status_code, request=request))
+
+
+def test_timeout_adapts_to_observed_latency():
+    tracker = LatencyTracker(min_timeout=0.5, max_timeout=10, multiplier=2, min_samples=20)
+    assert tracker.timeout() == 10
+
+    for _ in range(100):
+        tracker.observe(0.4)
+    tracker.observe(1.5)
+
+    assert tracker.timeout() == pytest.approx(0.8)
+    assert tracker.hedge_delay() == pytest.approx(0.4)
+
+
+def test_breaker_opens_then_probes(monkeypatch):
+    breaker = CircuitBreaker("weather", failure_rate=0.5, window=10, min_calls=4, open_seconds=30)
+    for failed in (False, True, True, False):
+        breaker.record(failed, 0.1)
+
+    assert breaker.state is BreakerState.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 31)
+    assert breaker.allow() is True
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.record(False, 0.1, probe=True)
+
+    assert breaker.state is BreakerState.CLOSED
+    assert breaker.stats()["trips"] == 1
+    assert breaker.stats()["rejected"] == 2
+
+
+def test_slow_calls_trip_the_breaker():
+    breaker = CircuitBreaker("forecast", slow_call_rate=0.5, slow_call_seconds=1, min_calls=4)
+    for _ in range(4):
+        breaker.record(False, 2.0)
+
+    assert breaker.state is BreakerState.OPEN
+
+
+@pytest.mark.asyncio
+async def test_transient_failure_is_retried():
+    resilience = UpstreamResilience(hedge=False, retries=1)
+    outcomes = [status_error(503), "ok"]
+
+    async def attempt(timeout):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert await resilience.call("weather", attempt) == "ok"
+    assert resilience.stats()["retries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried():
+    resilience = UpstreamResilience(hedge=False, retries=1)
+    calls = []
+
+    async def attempt(timeout):
+        calls.append(timeout)
+        raise status_error(404)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await resilience.call("weather", attempt)
+    assert len(calls) == 1
+    assert resilience.breaker("weather").stats()["window_failures"] == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_call_is_hedged():
+    resilience = UpstreamResilience(hedge=True, hedge_budget=1.0, retries=0)
+    for _ in range(50):
+        resilience.latency("weather").observe(0.01)
+    delays = [1.0, 0.0]
+
+    async def attempt(timeout):
+        delay = delays.pop(0)
+        await asyncio.sleep(delay)
+        return delay
+
+    start = time.perf_counter()
+    result = await resilience.call("weather", attempt)
+
+    assert result == 0.0
+    assert time.perf_counter() - start < 0.5
+    assert resilience.stats()["hedge_wins"] == 1
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_serves_stale_entry(monkeypatch):
+    class FailingProvider(CountingProvider):
+        failing = False
+
+        async def get_current_weather(self, location):
+            if self.failing:
+                raise CircuitOpenError("weather", retry_after=30)
+            return await super().get_current_weather(location)
+
+    inner = FailingProvider()
+    provider = CachingWeatherProvider(inner, ttls={"current": 10}, max_staleness=5, stale_if_error=600)
+    location = GeoLocation(lat=35.12, lon=-106.59)
+    first = await provider.get_current_weather(location)
+
+    inner.failing = True
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 120)
+
+    assert await provider.get_current_weather(location) is first
+    assert provider.stats()["stale_if_error_hits"] == 1
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 1000)
+    with pytest.raises(CircuitOpenError):
+        await provider.get_current_weather(location)
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_wait_is_not_upstream_latency():
+    resilience = UpstreamResilience(
+        hedge=True,
+        hedge_budget=1.0,
+        retries=0,
+        breaker_factory=lambda name: CircuitBreaker(name, slow_call_rate=0.5, slow_call_seconds=0.05, min_calls=4),
+    )
+    for _ in range(50):
+        resilience.latency("weather").observe(0.01)
+    sent = []
+
+    async def saturated_limiter():
+        await asyncio.sleep(0.1)
+
+    async def attempt(timeout):
+        sent.append(timeout)
+        return "ok"
+
+    results = await asyncio.gather(*(resilience.call("weather", attempt, acquire=saturated_limiter) for _ in range(4)))
+
+    assert results == ["ok"] * 4
+    assert len(sent) == 4
+    assert resilience.stats()["hedges"] == 0
+    assert resilience.breaker("weather").state is BreakerState.CLOSED
+    assert resilience.latency("weather").percentile(99) < 0.05
+
+
+def test_upstream_health_requires_authentication():
+    app.dependency_overrides[get_upstream_resilience] = UpstreamResilience
+    try:
+        anonymous = TestClient(app).get("/weather/upstream")
+        app.dependency_overrides[get_current_active_user] = lambda: User(username="operator")
+        signed_in = TestClient(app).get("/weather/upstream")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert anonymous.status_code == 401
+    assert signed_in.status_code == 200
+    assert signed_in.json()["endpoints"] == {}
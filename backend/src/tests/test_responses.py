@@ -0,0 +1,44 @@
+import json
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from backend.src.main import app
+from backend.src.api.dependencies import get_weather_service
+from backend.src.models.weather import AirQuality, GeoLocation
+from backend.src.services.weather_service import WeatherService
+from backend.src.tests.test_weather_service import MockWeatherProvider
+
+
+def test_json_bytes_is_memoized():
+    location = GeoLocation(lat=1.5, lon=2.5, city="Test City")
+
+    first = location.json_bytes()
+
+    assert location.json_bytes() is first
+    assert json.loads(first) == location.model_dump(mode="json")
+
+
+def test_model_copy_does_not_reuse_encoding():
+    quality = AirQuality(
+        aqi=2, description="Fair", pollutants={"pm2_5": 5.0}, city="A", country="X", timestamp=datetime(2024, 1, 1)
+    )
+    quality.json_bytes()
+
+    relabelled = quality.model_copy(update={"city": "B"})
+
+    assert json.loads(relabelled.json_bytes())["city"] == "B"
+    assert relabelled == quality.model_copy(update={"city": "B"})
+
+
+def test_endpoint_serves_model_json():
+    provider = MockWeatherProvider()
+    app.dependency_overrides[get_weather_service] = lambda: WeatherService(provider=provider)
+    try:
+        response = TestClient(app).get("/weather/geocode", params={"city": "Test City"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {"lat": 35.12, "lon": -106.59, "city": "Test City", "country": "TC"}
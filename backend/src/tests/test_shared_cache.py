@@ -0,0 +1,78 @@
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+from backend.src.models.weather import GeoLocation
+from backend.src.services.cache import CachingWeatherProvider
+from backend.src.services.shared_cache import SharedCache
+from backend.src.tests.test_cache import CountingProvider
+
+
+@pytest.fixture
+def shared_path(tmp_path):
+    return str(tmp_path / "shared.sqlite3")
+
+
+def test_round_trips_models_until_expiry(shared_path, monkeypatch):
+    cache = SharedCache(shared_path)
+    location = GeoLocation(lat=1.5, lon=2.5, city="Test City")
+    cache.set(("geocode", "test city"), location, ttl=60)
+
+    value, ttl = cache.get(("geocode", "test city"))
+    assert value == location
+    assert 59 < ttl <= 60
+
+    real_time = time.time
+    monkeypatch.setattr(time, "time", lambda: real_time() + 61)
+    assert cache.get(("geocode", "test city")) is None
+    cache.close()
+
+
+def test_rejects_unknown_value_types(shared_path):
+    cache = SharedCache(shared_path)
+    with pytest.raises(TypeError):
+        cache.set("key", {"not": "a model"}, ttl=60)
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_workers_share_upstream_results(shared_path):
+    # Two providers with separate local caches stand in for two worker processes
+    upstream_a, upstream_b = CountingProvider(), CountingProvider()
+    worker_a = CachingWeatherProvider(upstream_a, shared=SharedCache(shared_path))
+    worker_b = CachingWeatherProvider(upstream_b, shared=SharedCache(shared_path))
+    location = GeoLocation(lat=35.12, lon=-106.59)
+
+    first = await worker_a.get_current_weather(location)
+    second = await worker_b.get_current_weather(location)
+    await worker_b.get_current_weather(location)
+
+    assert second == first
+    assert upstream_a.calls == {"current": 1}
+    assert upstream_b.calls == {}
+    assert worker_b.stats()["shared_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_locked_shared_cache_does_not_block_the_event_loop(shared_path):
+    worker = CachingWeatherProvider(CountingProvider(), shared=SharedCache(shared_path))
+    # Another worker holding the write lock
+    other = sqlite3.connect(shared_path, isolation_level=None)
+    other.execute("BEGIN EXCLUSIVE")
+    asyncio.get_running_loop().call_later(0.2, other.execute, "COMMIT")
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    ticker = asyncio.ensure_future(tick())
+    await worker.get_current_weather(GeoLocation(lat=35.12, lon=-106.59))
+    ticker.cancel()
+    other.close()
+
+    assert ticks >= 10
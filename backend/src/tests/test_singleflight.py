@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from backend.src.models.weather import GeoLocation
+from backend.src.services.singleflight import SingleFlight, CoalescingWeatherProvider
+from backend.src.tests.test_cache import CountingProvider
+
+
+class SlowProvider(CountingProvider):
+    async def get_current_weather(self, location):
+        await asyncio.sleep(0.01)
+        return await super().get_current_weather(location)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_share_one_upstream_call():
+    inner = SlowProvider()
+    provider = CoalescingWeatherProvider(inner)
+    location = GeoLocation(lat=35.12, lon=-106.59)
+
+    results = await asyncio.gather(*(provider.get_current_weather(location) for _ in range(10)))
+
+    assert inner.calls["current"] == 1
+    assert all(result is results[0] for result in results)
+    assert provider.stats() == {"calls": 10, "executions": 1, "deduplicated": 9, "in_flight": 0}
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_not_remembered():
+    flight = SingleFlight()
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0)
+        raise ValueError("boom")
+
+    outcomes = await asyncio.gather(
+        flight.do("k", failing), flight.do("k", failing), return_exceptions=True
+    )
+    with pytest.raises(ValueError):
+        await flight.do("k", failing)
+
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+    assert len(attempts) == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_call():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        return 42
+
+    first = asyncio.ensure_future(flight.do("k", work))
+    second = asyncio.ensure_future(flight.do("k", work))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == 42
@@ -0,0 +1,51 @@
+import pytest
+
+from backend.src.models.weather import GeoLocation
+from backend.src.services.cache import CachingWeatherProvider
+from backend.src.services.spatial import SpatialIndex, TileGrid, haversine_km
+from backend.src.tests.test_cache import CountingProvider
+
+
+def test_tile_grid_quantizes_nearby_points():
+    grid = TileGrid(0.01)
+
+    assert grid.tile(51.5071, -0.1276) == grid.tile(51.5079, -0.1270)
+    assert grid.tile(51.5071, -0.1276) != grid.tile(51.5171, -0.1276)
+    assert grid.center(grid.tile(51.5071, -0.1276)) == (51.505, -0.125)
+
+
+def test_spatial_index_nearest_within_radius():
+    index = SpatialIndex()
+    index.add("london", 51.5072, -0.1276)
+    index.add("paris", 48.8566, 2.3522)
+
+    key, distance = index.nearest(51.51, -0.12, max_distance_km=5)
+
+    assert key == "london"
+    assert distance == pytest.approx(haversine_km(51.51, -0.12, 51.5072, -0.1276))
+    assert index.nearest(50.0, 0.0, max_distance_km=5) is None
+    assert index.nearest(51.51, -0.12, 5, accept=lambda key: key != "london") is None
+
+
+@pytest.mark.asyncio
+async def test_nearby_coordinates_share_one_upstream_fetch():
+    inner = CountingProvider()
+    provider = CachingWeatherProvider(inner, tile_size_deg=0.01, nearest_km=0)
+
+    await provider.get_current_weather(GeoLocation(lat=35.1201, lon=-106.5901))
+    await provider.get_current_weather(GeoLocation(lat=35.1249, lon=-106.5949))
+
+    assert inner.calls["current"] == 1
+
+
+@pytest.mark.asyncio
+async def test_tile_miss_served_from_nearest_cached_tile():
+    inner = CountingProvider()
+    provider = CachingWeatherProvider(inner, tile_size_deg=0.01, nearest_km=2)
+
+    await provider.get_current_weather(GeoLocation(lat=35.1201, lon=-106.5901))
+    await provider.get_current_weather(GeoLocation(lat=35.1301, lon=-106.5901))
+    await provider.get_current_weather(GeoLocation(lat=36.0, lon=-106.5901))
+
+    assert inner.calls["current"] == 2
+    assert provider.stats()["nearest_hits"] == 1
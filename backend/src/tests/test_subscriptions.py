@@ -0,0 +1,173 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.src.main import app
+from backend.src.api.dependencies import get_subscription_hub
+from backend.src.models.records import CurrentRecord, intern_condition
+from backend.src.models.weather import BatchLocation
+from backend.src.services.subscriptions import (
+    SubscriptionHub,
+    TooManyTopics,
+    format_event,
+    merge_patch,
+    parse_location
+)
+from backend.src.services.rate_limit import Priority, current_priority
+from backend.src.services.weather_service import WeatherService
+from backend.src.tests.test_weather_service import MockWeatherProvider
+
+
+class ChangingProvider(MockWeatherProvider):
+    def __init__(self):
+        self.temperature = 20.0
+        self.dt = 1_700_000_000
+        self.calls = 0
+
+    async def get_current_weather(self, location):
+        self.calls += 1
+        self.priority = current_priority()
+        return CurrentRecord(
+            temperature=self.temperature,
+            feels_like=19.0,
+            humidity=50,
+            pressure=1012,
+            wind_speed=2.0,
+            wind_direction=90,
+            conditions=(intern_condition("Clear", "clear sky", "01d"),),
+            city="Test City",
+            country="TC",
+            dt=self.dt
+        )
+
+
+async def take(stream, n):
+    return [await asyncio.wait_for(stream.__anext__(), 1) for _ in range(n)]
+
+
+def test_merge_patch_and_location_parsing():
+    assert merge_patch({"a": 1, "b": 2, "c": 3}, {"a": 1, "b": 5, "d": 4}) == {"b": 5, "d": 4, "c": None}
+    assert parse_location("51.5,-0.12").lat == 51.5
+    assert parse_location("Paris, FR").city == "Paris, FR"
+    with pytest.raises(ValueError):
+        parse_location("95,0")
+    assert format_event("delta", {"x": 1}) == b'event: delta\ndata: {"x":1}\n\n'
+    assert format_event("keepalive", {}).startswith(b":")
+
+
+@pytest.mark.asyncio
+async def test_subscribers_share_one_fetch_and_get_deltas():
+    provider = ChangingProvider()
+    hub = SubscriptionHub(WeatherService(provider=provider), refresh_interval=3600)
+    first = hub.subscribe([BatchLocation(lat=1, lon=2)])
+    second = hub.subscribe([BatchLocation(lat=1.00001, lon=2)])
+    try:
+        (event, data), = await take(first, 1)
+        assert event == "snapshot" and data["data"]["temperature"] == 20.0
+        (event, _), = await take(second, 1)
+        assert event == "snapshot"
+        assert provider.calls == 1
+        topic = hub.topics["1.0000,2.0000"]
+
+        # A new observation with the same values is not pushed
+        provider.dt += 600
+        await hub.refresh(topic)
+        provider.dt += 600
+        provider.temperature = 22.5
+        await hub.refresh(topic)
+
+        for stream in (first, second):
+            (event, data), = await take(stream, 1)
+            assert event == "delta"
+            assert set(data["changes"]) == {"temperature", "timestamp"}
+            assert data["changes"]["temperature"] == 22.5
+        assert hub.stats()["deltas"] == 1
+    finally:
+        await first.aclose()
+        await second.aclose()
+
+    await asyncio.sleep(0)
+    assert hub.topics == {}
+    assert topic.task.done()
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_resynced_with_snapshots():
+    provider = ChangingProvider()
+    hub = SubscriptionHub(WeatherService(provider=provider), refresh_interval=3600, buffer=2)
+    stream = hub.subscribe([BatchLocation(lat=1, lon=2)])
+    try:
+        await take(stream, 1)
+        topic = hub.topics["1.0000,2.0000"]
+        for i in range(5):
+            provider.temperature += 1
+            await hub.refresh(topic)
+
+        (event, data), = await take(stream, 1)
+
+        assert event == "snapshot"
+        assert data["data"]["temperature"] == 25.0
+        assert hub.resyncs == 1
+    finally:
+        await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_errors_are_pushed_once():
+    class FailingProvider(ChangingProvider):
+        async def get_current_weather(self, location):
+            raise ValueError("No data here")
+
+    hub = SubscriptionHub(WeatherService(provider=FailingProvider()), refresh_interval=3600)
+    stream = hub.subscribe([BatchLocation(lat=1, lon=2)], keepalive=0.05)
+    try:
+        (event, data), = await take(stream, 1)
+        await hub.refresh(hub.topics["1.0000,2.0000"])
+
+        assert (event, data["status_code"]) == ("error", 404)
+        assert (await take(stream, 1))[0][0] == "keepalive"
+    finally:
+        await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_polls_run_at_background_priority_under_a_topic_cap():
+    provider = ChangingProvider()
+    hub = SubscriptionHub(WeatherService(provider=provider), refresh_interval=3600, max_topics=2)
+    stream = hub.subscribe([BatchLocation(lat=1, lon=2), BatchLocation(lat=3, lon=4)])
+    try:
+        await take(stream, 2)
+        assert provider.priority is Priority.BACKGROUND
+
+        # Locations already polled still fit; a third one does not
+        shared = hub.subscribe([BatchLocation(lat=1, lon=2)])
+        await take(shared, 1)
+        await shared.aclose()
+        with pytest.raises(TooManyTopics):
+            await take(hub.subscribe([BatchLocation(lat=5, lon=6)]), 1)
+        assert len(hub.topics) == 2
+        assert hub.stats()["rejected"] == 1
+    finally:
+        await stream.aclose()
+
+
+def test_subscribe_rejects_bad_locations():
+    app.dependency_overrides[get_subscription_hub] = lambda: SubscriptionHub(WeatherService(MockWeatherProvider()))
+    try:
+        client = TestClient(app)
+        assert client.get("/weather/subscribe", params={"location": "91,0"}).status_code == 400
+        assert client.get("/weather/subscribe", params={"location": ["x"] * 51}).status_code == 400
+        assert client.get("/weather/subscribe").status_code == 400
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_subscribe_rejects_locations_over_the_topic_cap():
+    hub = SubscriptionHub(WeatherService(MockWeatherProvider()), max_topics=1)
+    app.dependency_overrides[get_subscription_hub] = lambda: hub
+    try:
+        response = TestClient(app).get("/weather/subscribe", params={"location": ["1,2", "3,4"]})
+        assert response.status_code == 503
+    finally:
+        app.dependency_overrides.clear()
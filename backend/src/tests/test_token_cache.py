@@ -0,0 +1,106 @@
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+
+from backend.src.auth import utils
+from backend.src.auth.token_cache import VerifiedTokenCache
+from backend.src.models.user import UserInDB
+
+
+def make_user(username: str = "johndoe") -> UserInDB:
+    return UserInDB(username=username, hashed_password="x", disabled=False)
+
+
+@pytest.fixture(autouse=True)
+def fresh_token_cache():
+    utils.token_cache.clear()
+    yield
+    utils.token_cache.clear()
+
+
+def test_cache_expires_at_token_exp():
+    cache = VerifiedTokenCache(max_entries=10, ttl=300)
+    cache.set("token-a", time.time() + 60, make_user())
+    cache.set("token-b", time.time() - 1, make_user())
+
+    assert cache.get("token-a").username == "johndoe"
+    assert cache.get("token-b") is None
+    assert len(cache) == 1
+
+
+def test_cache_entries_expire_after_ttl():
+    cache = VerifiedTokenCache(max_entries=10, ttl=5)
+    cache.set("token", time.time() + 600, make_user())
+
+    with patch.object(time, "time", return_value=time.time() + 6):
+        assert cache.get("token") is None
+
+
+def test_cache_is_bounded_lru():
+    cache = VerifiedTokenCache(max_entries=2)
+    expires = time.time() + 60
+    cache.set("a", expires, make_user("a"))
+    cache.set("b", expires, make_user("b"))
+    cache.get("a")
+    cache.set("c", expires, make_user("c"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_invalidate_user_drops_all_their_tokens():
+    cache = VerifiedTokenCache(max_entries=10)
+    expires = time.time() + 60
+    cache.set("t1", expires, make_user("alice"))
+    cache.set("t2", expires, make_user("alice"))
+    cache.set("t3", expires, make_user("johndoe"))
+
+    assert cache.invalidate_user("alice") == 2
+    assert cache.get("t1") is None
+    assert cache.get("t3") is not None
+
+
+def test_repeat_token_skips_verification():
+    token = utils.create_access_token({"sub": "johndoe"}, expires_delta=timedelta(minutes=5))
+
+    first = utils.get_user_for_token(token)
+    with patch.object(utils.jwt, "decode", side_effect=AssertionError("decoded again")):
+        second = utils.get_user_for_token(token)
+
+    assert second is first
+
+
+def test_disabling_user_revokes_cached_tokens():
+    token = utils.create_access_token({"sub": "alice"}, expires_delta=timedelta(minutes=5))
+    utils.get_user_for_token(token)
+
+    try:
+        utils.set_user_disabled("alice")
+        assert utils.get_user_for_token(token).disabled is True
+    finally:
+        utils.set_user_disabled("alice", False)
+
+
+def test_user_disabled_in_store_is_noticed_after_ttl():
+    token = utils.create_access_token({"sub": "alice"}, expires_delta=timedelta(minutes=5))
+    utils.get_user_for_token(token)
+
+    # As another worker, or an operator editing the store, would disable the user
+    utils.get_user_repository().set_disabled("alice", True)
+    try:
+        assert utils.get_user_for_token(token).disabled is False
+        later = time.time() + utils.token_cache.ttl + 1
+        with patch.object(time, "time", return_value=later):
+            assert utils.get_user_for_token(token).disabled is True
+    finally:
+        utils.set_user_disabled("alice", False)
+
+
+def test_invalid_token_is_rejected_and_not_cached():
+    with pytest.raises(HTTPException):
+        utils.get_user_for_token("not-a-jwt")
+    assert len(utils.token_cache) == 0
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from backend.src.auth import utils
+from backend.src.auth.user_store import (
+    DEFAULT_USERS,
+    InMemoryUserRepository,
+    SQLiteUserRepository,
+    load_users_file
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def repository(request, tmp_path):
+    if request.param == "memory":
+        repo = InMemoryUserRepository()
+    else:
+        repo = SQLiteUserRepository(str(tmp_path / "users.sqlite3"))
+    yield repo
+    repo.close()
+
+
+def test_seed_and_lookup(repository):
+    assert repository.seed(DEFAULT_USERS) == 2
+
+    user = repository.get("alice")
+    assert user.full_name == "Alice Wonderland"
+    assert user.disabled is False
+    assert repository.get("nobody") is None
+
+
+def test_seed_keeps_existing_users(repository):
+    repository.seed(DEFAULT_USERS)
+    repository.set_disabled("johndoe", True)
+
+    assert repository.seed(DEFAULT_USERS) == 0
+    assert repository.get("johndoe").disabled is True
+
+
+def test_set_disabled_unknown_user(repository):
+    assert repository.set_disabled("nobody", True) is False
+
+
+def test_sqlite_store_persists_across_connections(tmp_path):
+    path = str(tmp_path / "users.sqlite3")
+    first = SQLiteUserRepository(path)
+    first.seed(DEFAULT_USERS)
+    first.close()
+
+    second = SQLiteUserRepository(path)
+    assert second.get("johndoe").email == "johndoe@example.com"
+    second.close()
+
+
+def test_seed_users_file_with_precomputed_hashes(tmp_path, monkeypatch):
+    users_file = tmp_path / "users.json"
+    users_file.write_text(json.dumps([dict(DEFAULT_USERS[0], username="carol")]))
+    monkeypatch.setenv("AUTH_USERS_FILE", str(users_file))
+    utils.get_user_repository.cache_clear()
+    try:
+        assert load_users_file(str(users_file))[0]["username"] == "carol"
+        assert utils.authenticate_user("carol", "secret").username == "carol"
+        assert utils.get_user("alice") is None
+    finally:
+        utils.get_user_repository.cache_clear()
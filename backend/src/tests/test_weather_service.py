@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 from datetime import datetime
 from unittest.mock import AsyncMock, patch
@@ -7,15 +8,24 @@ from backend.src.models.weather import (
     WeatherForecast, 
     WeatherCondition,
     ForecastItem,
-    GeoLocation
+    GeoLocation,
+    AirQuality,
+    BatchLocation
+)
+from backend.src.models.records import (
+    AirQualityRecord,
+    CurrentRecord,
+    ForecastRecord,
+    from_model,
+    to_model
 )
 from backend.src.services.weather_service import WeatherProvider, WeatherService
 
 
-# Mock weather provider for testing
+# Mock weather provider for testing; providers return internal records
 class MockWeatherProvider(WeatherProvider):
-    async def get_current_weather(self, location: GeoLocation) -> CurrentWeather:
-        return CurrentWeather(
+    async def get_current_weather(self, location: GeoLocation) -> CurrentRecord:
+        return from_model(CurrentWeather(
             temperature=20.5,
             feels_like=19.8,
             humidity=65,
@@ -32,10 +42,10 @@ class MockWeatherProvider(WeatherProvider):
             city="Test City",
             country="TC",
             timestamp=datetime.now()
-        )
+        ))
     
-    async def get_forecast(self, location: GeoLocation) -> WeatherForecast:
-        return WeatherForecast(
+    async def get_forecast(self, location: GeoLocation) -> ForecastRecord:
+        return from_model(WeatherForecast(
             city="Test City",
             country="TC",
             forecast=[
@@ -55,7 +65,7 @@ class MockWeatherProvider(WeatherProvider):
                     wind_speed=4.3
                 )
             ]
-        )
+        ))
     
     async def geocode(self, city_name: str) -> GeoLocation:
         if city_name.lower() == "test city":
@@ -67,6 +77,16 @@ class MockWeatherProvider(WeatherProvider):
             )
         raise ValueError(f"City not found: {city_name}")
 
+    async def get_air_quality(self, location: GeoLocation) -> AirQualityRecord:
+        return from_model(AirQuality(
+            aqi=2,
+            description="Fair",
+            pollutants={"pm2_5": 8.2, "pm10": 12.4},
+            city=location.city or "Unknown",
+            country=location.country or "Unknown",
+            timestamp=datetime.now()
+        ))
+
 
 @pytest.fixture
 def weather_service():
@@ -83,7 +103,7 @@ async def test_get_current_weather_by_city(weather_service):
     result = await weather_service.get_current_weather_by_city(city)
     
     # Assert
-    assert isinstance(result, CurrentWeather)
+    assert isinstance(result, CurrentRecord)
     assert result.city == "Test City"
     assert result.temperature == 20.5
 
@@ -97,7 +117,7 @@ async def test_get_current_weather_by_coordinates(weather_service):
     result = await weather_service.get_current_weather_by_coordinates(lat, lon)
     
     # Assert
-    assert isinstance(result, CurrentWeather)
+    assert isinstance(result, CurrentRecord)
     assert result.city == "Test City"
     assert result.temperature == 20.5
 
@@ -111,10 +131,10 @@ async def test_get_forecast_by_city(weather_service):
     result = await weather_service.get_forecast_by_city(city)
     
     # Assert
-    assert isinstance(result, WeatherForecast)
+    assert isinstance(result, ForecastRecord)
     assert result.city == "Test City"
-    assert len(result.forecast) == 1
-    assert result.forecast[0].temp_max == 25.3
+    assert len(result) == 1
+    assert to_model(result).forecast[0].temp_max == 25.3
 
 
 @pytest.mark.asyncio
@@ -125,3 +145,50 @@ async def test_city_not_found(weather_service):
     # Act & Assert
     with pytest.raises(ValueError, match=f"City not found: {city}"):
         await weather_service.get_current_weather_by_city(city)
+
+
+@pytest.mark.asyncio
+async def test_get_current_weather_batch(weather_service):
+    # Arrange
+    locations = [
+        BatchLocation(city="Test City"),
+        BatchLocation(lat=35.12, lon=-106.59),
+        BatchLocation(city="Nonexistent City"),
+    ]
+    
+    # Act
+    results = await weather_service.get_current_weather_batch(locations)
+    
+    # Assert
+    assert [item.location for item in results] == locations
+    assert results[0].result.city == "Test City"
+    assert results[1].result.temperature == 20.5
+    assert results[2].result is None
+    assert results[2].error.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_batch_respects_concurrency_limit():
+    # Arrange
+    active = 0
+    peak = 0
+
+    class TrackingProvider(MockWeatherProvider):
+        async def get_air_quality(self, location):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.001)
+            active -= 1
+            return await super().get_air_quality(location)
+
+    service = WeatherService(provider=TrackingProvider())
+    locations = [BatchLocation(lat=i, lon=i) for i in range(20)]
+    
+    # Act
+    results = await service.get_air_quality_batch(locations, max_concurrency=3)
+    
+    # Assert
+    assert len(results) == 20
+    assert all(item.error is None for item in results)
+    assert peak == 3
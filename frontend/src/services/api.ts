@@ -51,4 +51,74 @@ export const weatherApi = {
     });
     return response.data;
   },
+
+  /**
+   * Subscribe to live current weather for city names or "lat,lon" strings.
+   * onUpdate receives the server's key for the location and the full
+   * observation each time it changes. Returns a function that unsubscribes.
+   */
+  subscribeToCurrentWeather: (
+    locations: string[],
+    onUpdate: (location: string, weather: CurrentWeather) => void,
+    onError?: (location: string, detail: string) => void
+  ): (() => void) => {
+    const params = new URLSearchParams();
+    locations.forEach((location) => params.append('location', location));
+    const source = new EventSource(`${API_URL}/weather/subscribe?${params}`);
+    const latest: Record<string, CurrentWeather> = {};
+
+    source.addEventListener('snapshot', (event) => {
+      const { location, data } = JSON.parse((event as MessageEvent).data);
+      latest[location] = data;
+      onUpdate(location, data);
+    });
+    // Deltas are JSON merge patches against the last pushed observation
+    source.addEventListener('delta', (event) => {
+      const { location, changes } = JSON.parse((event as MessageEvent).data);
+      latest[location] = { ...latest[location], ...changes };
+      onUpdate(location, latest[location]);
+    });
+    source.addEventListener('error', (event) => {
+      // Connection errors carry no data; EventSource reconnects on its own
+      const message = event as MessageEvent;
+      if (message.data && onError) {
+        const { location, detail } = JSON.parse(message.data);
+        onError(location, detail);
+      }
+    });
+
+    return () => source.close();
+  },
+
+  /**
+   * Get a weather field interpolated over a bounding box, e.g. for a map
+   * heatmap. Values run row by row from north to south; cells without a
+   * value are NaN.
+   */
+  getWeatherGrid: async (
+    bounds: { minLat: number; minLon: number; maxLat: number; maxLon: number },
+    rows: number,
+    cols: number,
+    field: string = 'temperature'
+  ): Promise<{ rows: number; cols: number; values: Float32Array }> => {
+    const response = await api.get<ArrayBuffer>('/weather/grid', {
+      params: {
+        min_lat: bounds.minLat,
+        min_lon: bounds.minLon,
+        max_lat: bounds.maxLat,
+        max_lon: bounds.maxLon,
+        rows,
+        cols,
+        field,
+      },
+      responseType: 'arraybuffer',
+    });
+    const offset = parseFloat(response.headers['x-grid-offset']);
+    const scale = parseFloat(response.headers['x-grid-scale']);
+    const nodata = parseInt(response.headers['x-grid-nodata'], 10);
+    // Codes are little-endian uint16, which is the byte order of every supported browser
+    const codes = new Uint16Array(response.data);
+    const values = Float32Array.from(codes, (code) => (code === nodata ? NaN : offset + code * scale));
+    return { rows, cols, values };
+  },
 };